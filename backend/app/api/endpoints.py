@@ -1,5 +1,10 @@
 # api/endpoints.py
 from fastapi import HTTPException, Depends
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.background import BackgroundTask
+from datetime import datetime
+import asyncio
+import json
 import logging
 from app.core.firebase_service import firebase_service
 from app.core.auth import SessionManager, AuthManager
@@ -12,50 +17,117 @@ from app.models.schemas import (
 )
 from app.core.rag_engine import rag_engine
 from app.core.auth import AuthManager, SessionManager, get_current_user, check_chat_limit
+from app.core.concurrency import run_in_cpu_pool, run_in_io_pool
+from app.core.startup import startup_state
+from app.core.conversation_state import conversation_states, condense_question
+from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+def _ensure_ready():
+    """Reject RAG requests with 503 until the background warm-up has finished"""
+    if not startup_state.ready:
+        raise HTTPException(status_code=503, detail="RAG system is warming up, please retry shortly")
+
+async def _conversation_query(conversation_id, is_new, message, current_user):
+    """Standalone question for retrieval plus the previous turn's doc ids if it is a follow-up"""
+    google_id = current_user.google_id
+    if is_new:
+        state = conversation_states.new(conversation_id, google_id)
+    else:
+        # Firestore is only read when this worker has no (fresh) state for the conversation
+        try:
+            state = await conversation_states.aget(conversation_id, google_id, lambda: run_in_io_pool(
+                firebase_service.get_recent_conversation_messages,
+                google_id, conversation_id, settings.CONVERSATION_HISTORY_FETCH_LIMIT
+            ))
+        except PermissionError:
+            raise HTTPException(status_code=403, detail="Conversation not found for this user")
+    question = await condense_question(message, state, rag_engine.concise_llm)
+    return question, (state.last_doc_ids if question != message else None)
+
+def _source_ids(sources):
+    return [src.get("id") for src in sources or [] if isinstance(src, dict)]
+
 # Existing endpoints (your current ones)
 async def health_check():
     """Health check endpoint"""
     try:
-        if rag_engine.vectordb is None or rag_engine.qa is None:
-            return {"status": "unhealthy", "message": "RAG system not initialized"}
+        if not startup_state.ready:
+            status = "unhealthy" if startup_state.error else "starting"
+            return {"status": status, "message": "RAG system not initialized", "startup": startup_state.profile()}
         
         # Test database connection
-        test_docs = rag_engine.vectordb.similarity_search("test", k=1)
+        await run_in_cpu_pool(rag_engine.vectordb.count)
         
-        return {"status": "healthy", "message": "RAG Chatbot API is running"}
+        return {
+            "status": "healthy",
+            "message": "RAG Chatbot API is running",
+            "startup": startup_state.profile(),
+            "answer_cache": rag_engine.answer_cache.stats(),
+            "single_flight": rag_engine.in_flight.stats(),
+            "conversation_states": conversation_states.stats(),
+            "llm_transport": rag_engine.llm_transport_stats(),
+            "llm_backends": rag_engine.llm.stats() if hasattr(rag_engine.llm, "stats") else None,
+            "embedding_cache": rag_engine.embedding.stats(),
+            "embedding_batches": rag_engine.embedding_batcher.stats() if rag_engine.embedding_batcher else None,
+            "sentence_embeddings": rag_engine.compressor.stats() if rag_engine.compressor else None,
+            "sidecar": await run_in_cpu_pool(rag_engine.sidecar.stats) if rag_engine.sidecar else None,
+            "shards": (await run_in_cpu_pool(rag_engine.vectordb.shard_stats)
+                       if hasattr(rag_engine.vectordb, "shard_stats") else None)
+        }
     except Exception as e:
         return {"status": "unhealthy", "message": f"Error: {str(e)}"}
 
+async def liveness_check():
+    """Liveness probe: the process serves requests; fails only if warm-up crashed"""
+    if startup_state.error:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": startup_state.error})
+    return {"status": "alive"}
+
+async def readiness_check():
+    """Readiness probe: 503 until models are loaded and warmed up, with the startup profile"""
+    profile = startup_state.profile()
+    if not startup_state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting", **profile})
+    return {"status": "ready", **profile}
+
 async def chat(request: ChatRequest, current_user: UserInfo):
     """Main chat endpoint - now saves to Firebase"""
+    _ensure_ready()
+    
     try:
         logger.info(f"Processing question from user {current_user.email}: {request.message}")
         
         # Use provided conversation_id or generate new one
-        conversation_id = request.conversation_id if request.conversation_id != 'default' else f"conv_{current_user.google_id}_{int(datetime.utcnow().timestamp())}"
+        is_new = request.conversation_id == 'default'
+        conversation_id = request.conversation_id if not is_new else f"conv_{current_user.google_id}_{int(datetime.utcnow().timestamp())}"
         
-        # Save user message to Firebase
-        firebase_service.save_message(
-            google_id=current_user.google_id,
-            conversation_id=conversation_id,
-            message_type='user',
-            content=request.message
-        )
+        # Resolve follow-ups against the conversation before this message is stored
+        question, prior_doc_ids = await _conversation_query(conversation_id, is_new, request.message, current_user)
         
-        # Get comprehensive answer using RAG
-        answer, sources = rag_engine.ask_comprehensive_question(request.message)
+        # Save user message to Firebase while the RAG answer is being generated
+        _, (answer, sources) = await asyncio.gather(
+            run_in_io_pool(
+                firebase_service.save_message,
+                google_id=current_user.google_id,
+                conversation_id=conversation_id,
+                message_type='user',
+                content=request.message
+            ),
+            rag_engine.aask_comprehensive_question(question, prior_doc_ids=prior_doc_ids)
+        )
+        conversation_states.record_turn(conversation_id, request.message, answer, _source_ids(sources))
         
         # Increment chat count in Firebase
-        new_count = firebase_service.increment_chat_count(current_user.google_id)
-        remaining_chats = firebase_service.get_remaining_chats(current_user.google_id)
+        new_count = await run_in_io_pool(firebase_service.increment_chat_count, current_user.google_id)
+        remaining_chats = await run_in_io_pool(firebase_service.get_remaining_chats, current_user.google_id)
         
         logger.info(f"User {current_user.email} chat count: {new_count}, remaining: {remaining_chats}")
         
         # Save bot response to Firebase
-        firebase_service.save_message(
+        await run_in_io_pool(
+            firebase_service.save_message,
             google_id=current_user.google_id,
             conversation_id=conversation_id,
             message_type='bot',
@@ -80,23 +152,93 @@ async def chat(request: ChatRequest, current_user: UserInfo):
             conversation_id=conversation_id
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing chat request: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+def _sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def chat_stream(request: ChatRequest, current_user: UserInfo):
+    """Streaming chat endpoint - sources first, then answer tokens as SSE"""
+    _ensure_ready()
+    
+    logger.info(f"Streaming question from user {current_user.email}: {request.message}")
+    
+    is_new = request.conversation_id == 'default'
+    conversation_id = request.conversation_id if not is_new else f"conv_{current_user.google_id}_{int(datetime.utcnow().timestamp())}"
+    result = {"answer": None, "sources": []}
+    
+    # Resolve follow-ups against the conversation before this message is stored
+    question, prior_doc_ids = await _conversation_query(conversation_id, is_new, request.message, current_user)
+    
+    # Save user message to Firebase while retrieval runs
+    save_user_message = asyncio.ensure_future(run_in_io_pool(
+        firebase_service.save_message,
+        google_id=current_user.google_id,
+        conversation_id=conversation_id,
+        message_type='user',
+        content=request.message
+    ))
+    
+    async def event_stream():
+        answer = ""
+        try:
+            async for event, data in rag_engine.astream_comprehensive_question(question, prior_doc_ids):
+                if event == "sources":
+                    result["sources"] = data
+                    yield _sse_event("sources", {"sources": data, "conversation_id": conversation_id})
+                else:
+                    answer += data
+                    yield _sse_event("token", {"text": data})
+            
+            result["answer"] = answer
+            conversation_states.record_turn(conversation_id, request.message, answer, _source_ids(result["sources"]))
+            yield _sse_event("done", {"conversation_id": conversation_id})
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {str(e)}")
+            yield _sse_event("error", {"detail": f"Error processing request: {str(e)}"})
+    
+    async def persist_answer():
+        # Runs after the stream has closed; nothing is stored for failed/aborted streams
+        await save_user_message
+        if result["answer"] is None:
+            return
+        
+        new_count = await run_in_io_pool(firebase_service.increment_chat_count, current_user.google_id)
+        logger.info(f"User {current_user.email} chat count: {new_count}")
+        await run_in_io_pool(
+            firebase_service.save_message,
+            google_id=current_user.google_id,
+            conversation_id=conversation_id,
+            message_type='bot',
+            content=result["answer"],
+            sources=result["sources"]
+        )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(persist_answer)
+    )
+
 async def debug_question(request: ChatRequest, current_user: UserInfo = Depends(get_current_user)):
     """Debug endpoint - requires authentication but no chat limit"""
+    _ensure_ready()
+    
     try:
         logger.info(f"Debug request from user {current_user.email}: {request.message}")
         
-        # Use the exact debug function from Colab
-        answer = rag_engine.debug_rag_response(request.message)
-        
-        # Also get retrieval info
-        docs = rag_engine.vectordb.as_retriever(search_kwargs={"k": 4}).get_relevant_documents(request.message)
+        # Retrieve once and reuse the trace for both the answer and the report
+        trace = await rag_engine.aretrieve(request.message)
+        answer = await rag_engine.adebug_rag_response(request.message, trace=trace)
         
         context_info = []
-        for i, doc in enumerate(docs):
+        for i, doc in enumerate(trace.docs):
             if doc.page_content.strip():
                 context_info.append({
                     "doc_id": i+1,
@@ -106,9 +248,10 @@ async def debug_question(request: ChatRequest, current_user: UserInfo = Depends(
         
         return {
             "question": request.message,
-            "retrieved_docs_count": len(docs),
+            "retrieved_docs_count": len(trace.docs),
             "context_preview": context_info,
-            "answer": answer
+            "answer": answer,
+            "retrieval": trace.to_dict()
         }
         
     except Exception as e:
@@ -117,13 +260,15 @@ async def debug_question(request: ChatRequest, current_user: UserInfo = Depends(
 
 async def concise_chat(request: ChatRequest, current_user: UserInfo = Depends(check_chat_limit)):
     """Concise answer endpoint - requires authentication and checks limits"""
+    _ensure_ready()
+    
     try:
         logger.info(f"Concise chat from user {current_user.email}: {request.message}")
         
         # Increment chat count
-        SessionManager.increment_chat_count(current_user.google_id)
+        await run_in_io_pool(SessionManager.increment_chat_count, current_user.google_id)
         
-        answer = rag_engine.ask_concise_question(request.message)
+        answer = await rag_engine.aask_concise_question(request.message)
         
         return {
             "response": answer,
@@ -141,17 +286,17 @@ async def google_login(request: GoogleTokenRequest):
     """Login with Google OAuth token - now saves to Firebase"""
     try:
         # Verify Google token and get user info
-        user_info = AuthManager.verify_google_token(request.token)
+        user_info = await run_in_io_pool(AuthManager.verify_google_token, request.token)
         logger.info(f"User logged in: {user_info.email}")
         
         # Create or update user session in Firebase
-        SessionManager.create_or_update_session(user_info)
+        await run_in_io_pool(SessionManager.create_or_update_session, user_info)
         
         # Create JWT token
         access_token = AuthManager.create_jwt_token(user_info)
         
         # Get remaining chats from Firebase
-        remaining_chats = firebase_service.get_remaining_chats(user_info.google_id)
+        remaining_chats = await run_in_io_pool(firebase_service.get_remaining_chats, user_info.google_id)
         
         return AuthResponse(
             access_token=access_token,
@@ -166,8 +311,8 @@ async def google_login(request: GoogleTokenRequest):
 async def get_user_status(current_user: UserInfo):
     """Get current user's status from Firebase"""
     try:
-        user_data = firebase_service.get_user(current_user.google_id)
-        remaining_chats = firebase_service.get_remaining_chats(current_user.google_id)
+        user_data = await run_in_io_pool(firebase_service.get_user, current_user.google_id)
+        remaining_chats = await run_in_io_pool(firebase_service.get_remaining_chats, current_user.google_id)
         
         return {
             "user": current_user,
@@ -185,7 +330,7 @@ async def get_user_status(current_user: UserInfo):
 
 async def check_chat_limits(current_user: UserInfo):
     """Check user's chat limits"""
-    remaining_chats = SessionManager.get_remaining_chats(current_user.google_id)
+    remaining_chats = await run_in_io_pool(SessionManager.get_remaining_chats, current_user.google_id)
     can_chat = remaining_chats > 0
     
     if not can_chat:
@@ -217,7 +362,7 @@ from app.core.auth import SessionManager, AuthManager
 async def get_chat_history(current_user: UserInfo):
     """Get user's chat history"""
     try:
-        conversations = firebase_service.get_user_conversations(current_user.google_id)
+        conversations = await run_in_io_pool(firebase_service.get_user_conversations, current_user.google_id)
         return {
             "conversations": conversations,
             "total": len(conversations)
@@ -230,7 +375,7 @@ async def get_chat_history(current_user: UserInfo):
 async def get_conversation_messages(conversation_id: str, current_user: UserInfo):
     """Get messages for a specific conversation"""
     try:
-        messages = firebase_service.get_conversation_messages(conversation_id)
+        messages = await run_in_io_pool(firebase_service.get_conversation_messages, conversation_id)
         return {
             "messages": messages,
             "conversation_id": conversation_id,
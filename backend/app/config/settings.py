@@ -13,6 +13,7 @@ class Settings:
     
     # RAG Configuration
     DB_PATH = "./chroma_db"
+    COLLECTION_NAME = "langchain"  # LangChain's default Chroma collection
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     
     # Model Configuration
@@ -20,11 +21,153 @@ class Settings:
     LLM_MODEL = "llama-3.1-8b-instant"
     LLM_TEMPERATURE = 0
     
+    # LLM Routing: LLM_BACKENDS is a JSON list of {"name", "kind": "groq"|"openai", "model",
+    # "base_url", "api_key", "expected_latency_ms"}; unset means one Groq backend for LLM_MODEL.
+    # Short /concise questions prefer the backends named in LLM_CONCISE_BACKENDS.
+    LLM_BACKENDS = os.getenv("LLM_BACKENDS")
+    LLM_CONCISE_BACKENDS = [name for name in os.getenv("LLM_CONCISE_BACKENDS", "").split(",") if name]
+    LLM_CONCISE_MAX_QUESTION_CHARS = 200
+    LLM_ROUTER_EWMA_ALPHA = 0.2
+    LLM_ROUTER_PRIOR_LATENCY_MS = 1000
+    LLM_ROUTER_FAILURE_THRESHOLD = 3
+    LLM_ROUTER_COOLDOWN_SECONDS = 30
+    LLM_ROUTER_EXPLORE_RATE = 0.05
+    
+    # LLM Transport (pooled httpx client under ChatGroq; LLM_BASE_URL can point at
+    # benchmarks/stub_llm_server.py for testing)
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))   # per-call deadline, retries included
+    LLM_CONNECT_TIMEOUT_SECONDS = 5
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_BACKOFF_BASE_MS = 250
+    LLM_BACKOFF_MAX_MS = 8000
+    LLM_POOL_CONNECTIONS = 100
+    LLM_KEEPALIVE_CONNECTIONS = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS = 30
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_DELAY_MS = 1500       # used until there are enough samples for a p95
+    LLM_HEDGE_MIN_SAMPLES = 20
+    
+    # Embedding Backend: "torch" (sentence-transformers), "onnx" or "onnx-int8"
+    # (export with `python -m app.scripts.onnx_embeddings export`, check with `... parity`)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./models/paraphrase-multilingual-MiniLM-L12-v2-onnx")
+    EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0")) or None
+    
+    # Query Embedding Cache (in-process LRU + on-disk SQLite tier shared by workers)
+    EMBEDDING_CACHE_SIZE = 4096
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3")
+    EMBEDDING_CACHE_DISK_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ROWS", "200000"))  # ~0.35 KB each at 384 dims
+    EMBEDDING_CACHE_DISK_TTL_SECONDS = 30 * 24 * 60 * 60  # since last use
+    
+    # Query Micro-batching (concurrent query encodes share one forward pass)
+    EMBEDDING_MICRO_BATCHING = os.getenv("EMBEDDING_MICRO_BATCHING", "true").lower() == "true"
+    EMBEDDING_BATCH_WINDOW_MS = 3
+    EMBEDDING_MAX_BATCH = 32
+    
+    # Vector Store: "chroma" (DB_PATH), "hnsw" (mmap-backed store built with
+    # `python -m app.scripts.chroma_to_hnsw`) or "domains" (one collection per domain,
+    # ingested with `--domain`; queries only search the domains nearest by centroid) or
+    # "sharded" (split with `python -m app.scripts.shard_index`, one process per shard)
+    VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
+    HNSW_INDEX_PATH = os.getenv("HNSW_INDEX_PATH", "./hnsw_index")
+    HNSW_EF_SEARCH = 64
+    HNSW_M = 16
+    HNSW_EF_CONSTRUCTION = 200
+    DOMAIN_COLLECTION_PREFIX = "domain_"
+    DOMAIN_TOP_N = 2
+    DOMAIN_SIMILARITY_MARGIN = 0.1  # also search domains within this cosine distance of the best
+    SHARD_COUNT = int(os.getenv("SHARD_COUNT", "4"))
+    SHARD_DB_PATH = os.getenv("SHARD_DB_PATH", "./chroma_shards")
+    SHARD_SOCKET_PATH = os.getenv("SHARD_SOCKET_PATH", "/tmp/rag-shard-{shard}.sock")
+    
+    # Sidecar Mode: one local process (python -m app.sidecar) owns the embedding model and
+    # vector store; API workers become thin clients over a Unix socket
+    SIDECAR_ENABLED = os.getenv("SIDECAR_ENABLED", "false").lower() == "true"
+    SIDECAR_SOCKET_PATH = os.getenv("SIDECAR_SOCKET_PATH", "/tmp/rag-sidecar.sock")
+    SIDECAR_TIMEOUT_SECONDS = 10
+    
     # Retrieval Configuration
     RETRIEVAL_K = 4
     MAX_CONTEXT_TOKENS = 2500
     MAX_TOKENS = 300
     
+    # Token Budget (counted with the LLM's own tokenizer; ~4 chars/token if it can't be loaded).
+    # A Hub repo id (ungated mirror of the Llama 3.1 tokenizer by default) or a local tokenizer.json;
+    # TOKENIZER_REQUIRED=true fails startup instead of falling back to the estimate
+    LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "NousResearch/Meta-Llama-3.1-8B-Instruct")
+    TOKENIZER_REQUIRED = os.getenv("TOKENIZER_REQUIRED", "false").lower() == "true"
+    MAX_PROMPT_TOKENS = 5500
+    TOKEN_COUNT_CACHE_SIZE = 50000
+    
+    # Hybrid Retrieval (BM25 index persisted next to the DB, fused with vector results by RRF)
+    HYBRID_RETRIEVAL_ENABLED = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+    BM25_INDEX_PATH = os.path.join(DB_PATH, "bm25")
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    HYBRID_CANDIDATES = 20
+    RRF_K = 60
+    
+    # Reranking (optional CPU cross-encoder between retrieval and context packing)
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    # Multilingual like the corpus; 12 candidates x 256 tokens through 12 layers needs ~0.5s on CPU
+    RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+    RERANK_CANDIDATES = 12
+    RERANK_BUDGET_MS = int(os.getenv("RERANK_BUDGET_MS", "800"))
+    RERANK_MAX_LENGTH = 256
+    # Requests reranked at once; while all workers are busy further requests skip
+    # reranking (retrieval order) rather than queue, so this caps reranked throughput
+    RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "2"))
+    
+    # Diversification (near-duplicate suppression + MMR over the candidates before packing)
+    DIVERSITY_ENABLED = os.getenv("DIVERSITY_ENABLED", "true").lower() == "true"
+    DIVERSITY_CANDIDATES = 12
+    NEAR_DUPLICATE_MAX_HAMMING = 3  # SimHash bits (of 64) within which chunks count as duplicates
+    MMR_LAMBDA = 0.7  # 1.0 = pure relevance, 0.0 = pure novelty
+    
+    # Context Compression (keep the sentences closest to the query instead of whole chunks).
+    # Off by default: it needs sentence embeddings, precomputed at warm-up for up to
+    # SENTENCE_EMBEDDING_CACHE_SIZE chunks (size it to the corpus) and embedded per request beyond that
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "false").lower() == "true"
+    COMPRESSION_PRECOMPUTE = os.getenv("COMPRESSION_PRECOMPUTE", "true").lower() == "true"
+    COMPRESSION_MAX_CONTEXT_TOKENS = 1200
+    COMPRESSION_MIN_SIMILARITY = 0.0
+    SENTENCE_EMBEDDING_CACHE_SIZE = 5000  # chunks
+    
+    # Concurrency Configuration (blocking work is kept off the event loop)
+    RAG_THREAD_POOL_SIZE = int(os.getenv("RAG_THREAD_POOL_SIZE", os.cpu_count() or 4))
+    IO_THREAD_POOL_SIZE = int(os.getenv("IO_THREAD_POOL_SIZE", "32"))
+    
+    # Answer Cache Configuration (semantic cache in front of the LLM)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_MAX_ENTRIES = 1024
+    ANSWER_CACHE_TTL_SECONDS = 6 * 60 * 60
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95
+    
+    # Single-flight: identical questions already in flight share one retrieval + LLM call
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    
+    # Conversation State (per-worker LRU of recent turns, filled from Firestore on a miss)
+    CONVERSATION_CACHE_SIZE = 2048
+    CONVERSATION_MAX_TURNS = 6  # messages, user and assistant
+    CONVERSATION_STATE_TTL_SECONDS = 600  # reload after this long, other workers may have served turns
+    CONVERSATION_SUMMARY_MAX_CHARS = 600
+    CONVERSATION_HISTORY_FETCH_LIMIT = 50
+    CONVERSATION_FOLLOW_UP_MAX_WORDS = 12
+    CONVERSATION_CONDENSE_WITH_LLM = os.getenv("CONVERSATION_CONDENSE_WITH_LLM", "true").lower() == "true"
+    CONVERSATION_CONDENSE_TIMEOUT_SECONDS = 3
+    
+    # Ingestion Configuration (python -m app.ingestion)
+    INGEST_CHUNK_SIZE = 1000
+    INGEST_CHUNK_OVERLAP = 100
+    INGEST_BATCH_SIZE = 1024        # chunks buffered per embed + upsert round
+    INGEST_EMBED_BATCH_SIZE = 64    # sentence-transformer forward-pass batch
+    INGEST_EXTENSIONS = (".txt", ".md", ".csv", ".json", ".html", ".pdf")
+    INDEX_REFRESH_INTERVAL_SECONDS = 60  # how often API workers check for a newly published index
+    
+    # Metrics (Prometheus /metrics; needs the optional prometheus_client package)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
     # Google OAuth Configuration
     GOOGLE_CLIENT_ID = "2574307330-5adorlgn33m7imegppok04bjdp9dkn4e.apps.googleusercontent.com"
     GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")  # Add this to your .env file
@@ -0,0 +1,108 @@
+# core/answer_cache.py
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SemanticAnswerCache:
+    """LRU + TTL answer cache keyed by query embedding (cosine similarity lookup)"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, similarity_threshold=0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        # One row per slot; allocated on first insert once the embedding size is known
+        self._vectors = None
+        # slot -> (expires_at, answer, sources), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._free_slots = []
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding):
+        """Return (answer, sources) for the closest cached question, or None on a miss"""
+        query = self._normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            if self._entries:
+                slots = np.fromiter(self._entries.keys(), dtype=np.int64, count=len(self._entries))
+                similarities = self._vectors[slots] @ query
+
+                for idx in np.argsort(-similarities):
+                    if similarities[idx] < self.similarity_threshold:
+                        break
+                    slot = int(slots[idx])
+                    expires_at, answer, sources = self._entries[slot]
+                    if expires_at <= now:
+                        del self._entries[slot]
+                        self._free_slots.append(slot)
+                        self.expirations += 1
+                        continue
+
+                    self._entries.move_to_end(slot)
+                    self.hits += 1
+                    return answer, [dict(src) for src in sources]
+
+            self.misses += 1
+            return None
+
+    def put(self, embedding, answer, sources):
+        """Cache an answer, evicting the least recently used entry when full"""
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._entries.clear()
+                self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                slot, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+
+            self._vectors[slot] = vector
+            self._entries[slot] = (
+                time.monotonic() + self.ttl_seconds,
+                answer,
+                [dict(src) for src in sources]
+            )
+
+    def clear(self):
+        """Drop every cached answer (e.g. after the vector DB is reloaded)"""
+        with self._lock:
+            self._entries.clear()
+            if self._vectors is not None:
+                self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        logger.info("Answer cache cleared")
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
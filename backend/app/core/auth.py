@@ -11,6 +11,7 @@ import logging
 from ..config.settings import settings
 from ..models.schemas import UserInfo
 from .firebase_service import firebase_service
+from .concurrency import run_in_io_pool
 
 logger = logging.getLogger(__name__)
 
@@ -113,7 +114,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 # Dependency to check if user can chat
 async def check_chat_limit(current_user: UserInfo = Depends(get_current_user)) -> UserInfo:
     """FastAPI dependency to check if user has remaining chats"""
-    if not SessionManager.can_chat(current_user.google_id):
+    if not await run_in_io_pool(SessionManager.can_chat, current_user.google_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={
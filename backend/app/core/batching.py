@@ -0,0 +1,114 @@
+# core/batching.py
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class MicroBatchingEmbeddings(Embeddings):
+    """Coalesces concurrent embed_query calls into one forward pass.
+
+    A dispatcher thread takes the first waiting query, keeps collecting for up to
+    window_ms (or until max_batch queries are queued), encodes them together and
+    resolves each caller's future with its own vector. close() lets queued
+    queries finish and then stops the dispatcher.
+    """
+
+    def __init__(self, embedding: Embeddings, window_ms=3, max_batch=32):
+        self.embedding = embedding
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.queries = 0
+        self.batch_sizes = Counter()
+
+        self._dispatcher = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def _collect(self):
+        """Next batch, and whether close() was called behind it"""
+        batch = [self._queue.get()]
+        if batch[0] is _STOP:
+            return [], True
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._encode(batch)
+        logger.info("Embedding batcher stopped")
+
+    def _encode(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            vectors = self.embedding.embed_documents(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+        with self._lock:
+            self.batches += 1
+            self.queries += len(batch)
+            self.batch_sizes[len(batch)] += 1
+
+    def embed_query(self, text: str) -> List[float]:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Embedding batcher is closed")
+            self._queue.put((text, future))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Callers passing whole batches already get the batching benefit
+        return self.embedding.embed_documents(texts)
+
+    def close(self, timeout=5.0):
+        """Stop taking queries; the ones already queued are still encoded"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._dispatcher.join(timeout)
+
+    def stats(self):
+        """Batch-size distribution for tuning the window and batch size"""
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "queries": self.queries,
+                "mean_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "queued": self._queue.qsize()
+            }
@@ -0,0 +1,35 @@
+# core/concurrency.py
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Embedding and vector search are CPU-bound; keep that pool close to the core count
+cpu_pool = ThreadPoolExecutor(max_workers=settings.RAG_THREAD_POOL_SIZE, thread_name_prefix="rag-cpu")
+
+# Blocking network clients (Firestore, sync LLM fallbacks) mostly wait, so they get a wider pool
+io_pool = ThreadPoolExecutor(max_workers=settings.IO_THREAD_POOL_SIZE, thread_name_prefix="rag-io")
+
+async def run_in_cpu_pool(func, *args, **kwargs):
+    """Run a blocking CPU-bound call without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. the metrics endpoint label) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(cpu_pool, functools.partial(context.run, func, *args, **kwargs))
+
+async def run_in_io_pool(func, *args, **kwargs):
+    """Run a blocking I/O call (Firestore etc.) without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(io_pool, functools.partial(context.run, func, *args, **kwargs))
+
+def shutdown_pools():
+    """Stop accepting work and let in-flight calls finish"""
+    cpu_pool.shutdown(wait=False, cancel_futures=True)
+    io_pool.shutdown(wait=False, cancel_futures=True)
+    logger.info("Worker thread pools shut down")
@@ -0,0 +1,119 @@
+# core/context_compressor.py
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.core.context_packer import split_sentences, token_counter
+
+logger = logging.getLogger(__name__)
+
+class SentenceEmbeddingCache:
+    """Sentence splits and normalized sentence embeddings per chunk, LRU by content hash"""
+
+    def __init__(self, embedding, max_chunks=5000):
+        self.embedding = embedding
+        self.max_chunks = max_chunks
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, texts):
+        """[(sentences, (n, dim) matrix)] per text; all uncached sentences are embedded in one call"""
+        keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+        entries = [None] * len(texts)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._cache.get(key)
+                if entry is None:
+                    missing.append(i)
+                    continue
+                self._cache.move_to_end(key)
+                entries[i] = entry
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            splits = {i: split_sentences(texts[i]) for i in missing}
+            sentences = [sentence for i in missing for sentence in splits[i]]
+            vectors = np.asarray(self.embedding.embed_documents(sentences), dtype=np.float32) if sentences else None
+            if vectors is not None:
+                vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+            start = 0
+            with self._lock:
+                for i in missing:
+                    count = len(splits[i])
+                    entries[i] = (splits[i], vectors[start:start + count] if count else None)
+                    start += count
+                    self._cache[keys[i]] = entries[i]
+                    self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.max_chunks:
+                    self._cache.popitem(last=False)
+        return entries
+
+    def preload(self, vectordb, batch_size=256):
+        """Embed the sentences of up to max_chunks stored chunks ahead of the first request"""
+        total = min(vectordb.count(), self.max_chunks)
+        for offset in range(0, total, batch_size):
+            batch = vectordb.get(include=("documents",), limit=min(batch_size, total - offset), offset=offset)
+            self.get_many([(text or "").strip() for text in batch["documents"]])
+        # Misses from here on are chunks the request path has to embed itself
+        with self._lock:
+            self.hits = self.misses = 0
+        logger.info(f"✅ Sentence embeddings precomputed for {total} chunks")
+        return total
+
+    def stats(self):
+        with self._lock:
+            return {"chunks": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+class ContextCompressor:
+    """Query-focused extractive compression of the retrieved chunks.
+
+    Every sentence is scored against the query embedding in one matrix
+    product; the best ones are packed into the token budget and emitted per
+    chunk in their original order.
+    """
+
+    def __init__(self, embedding, max_chunks=5000, min_similarity=0.0):
+        self.sentences = SentenceEmbeddingCache(embedding, max_chunks=max_chunks)
+        self.min_similarity = min_similarity
+
+    def pack(self, docs, query_embedding, max_context_tokens, counter=None):
+        """(context, tokens_used) built from the highest-scoring sentences, like pack_documents"""
+        counter = counter or token_counter
+        entries = self.sentences.get_many([doc.page_content.strip() for doc in docs])
+        owners = [(i, j) for i, (sentences, _) in enumerate(entries) for j in range(len(sentences))]
+        if not owners:
+            return "", 0
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        scores = np.concatenate([vectors for _, vectors in entries if vectors is not None]) @ query
+
+        selected = {}
+        remaining = max_context_tokens
+        for position in np.argsort(-scores):
+            if scores[position] < self.min_similarity:
+                break
+            i, j = owners[position]
+            # A chunk's "Document n:" header is paid for with its first selected sentence
+            header_tokens = 0 if i in selected else counter.count(f"\n\nDocument {i+1}: ")
+            sentence_tokens = counter.count(entries[i][0][j]) + 1  # joining space
+            if header_tokens + sentence_tokens > remaining:
+                continue
+            selected.setdefault(i, []).append(j)
+            remaining -= header_tokens + sentence_tokens
+
+        parts = [
+            f"Document {i+1}: " + " ".join(entries[i][0][j] for j in sorted(selected[i]))
+            for i in sorted(selected)
+        ]
+        return "\n\n".join(parts), max_context_tokens - remaining
+
+    def stats(self):
+        return self.sentences.stats()
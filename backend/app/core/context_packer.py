@@ -0,0 +1,121 @@
+# core/context_packer.py
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?।。])\s+")
+
+def split_sentences(text):
+    """Split text at sentence-ending punctuation (Latin, Devanagari and CJK)"""
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+class TokenCounter:
+    """Token counts from the LLM's own tokenizer, cached per text"""
+
+    def __init__(self, tokenizer_name, cache_size=50000):
+        self.tokenizer_name = tokenizer_name
+        self.cache_size = cache_size
+        self._tokenizer = None
+        self._loaded = False
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the tokenizer once; None means counts are the ~4 chars/token estimate"""
+        with self._lock:
+            if self._loaded:
+                return self._tokenizer
+            try:
+                from tokenizers import Tokenizer
+
+                if os.path.isfile(self.tokenizer_name):
+                    self._tokenizer = Tokenizer.from_file(self.tokenizer_name)
+                else:
+                    self._tokenizer = Tokenizer.from_pretrained(self.tokenizer_name, token=os.getenv("HF_TOKEN"))
+                logger.info(f"✅ Loaded tokenizer {self.tokenizer_name}")
+            except Exception as e:
+                logger.warning(f"Tokenizer {self.tokenizer_name} unavailable, estimating ~4 chars/token: {e}")
+                self._tokenizer = None
+            self._loaded = True
+            return self._tokenizer
+
+    def _encode_length(self, text):
+        tokenizer = self._tokenizer if self._loaded else self.load()
+        if tokenizer is None:
+            return len(text) // 4
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+    @property
+    def exact(self):
+        """Whether counts come from the real tokenizer (loads it on first use)"""
+        return (self._tokenizer if self._loaded else self.load()) is not None
+
+    def count(self, text):
+        """Token count for text; repeated chunks are served from the cache"""
+        if not text:
+            return 0
+
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        tokens = self._encode_length(text)
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+token_counter = TokenCounter(settings.LLM_TOKENIZER, cache_size=settings.TOKEN_COUNT_CACHE_SIZE)
+
+def pack_documents(docs, max_context_tokens, counter=None):
+    """Fill the token budget with ranked chunks in a single greedy pass.
+
+    Returns (context, tokens_used). Whole chunks are taken while they fit; a chunk that does not fit is cut at
+    the last sentence boundary that does, and later (smaller) chunks still get
+    a chance at whatever budget is left.
+    """
+    counter = counter or token_counter
+    parts = []
+    remaining = max_context_tokens
+
+    for i, doc in enumerate(docs):
+        content = doc.page_content.strip()
+        if not content:
+            continue
+
+        header = ("\n\n" if parts else "") + f"Document {i+1}: "
+        header_tokens = counter.count(header)
+        if remaining <= header_tokens:
+            break
+
+        content_tokens = counter.count(content)
+        if header_tokens + content_tokens <= remaining:
+            parts.append(header + content)
+            remaining -= header_tokens + content_tokens
+            continue
+
+        kept = []
+        budget = remaining - header_tokens
+        for sentence in split_sentences(content):
+            sentence_tokens = counter.count(sentence) + 1  # joining space
+            if sentence_tokens > budget:
+                break
+            kept.append(sentence)
+            budget -= sentence_tokens
+
+        if kept:
+            parts.append(header + " ".join(kept))
+            remaining = budget
+
+    return "".join(parts), max_context_tokens - remaining
@@ -0,0 +1,162 @@
+# core/conversation_state.py
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Tuple
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CONDENSE_PROMPT_TEMPLATE = """Rewrite the follow-up question as a standalone question that can be understood without the conversation. Keep the user's language. Reply with the question only.
+
+Conversation:
+{history}
+
+Follow-up question: {question}
+
+Standalone question:"""
+
+# Short questions that lean on earlier turns ("what about its cost?", "and in India?")
+FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(and|but|also|so|what about|how about|why|then)\b"
+    r"|\b(it|its|it's|they|them|their|this|that|these|those|he|she|his|her|there|same|above|previous|more)\b",
+    re.IGNORECASE
+)
+
+@dataclass
+class ConversationState:
+    """What a worker remembers about one conversation between turns"""
+    turns: Deque[Tuple[str, str]]  # (role, content), oldest first
+    summary: str = ""  # earlier user questions that fell out of turns
+    last_doc_ids: List[str] = field(default_factory=list)
+    owner: str = ""  # google_id of the user the conversation belongs to
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def last_user_question(self):
+        return next((content for role, content in reversed(self.turns) if role == "user"), None)
+
+    def add_turn(self, role, content, max_summary_chars):
+        if len(self.turns) == self.turns.maxlen:
+            evicted_role, evicted = self.turns[0]
+            if evicted_role == "user":
+                # Rolling summary: the topics asked about so far, newest kept when it overflows
+                self.summary = "; ".join(filter(None, [self.summary, evicted]))[-max_summary_chars:]
+        self.turns.append((role, content))
+
+    def history(self, max_answer_chars=300):
+        lines = [f"Earlier topics: {self.summary}"] if self.summary else []
+        for role, content in self.turns:
+            if role == "user":
+                lines.append(f"User: {content}")
+            else:
+                lines.append(f"Assistant: {content[:max_answer_chars]}")
+        return "\n".join(lines)
+
+class ConversationStateCache:
+    """LRU + TTL cache of ConversationState by conversation_id.
+
+    Firestore is read only on a miss (or once an entry is older than the TTL,
+    since another worker may have served later turns); afterwards each turn
+    updates the cached state in place.
+    """
+
+    def __init__(self, max_conversations=2048, max_turns=6, ttl_seconds=600, max_summary_chars=600):
+        self.max_conversations = max_conversations
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+        self.max_summary_chars = max_summary_chars
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _store(self, conversation_id, state):
+        with self._lock:
+            self._states[conversation_id] = state
+            self._states.move_to_end(conversation_id)
+            while len(self._states) > self.max_conversations:
+                self._states.popitem(last=False)
+        return state
+
+    def new(self, conversation_id, owner):
+        """Empty state for a conversation that has just been started"""
+        return self._store(conversation_id, ConversationState(turns=deque(maxlen=self.max_turns), owner=owner))
+
+    def from_messages(self, messages, owner):
+        """Rebuild the state from stored Firestore messages (oldest first)"""
+        state = ConversationState(turns=deque(maxlen=self.max_turns), owner=owner)
+        for message in messages:
+            role = "user" if message.get("type") == "user" else "assistant"
+            state.add_turn(role, message.get("content", ""), self.max_summary_chars)
+            if role == "assistant":
+                state.last_doc_ids = [src["id"] for src in message.get("sources") or [] if src.get("id")]
+        return state
+
+    async def aget(self, conversation_id, owner, load_messages):
+        """Cached state, or one built from await load_messages() on a miss.
+
+        load_messages must itself check ownership; a cached state is only
+        returned to the user it was loaded for (PermissionError otherwise).
+        """
+        with self._lock:
+            state = self._states.get(conversation_id)
+            if state is not None and time.monotonic() - state.loaded_at < self.ttl_seconds:
+                if state.owner != owner:
+                    raise PermissionError(f"Conversation {conversation_id} does not belong to {owner}")
+                self._states.move_to_end(conversation_id)
+                self.hits += 1
+                return state
+            self.misses += 1
+
+        messages = await load_messages()
+        return self._store(conversation_id, self.from_messages(messages, owner))
+
+    def record_turn(self, conversation_id, question, answer, doc_ids):
+        """Fold a finished turn into the cached state (no-op if it was evicted meanwhile)"""
+        with self._lock:
+            state = self._states.get(conversation_id)
+            if state is None:
+                return
+            state.add_turn("user", question, self.max_summary_chars)
+            state.add_turn("assistant", answer, self.max_summary_chars)
+            state.last_doc_ids = [doc_id for doc_id in doc_ids if doc_id]
+
+    def stats(self):
+        with self._lock:
+            return {"conversations": len(self._states), "hits": self.hits, "misses": self.misses}
+
+def is_follow_up(question, state):
+    """Whether the question probably needs earlier turns to be understood"""
+    if not state.turns:
+        return False
+    return len(question.split()) <= settings.CONVERSATION_FOLLOW_UP_MAX_WORDS and bool(FOLLOW_UP_PATTERN.search(question))
+
+async def condense_question(question, state, llm=None):
+    """Standalone version of a follow-up question (the question itself if it already stands alone)"""
+    if not is_follow_up(question, state):
+        return question
+    if llm is not None and settings.CONVERSATION_CONDENSE_WITH_LLM:
+        prompt = CONDENSE_PROMPT_TEMPLATE.format(history=state.history(), question=question)
+        try:
+            response = await asyncio.wait_for(llm.ainvoke(prompt), timeout=settings.CONVERSATION_CONDENSE_TIMEOUT_SECONDS)
+            condensed = (response.content if hasattr(response, "content") else str(response)).strip().strip('"')
+            if condensed:
+                logger.info(f"Condensed follow-up {question!r} -> {condensed!r}")
+                return condensed
+        except Exception as e:
+            logger.warning(f"Follow-up condensing failed, falling back to the previous question: {e}")
+    # Cheap fallback: carry the previous question's topic into the retrieval query
+    previous = state.last_user_question()
+    return f"{previous} {question}" if previous else question
+
+conversation_states = ConversationStateCache(
+    max_conversations=settings.CONVERSATION_CACHE_SIZE,
+    max_turns=settings.CONVERSATION_MAX_TURNS,
+    ttl_seconds=settings.CONVERSATION_STATE_TTL_SECONDS,
+    max_summary_chars=settings.CONVERSATION_SUMMARY_MAX_CHARS
+)
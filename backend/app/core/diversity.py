@@ -0,0 +1,68 @@
+# core/diversity.py
+"""Diversification of retrieved chunks before context packing: SimHash
+near-duplicate suppression and maximal marginal relevance (MMR).
+"""
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+from app.core.lexical_index import tokenize
+
+SHINGLE_SIZE = 3
+_BITS = np.arange(64, dtype=np.uint64)
+
+@lru_cache(maxsize=20000)
+def simhash(text):
+    """64-bit SimHash of the text's word shingles"""
+    words = tokenize(text)
+    shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+         for shingle in shingles],
+        dtype=np.uint64
+    )
+    # Each bit is set if most shingle hashes have it set
+    votes = ((hashes[:, None] >> _BITS) & np.uint64(1)).sum(axis=0)
+    return int(((votes * 2 > len(hashes)).astype(np.uint64) << _BITS).sum())
+
+def hamming_distances(fingerprint, fingerprints):
+    """Differing bits between one fingerprint and each of an array of them"""
+    xor = np.bitwise_xor(np.asarray(fingerprints, dtype=np.uint64), np.uint64(fingerprint))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+def suppress_near_duplicates(texts, max_distance=3):
+    """Indices of the texts to keep, in order, dropping any within max_distance bits of an earlier one"""
+    kept = []
+    fingerprints = []
+    for i, text in enumerate(texts):
+        fingerprint = simhash(text)
+        if fingerprints and hamming_distances(fingerprint, fingerprints).min() <= max_distance:
+            continue
+        kept.append(i)
+        fingerprints.append(fingerprint)
+    return kept
+
+def mmr(embeddings, relevance, k, lambda_mult=0.7):
+    """Indices of k candidates chosen by maximal marginal relevance.
+
+    relevance is any per-candidate score (vector, RRF or rerank); it is
+    min-max scaled so it trades off against cosine redundancy on one scale.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    scores = np.asarray(relevance, dtype=np.float32)
+    spread = scores.max() - scores.min()
+    scores = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+    similarity = vectors @ vectors.T
+    redundancy = np.zeros(len(scores), dtype=np.float32)  # max similarity to anything selected so far
+    selected = []
+    available = np.ones(len(scores), dtype=bool)
+    for _ in range(min(k, len(scores))):
+        marginal = np.where(available, lambda_mult * scores - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(marginal))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
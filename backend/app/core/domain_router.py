@@ -0,0 +1,136 @@
+# core/domain_router.py
+import heapq
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.config.settings import settings
+from app.core.vector_store import ChromaVectorStore, get_across
+
+logger = logging.getLogger(__name__)
+
+CENTROIDS_FILE = "domain_centroids.json"
+
+def domain_collection_name(domain):
+    return f"{settings.DOMAIN_COLLECTION_PREFIX}{domain}"
+
+def compute_centroid(collection, batch_size=5000):
+    """Normalized mean of a collection's (normalized) embeddings, streamed in batches"""
+    total = collection.count()
+    running = None
+    for offset in range(0, total, batch_size):
+        batch = collection.get(include=["embeddings"], limit=batch_size, offset=offset)
+        vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        running = vectors.sum(axis=0) if running is None else running + vectors.sum(axis=0)
+    if running is None:
+        return None, 0
+    return running / max(np.linalg.norm(running), 1e-12), total
+
+def load_centroids(db_path):
+    try:
+        with open(os.path.join(db_path, CENTROIDS_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def update_centroids(db_path, collections):
+    """Recompute the centroids of the given {domain: collection} and save them with the rest"""
+    centroids = load_centroids(db_path)
+    for domain, collection in collections.items():
+        centroid, count = compute_centroid(collection)
+        if centroid is None:
+            centroids.pop(domain, None)
+            continue
+        centroids[domain] = {"collection": collection.name, "count": count, "centroid": centroid.tolist()}
+        logger.info(f"Centroid for domain {domain} computed from {count} chunks")
+
+    path = os.path.join(db_path, CENTROIDS_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(centroids, f)
+    os.replace(tmp_path, path)
+    return centroids
+
+class _DomainTagged:
+    """One domain's store, with its chunks' metadata tagged {"domain": ...} on get()"""
+
+    def __init__(self, domain, store):
+        self.domain = domain
+        self.store = store
+
+    def count(self):
+        return self.store.count()
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        result = self.store.get(ids=ids, include=include, limit=limit, offset=offset)
+        if "metadatas" in result:
+            result["metadatas"] = [dict(metadata or {}, domain=self.domain) for metadata in result["metadatas"]]
+        return result
+
+class DomainRoutedStore:
+    """Vector-store backend over one Chroma collection per domain.
+
+    Each query is compared against the domain centroids; only the closest
+    domains are searched (concurrently) and their hits merged by relevance.
+    count()/get() span all domains, with each chunk's metadata tagged with its
+    domain, so BM25 can be built over the whole corpus and filtered by route().
+    """
+
+    def __init__(self, stores, centroids, top_domains=2, margin=0.1):
+        """stores and centroids are keyed by domain name"""
+        if not stores:
+            raise ValueError("DomainRoutedStore needs at least one domain")
+        self.top_domains = top_domains
+        self.margin = margin
+        self.domains = sorted(stores)
+        self.stores = {domain: stores[domain] for domain in self.domains}
+        self.centroids = np.asarray([centroids[domain] for domain in self.domains], dtype=np.float32)
+        self.centroids /= np.clip(np.linalg.norm(self.centroids, axis=1, keepdims=True), 1e-12, None)
+        self._tagged = [_DomainTagged(domain, store) for domain, store in self.stores.items()]
+        self._executor = ThreadPoolExecutor(max_workers=len(self.domains), thread_name_prefix="domain-search")
+        logger.info(f"Domain routing over {len(self.domains)} domains: {self.domains}")
+
+    @classmethod
+    def open(cls, path, fresh=False, top_domains=2, margin=0.1):
+        """The domain collections listed in the centroids file under path"""
+        entries = load_centroids(path)
+        if not entries:
+            raise ValueError(f"No domain centroids in {path}; ingest with --domain or run app.scripts.domain_centroids")
+        stores = {}
+        for domain, entry in sorted(entries.items()):
+            stores[domain] = ChromaVectorStore(path, entry["collection"], fresh=fresh and not stores)
+        return cls(stores, {domain: entry["centroid"] for domain, entry in entries.items()},
+                   top_domains=top_domains, margin=margin)
+
+    def route(self, query_embedding):
+        """Domains worth searching: the top few by centroid similarity, within margin of the best"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        similarities = self.centroids @ (query / max(np.linalg.norm(query), 1e-12))
+        order = np.argsort(-similarities)[:self.top_domains]
+        best = similarities[order[0]]
+        return [self.domains[i] for i in order if similarities[i] >= best - self.margin]
+
+    def _search_domain(self, domain, query_embedding, k):
+        hits = self.stores[domain].search(query_embedding, k)
+        for _, doc, _ in hits:
+            doc.metadata["domain"] = domain
+        return hits
+
+    def search(self, query_embedding, k):
+        """Nearest chunks as [(id, Document, relevance)] from the routed domains, best first"""
+        domains = self.route(query_embedding)
+        if len(domains) == 1:
+            return self._search_domain(domains[0], query_embedding, k)
+        futures = [self._executor.submit(self._search_domain, domain, query_embedding, k) for domain in domains]
+        hits = [hit for future in futures for hit in future.result()]
+        return heapq.nlargest(k, hits, key=lambda hit: hit[2])
+
+    def count(self):
+        return sum(store.count() for store in self.stores.values())
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        return get_across(self._tagged, ids=ids, include=include, limit=limit, offset=offset)
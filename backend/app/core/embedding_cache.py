@@ -0,0 +1,170 @@
+# core/embedding_cache.py
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(text: str) -> str:
+    """Canonical form used as the cache key (unicode NFKC + collapsed whitespace)"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+class SQLiteVectorStore:
+    """Persistent key -> float32 vector table, safe to share between worker processes.
+
+    Bounded by max_rows (least recently used rows go first) and ttl_seconds
+    since last use; pruned at startup and every prune_every puts.
+    """
+
+    def __init__(self, path: str, max_rows: int = None, ttl_seconds: float = None, prune_every: int = 256):
+        self.path = path
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        self.prune_every = prune_every
+        self._puts = 0
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(embeddings)")}
+        if "last_used" not in columns:
+            # Caches written before pruning existed count as least recently used
+            conn.execute("ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.prune()
+
+    def _connection(self):
+        # sqlite3 connections may not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT vector FROM embeddings WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, key: str, vector: np.ndarray):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(vector.astype(np.float32).tobytes()), time.time())
+        )
+        self._puts += 1
+        if self._puts % self.prune_every == 0:
+            self.prune()
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def prune(self):
+        """Drop expired rows, then the least recently used ones beyond max_rows; returns rows deleted"""
+        conn = self._connection()
+        deleted = 0
+        if self.ttl_seconds:
+            deleted += conn.execute(
+                "DELETE FROM embeddings WHERE last_used < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+        if self.max_rows:
+            deleted += conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            ).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} rows from the embedding disk cache")
+        return deleted
+
+class CachedEmbeddings(Embeddings):
+    """Query-embedding cache: in-process LRU in front of an on-disk SQLite tier"""
+
+    def __init__(self, embedding: Embeddings, model_name: str, max_entries: int = 4096,
+                 disk_path: str = None, disk_max_rows: int = None, disk_ttl_seconds: float = None):
+        self.embedding = embedding
+        self.model_name = model_name
+        self.max_entries = max_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if disk_path:
+            try:
+                self._disk = SQLiteVectorStore(disk_path, max_rows=disk_max_rows, ttl_seconds=disk_ttl_seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache unavailable at {disk_path}: {e}")
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        text = normalize_query(text)
+        key = self._key(text)
+
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector.tolist()
+
+        if self._disk is not None:
+            try:
+                vector = self._disk.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache read failed: {e}")
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector)
+                return vector.tolist()
+
+        self.misses += 1
+        vector = np.asarray(self.embedding.embed_query(text), dtype=np.float32)
+        self._remember(key, vector)
+        if self._disk is not None:
+            try:
+                self._disk.put(key, vector)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache write failed: {e}")
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Document batches come from ingestion and are not worth caching
+        return self.embedding.embed_documents(texts)
+
+    def stats(self):
+        """Hit/miss counters per tier"""
+        return {
+            "entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses
+        }
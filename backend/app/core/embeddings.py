@@ -0,0 +1,80 @@
+# core/embeddings.py
+import logging
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+
+class OnnxEmbeddings(Embeddings):
+    """The sentence-transformer (mean pooling) exported to ONNX and run on ONNX Runtime (CPU)"""
+
+    def __init__(self, model_dir, quantized=False, batch_size=32, max_length=128, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+        logger.info(f"ONNX embeddings loaded from {model_dir}/{model_file}")
+
+    def _encode(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + self.batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            # Mean pooling over real tokens, as in the sentence-transformers config for this model
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            vectors.append(pooled.astype(np.float32))
+        return np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+def build_embeddings(backend=None, batch_size=32):
+    """Embedding function for the configured backend: torch (default), onnx or onnx-int8"""
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "torch":
+        from langchain.embeddings import SentenceTransformerEmbeddings
+
+        return SentenceTransformerEmbeddings(
+            model_name=settings.EMBEDDING_MODEL,
+            encode_kwargs={"batch_size": batch_size}
+        )
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(
+            settings.ONNX_MODEL_DIR,
+            quantized=backend == "onnx-int8",
+            batch_size=batch_size,
+            threads=settings.EMBEDDING_THREADS
+        )
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
@@ -6,6 +6,7 @@ import logging
 import os
 
 from ..models.schemas import UserInfo, UserSession
+from .metrics import timed_firestore
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +40,7 @@ class FirebaseService:
             logger.error(f"Firebase initialization error: {e}")
             return False
     
+    @timed_firestore("get_user")
     def get_user(self, google_id: str) -> Optional[Dict]:
         """Get user from Firestore"""
         if not self.initialized:
@@ -56,6 +58,7 @@ class FirebaseService:
             logger.error(f"Error getting user {google_id}: {e}")
             return None
     
+    @timed_firestore("create_or_update_user")
     def create_or_update_user(self, user_info: UserInfo) -> bool:
         """Create or update user in Firestore"""
         if not self.initialized:
@@ -99,6 +102,7 @@ class FirebaseService:
             logger.error(f"Error creating/updating user {user_info.google_id}: {e}")
             return False
     
+    @timed_firestore("get_user_chat_count")
     def get_user_chat_count(self, google_id: str) -> int:
         """Get user's current chat count"""
         if not self.initialized:
@@ -114,6 +118,7 @@ class FirebaseService:
             logger.error(f"Error getting chat count for {google_id}: {e}")
             return 0
     
+    @timed_firestore("increment_chat_count")
     def increment_chat_count(self, google_id: str) -> int:
         """Increment user's chat count and return new count"""
         if not self.initialized:
@@ -146,6 +151,7 @@ class FirebaseService:
             logger.error(f"Error incrementing chat count for {google_id}: {e}")
             return 0
     
+    @timed_firestore("save_message")
     def save_message(self, google_id: str, conversation_id: str, message_type: str, 
                      content: str, sources: List[Dict] = None) -> bool:
         """Save a message to Firestore"""
@@ -195,6 +201,7 @@ class FirebaseService:
             logger.error(f"Error saving message: {e}")
             return False
     
+    @timed_firestore("get_user_conversations")
     def get_user_conversations(self, google_id: str, limit: int = 20) -> List[Dict]:
         """Get user's conversation history"""
         if not self.initialized:
@@ -218,6 +225,7 @@ class FirebaseService:
             logger.error(f"Error getting conversations for {google_id}: {e}")
             return []
     
+    @timed_firestore("get_conversation_messages")
     def get_conversation_messages(self, conversation_id: str, limit: int = 50) -> List[Dict]:
         """Get messages for a specific conversation"""
         if not self.initialized:
@@ -241,6 +249,44 @@ class FirebaseService:
             logger.error(f"Error getting messages for conversation {conversation_id}: {e}")
             return []
     
+    @timed_firestore("get_recent_conversation_messages")
+    def get_recent_conversation_messages(self, google_id: str, conversation_id: str, limit: int = 50) -> List[Dict]:
+        """Newest messages of one of the user's conversations, oldest first.
+
+        Raises PermissionError if the conversation belongs to another user; any
+        other Firestore error is logged and means no history ([]).
+        Needs the composite index messages(conversation_id ASC, timestamp DESC).
+        """
+        if not self.initialized:
+            return []
+        
+        try:
+            conversation_doc = self.db.collection('conversations').document(conversation_id).get()
+            if not conversation_doc.exists:
+                return []
+            if conversation_doc.to_dict().get('user_id') != google_id:
+                raise PermissionError(f"Conversation {conversation_id} does not belong to {google_id}")
+            
+            query = self.db.collection('messages').where('conversation_id', '==', conversation_id)\
+                                                  .order_by('timestamp', direction=firestore.Query.DESCENDING)\
+                                                  .limit(limit)
+            
+            messages = []
+            for doc in query.stream():
+                message_data = doc.to_dict()
+                message_data['id'] = doc.id
+                messages.append(message_data)
+            
+            messages.reverse()
+            return messages
+            
+        except PermissionError:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting recent messages for conversation {conversation_id}: {e}")
+            return []
+    
+    @timed_firestore("can_user_chat")
     def can_user_chat(self, google_id: str) -> bool:
         """Check if user can send more chats"""
         try:
@@ -258,6 +304,7 @@ class FirebaseService:
             logger.error(f"Error checking chat limits for {google_id}: {e}")
             return False
     
+    @timed_firestore("get_remaining_chats")
     def get_remaining_chats(self, google_id: str) -> int:
         """Get remaining free chats for user"""
         try:
@@ -0,0 +1,144 @@
+# core/hnsw_store.py
+import json
+import logging
+import mmap
+import os
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core.vector_store import RELEVANCE_FUNCTIONS
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.bin"
+VECTORS_FILE = "vectors_f16.npy"
+CHUNKS_FILE = "chunks.jsonl"
+OFFSETS_FILE = "chunk_offsets.npy"
+IDS_FILE = "ids.json"
+META_FILE = "meta.json"
+
+class HnswVectorStore:
+    """hnswlib graph search with float16 vectors and chunk records served from mmap.
+
+    The float16 vectors (returned by get(include=["embeddings"]), e.g. for MMR)
+    and the chunk texts/metadata are read-only memory maps, so every worker on
+    the box shares those pages. Search itself is hnswlib's distances as-is.
+    hnswlib loads its graph and a float32 copy of the vectors into each
+    process; run it behind the sidecar (SIDECAR_ENABLED) to hold one copy.
+    """
+
+    def __init__(self, path, ef_search=64):
+        import hnswlib
+
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, IDS_FILE), encoding="utf-8") as f:
+            self.ids = json.load(f)
+        self._labels = {chunk_id: label for label, chunk_id in enumerate(self.ids)}
+
+        self.index = hnswlib.Index(space=self.meta["space"], dim=self.meta["dim"])
+        self.index.load_index(os.path.join(path, INDEX_FILE), max_elements=len(self.ids))
+        self.index.set_ef(ef_search)
+        self.relevance = RELEVANCE_FUNCTIONS[self.meta["space"]]
+
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(path, CHUNKS_FILE), "rb") as f:
+            self._chunks = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        logger.info(f"Loaded HNSW index with {len(self.ids)} chunks from {path}")
+
+    def _record(self, label):
+        return json.loads(self._chunks[self.offsets[label]:self.offsets[label + 1]])
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        """Chroma-compatible get() by ids or by position"""
+        if ids is not None:
+            labels = [self._labels[chunk_id] for chunk_id in ids if chunk_id in self._labels]
+        else:
+            start = offset or 0
+            end = len(self.ids) if limit is None else min(len(self.ids), start + limit)
+            labels = range(start, end)
+
+        records = [self._record(label) for label in labels] if {"documents", "metadatas"} & set(include) else []
+        result = {"ids": [self.ids[label] for label in labels]}
+        if "documents" in include:
+            result["documents"] = [record["text"] for record in records]
+        if "metadatas" in include:
+            result["metadatas"] = [record["metadata"] for record in records]
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(self.vectors[list(labels)], dtype=np.float32)
+        return result
+
+    def search(self, query_embedding, k):
+        """Nearest chunks as [(id, Document, relevance)], best first"""
+        k = min(k, len(self.ids))
+        if k == 0:
+            return []
+        labels, distances = self.index.knn_query(np.asarray([query_embedding], dtype=np.float32), k=k)
+
+        hits = []
+        for label, distance in zip(labels[0], distances[0]):
+            record = self._record(label)
+            hits.append((
+                self.ids[label],
+                Document(page_content=record["text"], metadata=record["metadata"] or {}),
+                self.relevance(float(distance))
+            ))
+        return hits
+
+def build_from_collection(collection, path, m=16, ef_construction=200, batch_size=5000):
+    """Convert a Chroma collection into an HNSW store directory"""
+    import hnswlib
+
+    started = time.perf_counter()
+    total = collection.count()
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    os.makedirs(path, exist_ok=True)
+
+    index = None
+    vectors = None
+    ids = []
+    offsets = [0]
+    with open(os.path.join(path, CHUNKS_FILE), "wb") as chunks_file:
+        for start in range(0, total, batch_size):
+            batch = collection.get(
+                include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=start
+            )
+            embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+            if index is None:
+                dim = embeddings.shape[1]
+                index = hnswlib.Index(space=space, dim=dim)
+                index.init_index(max_elements=total, ef_construction=ef_construction, M=m)
+                vectors = np.lib.format.open_memmap(
+                    os.path.join(path, VECTORS_FILE), mode="w+", dtype=np.float16, shape=(total, dim)
+                )
+
+            labels = np.arange(len(ids), len(ids) + len(embeddings))
+            index.add_items(embeddings, labels)
+            vectors[labels] = embeddings.astype(np.float16)
+
+            for chunk_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                record = json.dumps({"text": text, "metadata": metadata}, ensure_ascii=False)
+                chunks_file.write(record.encode("utf-8") + b"\n")
+                offsets.append(chunks_file.tell())
+                ids.append(chunk_id)
+            logger.info(f"Converted {len(ids)}/{total} chunks")
+
+    if index is None:
+        raise ValueError("Collection is empty, nothing to convert")
+
+    vectors.flush()
+    index.save_index(os.path.join(path, INDEX_FILE))
+    np.save(os.path.join(path, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+    with open(os.path.join(path, IDS_FILE), "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"space": space, "dim": int(vectors.shape[1]), "count": len(ids), "m": m,
+                   "ef_construction": ef_construction}, f)
+
+    logger.info(f"✅ HNSW store with {len(ids)} chunks written to {path} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,258 @@
+# core/lexical_index.py
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MAX_TERM_LENGTH = 40
+
+def tokenize(text):
+    """Lowercased word/number tokens; keeps identifiers and figures that MiniLM blurs"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TERM_LENGTH]
+
+def _replace_file(path, write):
+    """Write to a temp file and rename over path, so readers that mmap the old file are unaffected"""
+    # A unique name per writer, so concurrent builds never write into each other's temp file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def chunk_ids_checksum(chunk_ids):
+    """Order-independent fingerprint of a set of chunk ids (sum of 64-bit hashes)"""
+    total = 0
+    for chunk_id in chunk_ids:
+        total += int.from_bytes(hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=8).digest(), "little")
+    return f"{total % 2**64:016x}"
+
+def collection_checksum(collection, batch_size=20000):
+    """chunk_ids_checksum of every id in the collection, read without documents"""
+    total = collection.count()
+    ids = (
+        chunk_id
+        for offset in range(0, total, batch_size)
+        for chunk_id in collection.get(include=[], limit=batch_size, offset=offset)["ids"]
+    )
+    return chunk_ids_checksum(ids)
+
+@contextmanager
+def _index_lock(path):
+    """Exclusive lock across processes for building or loading the index at path.
+
+    The lock file sits next to the index directory, which a full re-index may delete.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path.rstrip(os.sep) + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _save_array(path, array):
+    _replace_file(path, lambda f: np.save(f, array))
+
+def _save_json(path, data):
+    _replace_file(path, lambda f: f.write(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Merge several ranked id lists into one list of (id, score), best first"""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class BM25Index:
+    """In-memory BM25 over the Chroma collection texts.
+
+    Postings are stored CSR-style in flat numpy arrays (term offsets, document
+    numbers, term frequencies) and persisted as .npy files that are loaded with
+    mmap, so workers share the pages instead of each holding a copy. Chunks whose
+    metadata names a domain (DomainRoutedStore) keep it, so searches can be
+    restricted to the domains a query was routed to.
+    """
+
+    def __init__(self, path, vocab, chunk_ids, offsets, postings, frequencies, doc_lengths, meta, doc_domains=None):
+        self.path = path
+        self.vocab = vocab
+        self.chunk_ids = chunk_ids
+        self.offsets = offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.meta = meta
+        self.doc_domains = doc_domains  # index into meta["domains"] per document, -1 if untagged
+
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        # Per-document BM25 length normalisation, computed once at load time
+        self._length_norm = (
+            self.k1 * (1 - self.b + self.b * self.doc_lengths / max(meta["avgdl"], 1e-9))
+        ).astype(np.float32)
+
+    @property
+    def size(self):
+        return len(self.chunk_ids)
+
+    @classmethod
+    def build(cls, collection, path, k1=1.2, b=0.75, batch_size=5000):
+        """Build the index from every document in a Chroma collection and persist it"""
+        with _index_lock(path):
+            return cls._build(collection, path, k1=k1, b=b, batch_size=batch_size)
+
+    @classmethod
+    def _build(cls, collection, path, k1, b, batch_size=5000):
+        started = time.perf_counter()
+        vocab = {}
+        domains = {}
+        chunk_ids = []
+        doc_lengths = []
+        doc_domains = []
+        term_parts, doc_parts, freq_parts = [], [], []
+
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            metadatas = batch.get("metadatas") or [None] * len(batch["ids"])
+            for chunk_id, text, metadata in zip(batch["ids"], batch["documents"], metadatas):
+                domain = (metadata or {}).get("domain")
+                doc_domains.append(-1 if domain is None else domains.setdefault(domain, len(domains)))
+                tokens = tokenize(text or "")
+                counts = Counter(tokens)
+                doc_number = len(chunk_ids)
+                chunk_ids.append(chunk_id)
+                doc_lengths.append(len(tokens))
+
+                term_parts.append(np.fromiter(
+                    (vocab.setdefault(term, len(vocab)) for term in counts),
+                    dtype=np.int32, count=len(counts)
+                ))
+                doc_parts.append(np.full(len(counts), doc_number, dtype=np.int32))
+                freq_parts.append(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+
+        terms = np.concatenate(term_parts) if term_parts else np.zeros(0, dtype=np.int32)
+        docs = np.concatenate(doc_parts) if doc_parts else np.zeros(0, dtype=np.int32)
+        freqs = np.concatenate(freq_parts) if freq_parts else np.zeros(0, dtype=np.float32)
+
+        # Group postings by term (stable, so each posting list stays in document order)
+        order = np.argsort(terms, kind="stable")
+        postings = docs[order]
+        frequencies = freqs[order]
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(vocab)), out=offsets[1:])
+
+        doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        meta = {
+            "documents": len(chunk_ids),
+            "terms": len(vocab),
+            "avgdl": float(doc_lengths.mean()) if len(doc_lengths) else 0.0,
+            "k1": k1,
+            "b": b,
+            # Compared on load: an incremental re-index can replace chunks and keep the count
+            "ids_checksum": chunk_ids_checksum(chunk_ids),
+            "domains": sorted(domains, key=domains.get)
+        }
+
+        # Files are swapped in by rename: running workers keep their mapping of the old
+        # inode until they reload, instead of faulting on a truncated file
+        os.makedirs(path, exist_ok=True)
+        _save_array(os.path.join(path, "offsets.npy"), offsets)
+        _save_array(os.path.join(path, "postings.npy"), postings)
+        _save_array(os.path.join(path, "frequencies.npy"), frequencies)
+        _save_array(os.path.join(path, "doc_lengths.npy"), doc_lengths)
+        if domains:
+            _save_array(os.path.join(path, "doc_domains.npy"), np.asarray(doc_domains, dtype=np.int16))
+        _save_json(os.path.join(path, "vocab.json"), vocab)
+        _save_json(os.path.join(path, "chunk_ids.json"), chunk_ids)
+        _save_json(os.path.join(path, "meta.json"), meta)
+
+        logger.info(
+            f"Built BM25 index: {meta['documents']} chunks, {meta['terms']} terms "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a persisted index; the posting arrays are memory-mapped read-only"""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(os.path.join(path, "chunk_ids.json"), encoding="utf-8") as f:
+            chunk_ids = json.load(f)
+
+        return cls(
+            path,
+            vocab,
+            chunk_ids,
+            np.load(os.path.join(path, "offsets.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "postings.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "frequencies.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "doc_lengths.npy"), mmap_mode="r"),
+            meta,
+            np.load(os.path.join(path, "doc_domains.npy"), mmap_mode="r") if meta.get("domains") else None
+        )
+
+    @classmethod
+    def load_or_build(cls, collection, path, k1=1.2, b=0.75):
+        """Load the persisted index, rebuilding it if it is missing or out of date.
+
+        Workers take the build lock in turn: the first one rebuilds, the rest load
+        its files instead of building (and writing) their own copies.
+        """
+        with _index_lock(path):
+            try:
+                index = cls.load(path)
+                # A domain-routed corpus needs the per-chunk domains that older indexes lack
+                tagged = index.doc_domains is not None or not hasattr(collection, "route")
+                fresh = index.size == collection.count() and index.meta.get("ids_checksum") == collection_checksum(collection)
+                if fresh and tagged:
+                    logger.info(f"Loaded BM25 index with {index.size} chunks")
+                    return index
+                logger.info("BM25 index is stale, rebuilding")
+            except FileNotFoundError:
+                logger.info("No BM25 index found, building one")
+            return cls._build(collection, path, k1=k1, b=b)
+
+    def search(self, query, k=10, domains=None):
+        """Return up to k (chunk_id, bm25_score) pairs, best first, only from domains if given"""
+        term_ids = {self.vocab[token] for token in tokenize(query) if token in self.vocab}
+        if not term_ids or not self.size:
+            return []
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings[start:end]
+            freqs = self.frequencies[start:end]
+            idf = np.log(1.0 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            # Posting lists hold each document once, so plain fancy-index accumulation is safe
+            scores[docs] += idf * freqs * (self.k1 + 1) / (freqs + self._length_norm[docs])
+
+        if domains is not None and self.doc_domains is not None:
+            allowed = [code for code, domain in enumerate(self.meta["domains"]) if domain in domains]
+            scores[~np.isin(self.doc_domains, allowed)] = 0.0
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.chunk_ids[i], float(scores[i])) for i in top]
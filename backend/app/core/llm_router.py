@@ -0,0 +1,249 @@
+# core/llm_router.py
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+
+import httpx
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Connection failures and timeouts as raised by httpx or wrapped by the Groq/OpenAI SDKs
+TRANSPORT_ERRORS = (httpx.TransportError, asyncio.TimeoutError, TimeoutError, ConnectionError)
+SDK_TRANSPORT_ERRORS = {"APIConnectionError", "APITimeoutError"}
+
+def is_backend_failure(error):
+    """Whether an error says the backend is unhealthy (and another may succeed).
+
+    Transport errors, timeouts, 429 and 5xx count; other 4xx are about the
+    request itself and would fail on every backend.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, TRANSPORT_ERRORS) or isinstance(error.__cause__, TRANSPORT_ERRORS):
+        return True
+    return any(cls.__name__ in SDK_TRANSPORT_ERRORS for cls in type(error).__mro__)
+
+class LLMBackend:
+    """One chat model plus its moving latency / error statistics"""
+
+    def __init__(self, name, llm, prior_latency=1.0, alpha=0.2):
+        self.name = name
+        self.llm = llm
+        self.alpha = alpha
+        self.latency = prior_latency
+        self.ttft = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.calls = 0
+        self.failures = 0
+
+    def record(self, seconds, ok, failure_threshold, cooldown, ttft=None):
+        self.calls += 1
+        if ttft is not None:
+            # Kept apart from latency, which is total call time for streams and calls alike
+            self.ttft = ttft if self.ttft is None else self.ttft + self.alpha * (ttft - self.ttft)
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        if ok:
+            self.latency += self.alpha * (seconds - self.latency)
+            self.consecutive_failures = 0
+            return
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= failure_threshold:
+            # Circuit open: only used as a last resort until the cooldown ends
+            self.open_until = time.monotonic() + cooldown
+            logger.warning(f"LLM backend {self.name} failing, taking it out of rotation for {cooldown}s")
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.open_until
+
+    def score(self):
+        # Expected cost of trying this backend: latency, inflated by how often it fails
+        return self.latency * (1 + 4 * self.error_rate)
+
+    def stats(self):
+        return {
+            "latency_ms": round(self.latency * 1000, 1),
+            "ttft_ms": round(self.ttft * 1000, 1) if self.ttft is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "healthy": self.healthy,
+            "calls": self.calls,
+            "failures": self.failures
+        }
+
+class LLMRouter:
+    """Routes each LLM call to the fastest healthy backend and fails over to the next.
+
+    Exposes invoke/ainvoke/astream like a LangChain chat model, so RAGEngine can
+    use it in place of a single ChatGroq. for_policy() gives a view restricted to
+    preferred backends (e.g. a cheaper model for short /concise questions) that
+    still falls back to the rest.
+    """
+
+    def __init__(self, backends, failure_threshold=3, cooldown=30.0, explore_rate=0.05):
+        self.backends = backends
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.explore_rate = explore_rate
+        self._lock = threading.Lock()
+
+    def _order(self, preferred=None):
+        """Candidates best first: preferred healthy backends, other healthy ones, then open circuits"""
+        with self._lock:
+            healthy = sorted((b for b in self.backends if b.healthy), key=LLMBackend.score)
+            unhealthy = sorted((b for b in self.backends if not b.healthy), key=lambda b: b.open_until)
+        if preferred:
+            healthy = [b for b in healthy if b.name in preferred] + [b for b in healthy if b.name not in preferred]
+        # Occasionally try the runner-up so a backend's stale latency estimate can recover
+        if len(healthy) > 1 and random.random() < self.explore_rate:
+            healthy[0], healthy[1] = healthy[1], healthy[0]
+        return healthy + unhealthy
+
+    def _record(self, backend, started, ok, ttft=None):
+        with self._lock:
+            backend.record(time.perf_counter() - started, ok, self.failure_threshold, self.cooldown, ttft)
+
+    def invoke(self, prompt, preferred=None):
+        error = None
+        for backend in self._order(preferred):
+            started = time.perf_counter()
+            try:
+                response = backend.llm.invoke(prompt)
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                self._record(backend, started, ok=False)
+                logger.warning(f"LLM backend {backend.name} failed: {e}")
+                error = e
+                continue
+            self._record(backend, started, ok=True)
+            return response
+        raise error
+
+    async def ainvoke(self, prompt, preferred=None):
+        error = None
+        for backend in self._order(preferred):
+            started = time.perf_counter()
+            try:
+                response = await backend.llm.ainvoke(prompt)
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                self._record(backend, started, ok=False)
+                logger.warning(f"LLM backend {backend.name} failed: {e}")
+                error = e
+                continue
+            self._record(backend, started, ok=True)
+            return response
+        raise error
+
+    async def astream(self, prompt, preferred=None):
+        """Stream from the best backend; fail over only until the first chunk has been sent"""
+        error = None
+        for backend in self._order(preferred):
+            started = time.perf_counter()
+            ttft = None
+            try:
+                async for chunk in backend.llm.astream(prompt):
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    yield chunk
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                self._record(backend, started, ok=False)
+                if ttft is not None:
+                    # Chunks were already sent, so there's nothing to fail over to
+                    raise
+                logger.warning(f"LLM backend {backend.name} failed: {e}")
+                error = e
+                continue
+            # Recorded at completion so latency stays comparable with invoke/ainvoke
+            self._record(backend, started, ok=True, ttft=ttft)
+            return
+        raise error
+
+    def __call__(self, prompt):
+        return self.invoke(prompt)
+
+    def for_policy(self, preferred):
+        return _PolicyView(self, set(preferred)) if preferred else self
+
+    def stats(self):
+        with self._lock:
+            return {backend.name: backend.stats() for backend in self.backends}
+
+class _PolicyView:
+    """The router with a fixed set of preferred backends"""
+
+    def __init__(self, router, preferred):
+        self.router = router
+        self.preferred = preferred
+
+    def invoke(self, prompt):
+        return self.router.invoke(prompt, preferred=self.preferred)
+
+    async def ainvoke(self, prompt):
+        return await self.router.ainvoke(prompt, preferred=self.preferred)
+
+    def astream(self, prompt):
+        return self.router.astream(prompt, preferred=self.preferred)
+
+    def __call__(self, prompt):
+        return self.invoke(prompt)
+
+def load_backend_configs():
+    """LLM_BACKENDS (JSON list) or a single Groq backend for LLM_MODEL"""
+    if settings.LLM_BACKENDS:
+        return json.loads(settings.LLM_BACKENDS)
+    return [{"name": "groq", "kind": "groq", "model": settings.LLM_MODEL}]
+
+def build_chat_model(config, http_client=None, http_async_client=None):
+    """LangChain chat model for one backend config ("groq" or any OpenAI-compatible server)"""
+    kind = config.get("kind", "groq")
+    common = dict(
+        model=config["model"],
+        temperature=config.get("temperature", settings.LLM_TEMPERATURE),
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        max_retries=0,
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+    if kind == "groq":
+        from langchain_groq import ChatGroq
+
+        return ChatGroq(api_key=config.get("api_key") or settings.GROQ_API_KEY,
+                        base_url=config.get("base_url") or settings.LLM_BASE_URL, **common)
+    if kind == "openai":
+        # llama.cpp server, Ollama, vLLM, ... (needs the optional langchain-openai package)
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(api_key=config.get("api_key") or "not-needed", base_url=config["base_url"], **common)
+    raise ValueError(f"Unknown LLM backend kind: {kind}")
+
+def build_router(http_client=None, http_async_client=None):
+    backends = [
+        LLMBackend(
+            config.get("name", config["model"]),
+            build_chat_model(config, http_client, http_async_client),
+            prior_latency=config.get("expected_latency_ms", settings.LLM_ROUTER_PRIOR_LATENCY_MS) / 1000,
+            alpha=settings.LLM_ROUTER_EWMA_ALPHA
+        )
+        for config in load_backend_configs()
+    ]
+    logger.info(f"LLM router backends: {[backend.name for backend in backends]}")
+    return LLMRouter(
+        backends,
+        failure_threshold=settings.LLM_ROUTER_FAILURE_THRESHOLD,
+        cooldown=settings.LLM_ROUTER_COOLDOWN_SECONDS,
+        explore_rate=settings.LLM_ROUTER_EXPLORE_RATE
+    )
@@ -0,0 +1,275 @@
+# core/llm_transport.py
+"""httpx transports for the LLM client: pooled keep-alive connections, a per-call
+deadline, jittered exponential backoff on 429/5xx that honours Retry-After, and
+(async only) an optional hedged second request once the first is slower than
+the recent p95.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def retry_after_seconds(response):
+    """Seconds the server asked us to wait (Retry-After as seconds or HTTP date), or None"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    def __init__(self, max_retries=3, backoff_base=0.25, backoff_max=8.0, deadline=30.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+
+    def backoff(self, attempt, response=None):
+        """Delay before retry number attempt (0-based); Retry-After wins when the server sends one"""
+        if response is not None:
+            requested = retry_after_seconds(response)
+            if requested is not None:
+                return requested
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        # "Equal jitter": at least half the exponential step, so retries still spread out
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+class LatencyWindow:
+    """Recent successful response latencies, for the hedging delay"""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, min_samples):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+class _TransportStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.deadline_exceeded = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "deadline_exceeded": self.deadline_exceeded,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins
+            }
+
+class RetryingTransport(httpx.BaseTransport):
+    """Sync transport: retries and deadline (no hedging)"""
+
+    def __init__(self, transport: httpx.BaseTransport, policy: RetryPolicy):
+        self.transport = transport
+        self.policy = policy
+        self.stats = _TransportStats()
+
+    def handle_request(self, request):
+        self.stats.incr("requests")
+        request.read()  # buffer the body so it can be re-sent
+        deadline = time.monotonic() + self.policy.deadline
+        attempt = 0
+        while True:
+            try:
+                response = self.transport.handle_request(request)
+            except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+                response, error = None, e
+            else:
+                error = None
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+
+            delay = self.policy.backoff(attempt, response)
+            if attempt >= self.policy.max_retries or time.monotonic() + delay >= deadline:
+                if response is None:
+                    raise error
+                return response
+
+            if response is not None:
+                response.close()
+            logger.warning(f"LLM request failed ({response.status_code if response else error}), "
+                           f"retrying in {delay:.2f}s")
+            self.stats.incr("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+class AsyncRetryingTransport(httpx.AsyncBaseTransport):
+    """Async transport: retries, per-call deadline and optional hedged requests"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: RetryPolicy,
+                 hedge=False, hedge_delay=1.5, hedge_min_samples=20):
+        self.transport = transport
+        self.policy = policy
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = LatencyWindow()
+        self.stats = _TransportStats()
+
+    def _hedge_after(self):
+        """Seconds to wait before hedging: the recent p95 once there are enough samples"""
+        p95 = self.latencies.percentile(95, self.hedge_min_samples)
+        return p95 if p95 is not None else self.hedge_delay
+
+    async def _send(self, request):
+        started = time.monotonic()
+        response = await self.transport.handle_async_request(request)
+        if response.status_code < 400:
+            self.latencies.add(time.monotonic() - started)
+        return response
+
+    async def _send_hedged(self, request):
+        """Send once; if no response within the hedge delay, race a second copy and keep the first back"""
+        primary = asyncio.ensure_future(self._send(request))
+        backup = None
+        failed = []
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self._hedge_after())
+            if done:
+                return primary.result()
+
+            self.stats.incr("hedges")
+            backup = asyncio.ensure_future(self._send(request))
+            pending = {primary, backup}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code not in RETRY_STATUS_CODES:
+                        if task is backup:
+                            self.stats.incr("hedge_wins")
+                        await self._discard(pending | set(failed))
+                        return task.result()
+                    failed.append(task)
+        except BaseException:
+            # Cancelled (deadline) or failed: don't leave a request running in the background
+            await self._discard({task for task in (primary, backup) if task is not None})
+            raise
+
+        # Both copies failed: hand one retryable response (or the error) to the retry loop
+        responses = [task for task in failed if task.exception() is None]
+        if responses:
+            await self._discard(set(responses[1:]))
+            return responses[0].result()
+        raise primary.exception()
+
+    @staticmethod
+    async def _discard(tasks):
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                response = await task
+            except BaseException:
+                continue
+            await response.aclose()
+
+    async def _attempt(self, request):
+        return await (self._send_hedged(request) if self.hedge else self._send(request))
+
+    async def handle_async_request(self, request):
+        self.stats.incr("requests")
+        await request.aread()  # buffer the body so it can be re-sent
+        deadline = time.monotonic() + self.policy.deadline
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                response = await asyncio.wait_for(self._attempt(request), timeout=max(remaining, 0.001))
+            except asyncio.TimeoutError:
+                self.stats.incr("deadline_exceeded")
+                raise httpx.ReadTimeout(f"LLM call exceeded its {self.policy.deadline:g}s deadline", request=request)
+            except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+                response, error = None, e
+            else:
+                error = None
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+
+            delay = self.policy.backoff(attempt, response)
+            if attempt >= self.policy.max_retries or time.monotonic() + delay >= deadline:
+                if response is None:
+                    raise error
+                return response
+
+            if response is not None:
+                await response.aclose()
+            logger.warning(f"LLM request failed ({response.status_code if response else error}), "
+                           f"retrying in {delay:.2f}s")
+            self.stats.incr("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+def build_http_clients():
+    """(httpx.Client, httpx.AsyncClient) for the LLM SDK, configured from settings"""
+    limits = httpx.Limits(
+        max_connections=settings.LLM_POOL_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS
+    )
+    timeout = httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
+    policy = RetryPolicy(
+        max_retries=settings.LLM_MAX_RETRIES,
+        backoff_base=settings.LLM_BACKOFF_BASE_MS / 1000,
+        backoff_max=settings.LLM_BACKOFF_MAX_MS / 1000,
+        deadline=settings.LLM_TIMEOUT_SECONDS
+    )
+
+    sync_transport = RetryingTransport(httpx.HTTPTransport(limits=limits), policy)
+    async_transport = AsyncRetryingTransport(
+        httpx.AsyncHTTPTransport(limits=limits, http2=False),
+        policy,
+        hedge=settings.LLM_HEDGE_ENABLED,
+        hedge_delay=settings.LLM_HEDGE_DELAY_MS / 1000,
+        hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES
+    )
+    return (
+        httpx.Client(transport=sync_transport, timeout=timeout),
+        httpx.AsyncClient(transport=async_transport, timeout=timeout)
+    )
+
+def transport_stats(client):
+    """Retry/hedge counters of a client built by build_http_clients"""
+    transport = client._transport
+    return transport.stats.as_dict() if isinstance(transport, (RetryingTransport, AsyncRetryingTransport)) else None
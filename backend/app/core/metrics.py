@@ -0,0 +1,152 @@
+# core/metrics.py
+"""Prometheus metrics (optional: everything is a no-op without prometheus_client).
+
+Request-scoped metrics are labeled by endpoint through a context variable set
+by MetricsMiddleware; run_in_cpu_pool/run_in_io_pool copy the context into
+their threads, so stages timed inside the pools keep their endpoint label.
+"""
+import contextvars
+import functools
+import logging
+import time
+from contextlib import contextmanager
+
+from app.config.settings import settings
+
+try:
+    import prometheus_client
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+ENABLED = settings.METRICS_ENABLED and prometheus_client is not None
+
+# Endpoints that get their own label; everything else is reported as "other"
+LABELED_ENDPOINTS = ("/chat", "/chat/stream", "/concise", "/debug")
+
+current_endpoint = contextvars.ContextVar("current_endpoint", default="other")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+if ENABLED:
+    REQUEST_SECONDS = prometheus_client.Histogram(
+        "rag_request_seconds", "End-to-end request latency", ["endpoint"], buckets=LATENCY_BUCKETS
+    )
+    REQUESTS_IN_FLIGHT = prometheus_client.Gauge(
+        "rag_requests_in_flight", "Requests currently being served", ["endpoint"]
+    )
+    STAGE_SECONDS = prometheus_client.Histogram(
+        "rag_stage_seconds", "Latency of each RAG pipeline stage", ["endpoint", "stage"], buckets=LATENCY_BUCKETS
+    )
+    LLM_FIRST_TOKEN_SECONDS = prometheus_client.Histogram(
+        "rag_llm_first_token_seconds", "Time until the LLM's first token (whole answer when not streaming)",
+        ["endpoint"], buckets=LATENCY_BUCKETS
+    )
+    LLM_SECONDS = prometheus_client.Histogram(
+        "rag_llm_seconds", "Total LLM call time", ["endpoint"], buckets=LATENCY_BUCKETS
+    )
+    LLM_TOKENS = prometheus_client.Counter(
+        "rag_llm_tokens_total", "Prompt and completion tokens sent to / received from the LLM", ["endpoint", "kind"]
+    )
+    FIRESTORE_SECONDS = prometheus_client.Histogram(
+        "rag_firestore_seconds", "Latency of each Firestore call", ["endpoint", "operation"], buckets=LATENCY_BUCKETS
+    )
+
+def endpoint_label(path):
+    return path if path in LABELED_ENDPOINTS else "other"
+
+def observe_stage(stage, seconds):
+    if ENABLED:
+        STAGE_SECONDS.labels(current_endpoint.get(), stage).observe(seconds)
+
+def observe_timings(timings_ms):
+    """Record a RetrievalTrace's per-stage timings"""
+    if ENABLED:
+        endpoint = current_endpoint.get()
+        for stage, ms in timings_ms.items():
+            STAGE_SECONDS.labels(endpoint, stage).observe(ms / 1000)
+
+def observe_llm(first_token_seconds, total_seconds, prompt_tokens, completion_tokens):
+    if not ENABLED:
+        return
+    endpoint = current_endpoint.get()
+    if first_token_seconds is not None:
+        LLM_FIRST_TOKEN_SECONDS.labels(endpoint).observe(first_token_seconds)
+    LLM_SECONDS.labels(endpoint).observe(total_seconds)
+    LLM_TOKENS.labels(endpoint, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(endpoint, "completion").inc(completion_tokens)
+
+def timed_firestore(operation):
+    """Decorator timing a FirebaseService method"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                FIRESTORE_SECONDS.labels(current_endpoint.get(), operation).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+@contextmanager
+def track_request(endpoint):
+    """In-flight gauge and latency histogram around one request"""
+    if not ENABLED:
+        yield
+        return
+    token = current_endpoint.set(endpoint)
+    REQUESTS_IN_FLIGHT.labels(endpoint).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+        REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+        current_endpoint.reset(token)
+
+class RuntimeCollector:
+    """Cache and queue state read from the live objects at scrape time"""
+
+    def __init__(self, engine, pools):
+        self.engine = engine
+        self.pools = pools
+
+    def collect(self):
+        queue_depth = GaugeMetricFamily("rag_thread_pool_queue_depth", "Tasks waiting for a pool thread", labels=["pool"])
+        for name, pool in self.pools.items():
+            queue_depth.add_metric([name], pool._work_queue.qsize())
+        batcher = self.engine.embedding_batcher
+        if batcher is not None:
+            queue_depth.add_metric(["embedding_batcher"], batcher.stats()["queued"])
+        yield queue_depth
+
+        entries = GaugeMetricFamily("rag_cache_entries", "Entries held by each cache", labels=["cache"])
+        events = CounterMetricFamily("rag_cache_lookups", "Cache lookups by outcome", labels=["cache", "outcome"])
+        answer = self.engine.answer_cache.stats()
+        entries.add_metric(["answer"], answer["entries"])
+        events.add_metric(["answer", "hit"], answer["hits"])
+        events.add_metric(["answer", "miss"], answer["misses"])
+        if self.engine.embedding is not None:
+            embedding = self.engine.embedding.stats()
+            entries.add_metric(["embedding"], embedding["entries"])
+            events.add_metric(["embedding", "memory_hit"], embedding["memory_hits"])
+            events.add_metric(["embedding", "disk_hit"], embedding["disk_hits"])
+            events.add_metric(["embedding", "miss"], embedding["misses"])
+        yield entries
+        yield events
+
+def register_runtime_collector(engine, pools):
+    if ENABLED:
+        prometheus_client.REGISTRY.register(RuntimeCollector(engine, pools))
+
+def render():
+    """(body, content type) for the /metrics endpoint, or None when metrics are off"""
+    if not ENABLED:
+        return None
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
@@ -1,14 +1,27 @@
 import os
+import time
 import logging
 from fastapi import HTTPException
-from langchain.prompts import PromptTemplate
-from langchain.chains import RetrievalQA
-from langchain_community.vectorstores import Chroma
-from langchain_groq import ChatGroq
-from langchain.embeddings import SentenceTransformerEmbeddings
+from langchain_core.documents import Document
 
 from app.config.settings import settings
-from app.core.utils import clean_repetitive_text, count_tokens, truncate_documents
+from app.core.utils import clean_repetitive_text, count_tokens, StreamingTextCleaner
+from app.core.context_packer import pack_documents, token_counter
+from app.core.context_compressor import ContextCompressor
+from app.core.diversity import mmr, suppress_near_duplicates
+from app.core.answer_cache import SemanticAnswerCache
+from app.core.embedding_cache import CachedEmbeddings, normalize_query
+from app.core.embeddings import build_embeddings
+from app.core.batching import MicroBatchingEmbeddings
+from app.core.concurrency import run_in_cpu_pool
+from app.core.retrieval import RetrievalTrace
+from app.core.lexical_index import BM25Index, reciprocal_rank_fusion
+from app.core.reranker import CrossEncoderReranker
+from app.core.vector_store import open_vector_store
+from app.core.startup import startup_state
+from app.core.single_flight import SingleFlight
+from app.core import metrics
+from app.ingestion.manifest import read_generation
 
 logger = logging.getLogger(__name__)
 
@@ -30,58 +43,101 @@ REQUIREMENTS:
 
 COMPREHENSIVE ANSWER:"""
 
+WARM_UP_QUERY = "What is solar energy?"
+
+CONCISE_PROMPT_TEMPLATE = """Answer this question using only the provided context. Be clear and concise. Do not repeat information.
+
+Context: {context}
+
+Question: {question}
+
+Concise Answer:"""
+
 class RAGEngine:
     def __init__(self):
         self.vectordb = None
+        self.embedding = None
+        self.embedding_batcher = None
         self.llm = None
-        self.qa = None
-        self.retriever = None
+        self.lexical_index = None
+        self.reranker = None
+        self.compressor = None
+        self.index_generation = None
+        self.sidecar = None
+        self.in_flight = SingleFlight()
+        self.concise_llm = None
+        self.http_client = None
+        self.http_async_client = None
+        self.answer_cache = SemanticAnswerCache(
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+        )
     
     def initialize(self):
         """Initialize RAG components - EXACT MATCH TO COLAB"""
         try:
             logger.info("Initializing RAG components...")
             
-            # EXACT EMBEDDING MODEL FROM COLAB
-            embedding = SentenceTransformerEmbeddings(
-                model_name=settings.EMBEDDING_MODEL
-            )
+            # EXACT EMBEDDING MODEL FROM COLAB (torch or ONNX backend); cache misses are micro-batched
+            with startup_state.phase("embedding_model"):
+                if settings.SIDECAR_ENABLED:
+                    # The sidecar owns the model (and batches across workers); this process only connects
+                    from app.sidecar.client import SidecarClient, SidecarEmbeddings
+                    
+                    self.sidecar = SidecarClient(settings.SIDECAR_SOCKET_PATH, timeout=settings.SIDECAR_TIMEOUT_SECONDS)
+                    base_embedding = SidecarEmbeddings(self.sidecar)
+                else:
+                    base_embedding = build_embeddings()
+                if settings.EMBEDDING_MICRO_BATCHING and not settings.SIDECAR_ENABLED:
+                    self.embedding_batcher = MicroBatchingEmbeddings(
+                        base_embedding,
+                        window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+                        max_batch=settings.EMBEDDING_MAX_BATCH
+                    )
+                    base_embedding = self.embedding_batcher
+                self.embedding = CachedEmbeddings(
+                    base_embedding,
+                    model_name=f"{settings.EMBEDDING_MODEL}:{settings.EMBEDDING_BACKEND}",
+                    max_entries=settings.EMBEDDING_CACHE_SIZE,
+                    disk_path=settings.EMBEDDING_CACHE_PATH,
+                    disk_max_rows=settings.EMBEDDING_CACHE_DISK_MAX_ROWS,
+                    disk_ttl_seconds=settings.EMBEDDING_CACHE_DISK_TTL_SECONDS
+                )
+                if settings.COMPRESSION_ENABLED:
+                    self.compressor = ContextCompressor(
+                        self.embedding,
+                        max_chunks=settings.SENTENCE_EMBEDDING_CACHE_SIZE,
+                        min_similarity=settings.COMPRESSION_MIN_SIMILARITY
+                    )
             
             # Set up Groq API key - EXACT MATCH
             os.environ["GROQ_API_KEY"] = settings.GROQ_API_KEY
             
-            # Initialize Groq LLM - EXACT MATCH
-            self.llm = ChatGroq(
-                model=settings.LLM_MODEL,
-                temperature=settings.LLM_TEMPERATURE,
-                api_key=os.environ["GROQ_API_KEY"]
-            )
+            # Initialize Groq LLM(s) behind the router (imported here: the LangChain clients are slow to import)
+            with startup_state.phase("llm_client"):
+                from app.core.llm_router import build_router
+                from app.core.llm_transport import build_http_clients
+                
+                # Our transport owns pooling, deadlines, retries and hedging, so the SDK's retries are off
+                self.http_client, self.http_async_client = build_http_clients()
+                self.llm = build_router(self.http_client, self.http_async_client)
+                self.concise_llm = self.llm.for_policy(settings.LLM_CONCISE_BACKENDS)
             logger.info("✅ Groq LLM ready")
             
+            if settings.RERANK_ENABLED:
+                with startup_state.phase("reranker"):
+                    self.reranker = CrossEncoderReranker(
+                        settings.RERANK_MODEL,
+                        budget_ms=settings.RERANK_BUDGET_MS,
+                        max_length=settings.RERANK_MAX_LENGTH,
+                        workers=settings.RERANK_WORKERS
+                    )
+                logger.info("✅ Cross-encoder reranker ready")
+            
             # Load vector database - EXACT MATCH
-            self.vectordb = Chroma(
-                persist_directory=settings.DB_PATH,
-                embedding_function=embedding
-            )
-            
-            # EXACT RETRIEVER FROM COLAB
-            self.retriever = self.vectordb.as_retriever(search_kwargs={"k": settings.RETRIEVAL_K})
-            logger.info("✅ Vector DB reloaded")
-            
-            # Create prompt - EXACT MATCH
-            prompt = PromptTemplate(
-                template=PROMPT_TEMPLATE,
-                input_variables=["context", "question"]
-            )
-            
-            # Create QA chain - EXACT MATCH
-            self.qa = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                retriever=self.vectordb.as_retriever(search_kwargs={"k": settings.RETRIEVAL_K}),
-                chain_type="stuff",
-                chain_type_kwargs={"prompt": prompt},
-                return_source_documents=True
-            )
+            with startup_state.phase("vector_store"):
+                self.reload_vectordb()
             
             logger.info("✅ Comprehensive RAG pipeline ready")
             
@@ -94,40 +150,337 @@ class RAGEngine:
             logger.error(f"Error initializing RAG: {str(e)}")
             raise
     
-    def ask_comprehensive_question(self, question, max_tokens=300):
+    def _concise_model(self, question):
+        """Policy: short concise questions may go to a cheaper/faster backend"""
+        if self.concise_llm is not None and len(question) <= settings.LLM_CONCISE_MAX_QUESTION_CHARS:
+            return self.concise_llm
+        return self.llm
+    
+    def llm_transport_stats(self):
+        """Retry/hedge counters of the LLM HTTP transports"""
+        if self.http_async_client is None:
+            return None
+        from app.core.llm_transport import transport_stats
+        
+        return {"sync": transport_stats(self.http_client), "async": transport_stats(self.http_async_client)}
+    
+    def warm_up(self):
+        """Dummy encode + search so the first real request doesn't pay for lazy loading"""
+        # embed_documents bypasses the query cache, so the model itself runs
+        query_embedding = self.embedding.embed_documents([WARM_UP_QUERY])[0]
+        self.vectordb.search(query_embedding, settings.RETRIEVAL_K)
+        if self.lexical_index is not None:
+            self.lexical_index.search(WARM_UP_QUERY, k=settings.RETRIEVAL_K)
+        if self.reranker is not None:
+            self.reranker.rerank(WARM_UP_QUERY, [WARM_UP_QUERY, WARM_UP_QUERY], 1)
+        # Sentence embeddings are computed here rather than on the first requests that compress
+        if self.compressor is not None and settings.COMPRESSION_PRECOMPUTE:
+            self.compressor.sentences.preload(self.vectordb)
+        # Loads the LLM tokenizer used for context packing
+        if not token_counter.exact:
+            if settings.TOKENIZER_REQUIRED:
+                raise RuntimeError(f"Tokenizer {settings.LLM_TOKENIZER} could not be loaded")
+            logger.warning(f"⚠️ Token budgets are estimated (~4 chars/token): tokenizer {settings.LLM_TOKENIZER} not loaded")
+        logger.info("✅ Warm-up query finished")
+    
+    def reload_vectordb(self):
+        """(Re)open the vector store and drop answers cached against the previous index"""
+        self.index_generation = read_generation(settings.DB_PATH)
+        if self.sidecar is not None:
+            from app.sidecar.client import SidecarVectorStore
+            
+            if self.vectordb is None:
+                self.vectordb = SidecarVectorStore(self.sidecar)
+            else:
+                self.vectordb.reload()
+        else:
+            self.vectordb = open_vector_store(fresh=self.vectordb is not None)
+        logger.info("✅ Vector DB reloaded")
+        
+        if settings.HYBRID_RETRIEVAL_ENABLED:
+            try:
+                self.lexical_index = BM25Index.load_or_build(
+                    self.vectordb, settings.BM25_INDEX_PATH,
+                    k1=settings.BM25_K1, b=settings.BM25_B
+                )
+                logger.info("✅ BM25 index ready")
+            except Exception as e:
+                logger.warning(f"BM25 index unavailable, using vector retrieval only: {e}")
+                self.lexical_index = None
+        
+        self.answer_cache.clear()
+    
+    def refresh_if_changed(self):
+        """Reload when the ingestion pipeline has published a new index generation"""
+        if self.vectordb is None or read_generation(settings.DB_PATH) == self.index_generation:
+            return False
+        logger.info("🔄 New index generation published, reloading vector DB")
+        self.reload_vectordb()
+        if self.compressor is not None and settings.COMPRESSION_PRECOMPUTE:
+            self.compressor.sentences.preload(self.vectordb)
+        return True
+    
+    def _lookup_cached_answer(self, question, prior_doc_ids=None):
+        """Embed the question and check the semantic answer cache.
+
+        Follow-ups retrieved with a conversation's prior_doc_ids are grounded in that
+        conversation, so they neither read nor (query_embedding None) write the cache.
+        """
+        if not settings.ANSWER_CACHE_ENABLED or prior_doc_ids:
+            return None, None
+        query_embedding = self.embedding.embed_query(question)
+        return query_embedding, self.answer_cache.get(query_embedding)
+    
+    def retrieve(self, question, query_embedding=None, prior_doc_ids=None):
+        """Single retrieval pass: embed once, search once, pack the context once.
+
+        prior_doc_ids (a follow-up's previous sources) are fused in as one more ranking.
+        """
+        timings = {}
+        
+        started = time.perf_counter()
+        if query_embedding is None:
+            query_embedding = self.embedding.embed_query(question)
+        timings["embed"] = (time.perf_counter() - started) * 1000
+        
+        # Over-fetch when the candidates are going to be fused with BM25, reranked or diversified
+        started = time.perf_counter()
+        candidate_k = settings.RERANK_CANDIDATES if self.reranker is not None else settings.RETRIEVAL_K
+        if settings.DIVERSITY_ENABLED:
+            candidate_k = max(candidate_k, settings.DIVERSITY_CANDIDATES)
+        k = max(candidate_k, settings.HYBRID_CANDIDATES) if self.lexical_index is not None else candidate_k
+        hits = self._vector_search(query_embedding, k)
+        timings["search"] = (time.perf_counter() - started) * 1000
+        
+        if self.lexical_index is not None:
+            started = time.perf_counter()
+            # With domain routing, lexical hits are kept to the domains the vector search used
+            route = getattr(self.vectordb, "route", None)
+            domains = route(query_embedding) if route is not None else None
+            lexical_ids = [chunk_id for chunk_id, _ in self.lexical_index.search(question, k=k, domains=domains)]
+            fused = reciprocal_rank_fusion([list(hits.keys()), lexical_ids], k=settings.RRF_K)[:candidate_k]
+            hits.update(self._fetch_documents([doc_id for doc_id, _ in fused if doc_id not in hits]))
+            ranked = [(doc_id, hits[doc_id][0], score) for doc_id, score in fused if doc_id in hits]
+            timings["lexical"] = (time.perf_counter() - started) * 1000
+        else:
+            ranked = [(doc_id, doc, score) for doc_id, (doc, score) in hits.items()]
+        
+        if prior_doc_ids:
+            fused = reciprocal_rank_fusion([[doc_id for doc_id, _, _ in ranked], prior_doc_ids], k=settings.RRF_K)
+            known = {doc_id: doc for doc_id, doc, _ in ranked}
+            known.update({
+                doc_id: doc for doc_id, (doc, _) in self._fetch_documents([d for d in prior_doc_ids if d not in known]).items()
+            })
+            ranked = [(doc_id, known[doc_id], score) for doc_id, score in fused[:candidate_k] if doc_id in known]
+        
+        trace = RetrievalTrace(question=question, query_embedding=query_embedding, timings=timings)
+        
+        if settings.DIVERSITY_ENABLED:
+            # Drop overlapping chunks before the reranker spends time on them
+            started = time.perf_counter()
+            kept = suppress_near_duplicates([doc.page_content for _, doc, _ in ranked], settings.NEAR_DUPLICATE_MAX_HAMMING)
+            trace.duplicates_dropped = len(ranked) - len(kept)
+            ranked = [ranked[i] for i in kept]
+            timings["dedup"] = (time.perf_counter() - started) * 1000
+        
+        if self.reranker is not None and len(ranked) > settings.RETRIEVAL_K:
+            started = time.perf_counter()
+            # Keep every scored candidate when MMR still has to pick among them
+            top_n = len(ranked) if settings.DIVERSITY_ENABLED else settings.RETRIEVAL_K
+            reranked = self.reranker.rerank(question, [doc.page_content for _, doc, _ in ranked], top_n)
+            if reranked is not None:
+                order, scores = reranked
+                ranked = [(ranked[i][0], ranked[i][1], score) for i, score in zip(order, scores)]
+                trace.reranked = True
+            timings["rerank"] = (time.perf_counter() - started) * 1000
+        
+        if settings.DIVERSITY_ENABLED and len(ranked) > settings.RETRIEVAL_K:
+            started = time.perf_counter()
+            ranked = self._diversify(ranked, settings.RETRIEVAL_K)
+            timings["mmr"] = (time.perf_counter() - started) * 1000
+        ranked = ranked[:settings.RETRIEVAL_K]
+        
+        for doc_id, doc, score in ranked:
+            trace.docs.append(doc)
+            trace.doc_ids.append(doc_id)
+            trace.scores.append(score)
+        
+        started = time.perf_counter()
+        if self.compressor is not None:
+            budget = min(settings.COMPRESSION_MAX_CONTEXT_TOKENS, self._context_budget(question))
+            trace.context, trace.context_tokens = self.compressor.pack(trace.docs, query_embedding, budget)
+        else:
+            trace.context, trace.context_tokens = pack_documents(trace.docs, self._context_budget(question))
+        timings["pack"] = (time.perf_counter() - started) * 1000
+        metrics.observe_timings(timings)
+        
+        return trace
+    
+    def _diversify(self, ranked, k):
+        """Pick k of the ranked candidates by MMR over their stored embeddings"""
+        result = self.vectordb.get(ids=[doc_id for doc_id, _, _ in ranked], include=["embeddings"])
+        embeddings = dict(zip(result["ids"], result["embeddings"]))
+        if len(embeddings) < len(ranked):
+            return ranked
+        relevance = [score for _, _, score in ranked]
+        if None in relevance:
+            # Unscored candidates: rank order stands in for relevance
+            relevance = [-rank for rank in range(len(ranked))]
+        order = mmr([embeddings[doc_id] for doc_id, _, _ in ranked], relevance, k, settings.MMR_LAMBDA)
+        return [ranked[i] for i in order]
+    
+    def _vector_search(self, query_embedding, k):
+        """Nearest chunks as an ordered {id: (Document, relevance)} mapping"""
+        return {doc_id: (doc, score) for doc_id, doc, score in self.vectordb.search(query_embedding, k)}
+    
+    def _fetch_documents(self, ids):
+        """Load chunks found only by the lexical index (no vector score)"""
+        if not ids:
+            return {}
+        result = self.vectordb.get(ids=ids, include=["documents", "metadatas"])
+        return {
+            doc_id: (Document(page_content=text, metadata=metadata or {}), None)
+            for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+        }
+    
+    async def aretrieve(self, question, query_embedding=None, prior_doc_ids=None):
+        """Async variant of retrieve (runs in the CPU pool)"""
+        return await run_in_cpu_pool(self.retrieve, question, query_embedding, prior_doc_ids)
+    
+    @staticmethod
+    def _response_text(response):
+        return response.content if hasattr(response, 'content') else str(response)
+    
+    @staticmethod
+    def _observe_llm(started, prompt, answer, response=None, first_token_at=None):
+        """Record LLM latency and token usage (provider-reported counts when available)"""
+        if not metrics.ENABLED:
+            return
+        finished = time.perf_counter()
+        usage = getattr(response, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens")
+        completion_tokens = usage.get("output_tokens")
+        metrics.observe_llm(
+            # Without streaming the first token arrives with the whole answer
+            (first_token_at or finished) - started,
+            finished - started,
+            prompt_tokens if prompt_tokens is not None else count_tokens(prompt),
+            completion_tokens if completion_tokens is not None else count_tokens(answer)
+        )
+    
+    @staticmethod
+    def _prompt_overhead(question):
+        """Tokens used by the (longest) prompt template and the question itself"""
+        return count_tokens(PROMPT_TEMPLATE.format(context="", question=question))
+    
+    def _context_budget(self, question):
+        """Context tokens that fit in MAX_PROMPT_TOKENS next to the template and question"""
+        available = settings.MAX_PROMPT_TOKENS - self._prompt_overhead(question)
+        return max(0, min(settings.MAX_CONTEXT_TOKENS, available))
+    
+    def _build_comprehensive_prompt(self, trace):
+        """Build the comprehensive prompt with token control"""
+        # The context was packed against the prompt budget, so the prompt is built exactly once
+        formatted_prompt = PROMPT_TEMPLATE.format(context=trace.context, question=trace.question)
+        logger.info(f"Total prompt tokens: {self._prompt_overhead(trace.question) + trace.context_tokens}")
+        return formatted_prompt
+    
+    @staticmethod
+    def _format_sources(trace):
+        sources = []
+        for i, (doc_id, doc, score) in enumerate(zip(trace.doc_ids, trace.docs, trace.scores)):
+            sources.append({
+                "id": doc_id,
+                "document": doc.metadata.get("source", f"Document {i+1}"),
+                "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
+                "score": score
+            })
+        return sources
+    
+    @staticmethod
+    def _build_concise_prompt(trace):
+        return CONCISE_PROMPT_TEMPLATE.format(context=trace.context, question=trace.question)
+    
+    @staticmethod
+    def _log_debug_context(trace):
+        logger.info(f"🔍 Question: {trace.question}")
+        logger.info(f"\n📚 Retrieved {len(trace.docs)} documents")
+        
+        context_preview = ""
+        for i, doc in enumerate(trace.docs):
+            if doc.page_content.strip():
+                context_preview += f"Doc {i+1}: {doc.page_content[:100]}...\n"
+        
+        logger.info(f"\n📖 Context preview:\n{context_preview}")
+        logger.info(f"⏱️ Retrieval timings: {trace.to_dict()['timings_ms']}")
+    
+    def ask_comprehensive_question(self, question, max_tokens=300, trace=None):
         """Get comprehensive answer with token control"""
         try:
+            # Serve paraphrases of recently answered questions from the semantic cache
+            query_embedding, cached = self._lookup_cached_answer(question)
+            if cached is not None:
+                logger.info("Answer cache hit")
+                return cached
+            
             # Get documents
-            docs = self.vectordb.as_retriever(search_kwargs={"k": 4}).get_relevant_documents(question)
+            trace = trace or self.retrieve(question, query_embedding)
+            formatted_prompt = self._build_comprehensive_prompt(trace)
             
-            # Build truncated context
-            context = truncate_documents(docs, max_context_tokens=2500)
+            # Send to LLM
+            started = time.perf_counter()
+            response = self.llm.invoke(formatted_prompt)
+            self._observe_llm(started, formatted_prompt, self._response_text(response), response)
+            answer = clean_repetitive_text(self._response_text(response))
             
-            # Use your existing prompt template but with truncated context
-            formatted_prompt = PROMPT_TEMPLATE.format(context=context, question=question)
+            # Get sources
+            sources = self._format_sources(trace)
             
-            # Check total token count
-            total_tokens = count_tokens(formatted_prompt)
-            logger.info(f"Total prompt tokens: {total_tokens}")
+            if query_embedding is not None:
+                self.answer_cache.put(query_embedding, answer, sources)
             
-            if total_tokens > 5500:  # Leave buffer for response
-                # Further truncate context if still too large
-                context = truncate_documents(docs, max_context_tokens=1500)
-                formatted_prompt = PROMPT_TEMPLATE.format(context=context, question=question)
+            return answer, sources
             
-            # Send to LLM
-            response = self.llm.invoke(formatted_prompt)
-            answer = response.content if hasattr(response, 'content') else str(response)
-            answer = clean_repetitive_text(answer)
+        except Exception as e:
+            logger.error(f"RAG processing failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"RAG processing failed: {str(e)}")
+    
+    async def _coalesced(self, mode, question, factory):
+        """Share one in-flight answer between identical concurrent questions"""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await factory()
+        return await self.in_flight.run((mode, normalize_query(question)), factory)
+    
+    async def aask_comprehensive_question(self, question, max_tokens=300, trace=None, prior_doc_ids=None):
+        """Async variant: embedding/search run in the CPU pool, the LLM call is awaited"""
+        if trace is not None:
+            return await self._aask_comprehensive_question(question, max_tokens, trace)
+        if prior_doc_ids:
+            # Conversation-specific retrieval: never share the answer with other callers
+            return await self._aask_comprehensive_question(question, max_tokens, prior_doc_ids=prior_doc_ids)
+        return await self._coalesced(
+            "comprehensive", question,
+            lambda: self._aask_comprehensive_question(question, max_tokens, prior_doc_ids=prior_doc_ids)
+        )
+    
+    async def _aask_comprehensive_question(self, question, max_tokens=300, trace=None, prior_doc_ids=None):
+        try:
+            query_embedding, cached = await run_in_cpu_pool(self._lookup_cached_answer, question, prior_doc_ids)
+            if cached is not None:
+                logger.info("Answer cache hit")
+                return cached
             
-            # Get sources
-            sources = []
-            for i, doc in enumerate(docs):
-                sources.append({
-                    "document": doc.metadata.get("source", f"Document {i+1}"),
-                    "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
-                    "score": doc.metadata.get("score")
-                })
+            trace = trace or await self.aretrieve(question, query_embedding, prior_doc_ids)
+            formatted_prompt = self._build_comprehensive_prompt(trace)
+            
+            started = time.perf_counter()
+            response = await self.llm.ainvoke(formatted_prompt)
+            self._observe_llm(started, formatted_prompt, self._response_text(response), response)
+            answer = clean_repetitive_text(self._response_text(response))
+            sources = self._format_sources(trace)
+            
+            if query_embedding is not None:
+                self.answer_cache.put(query_embedding, answer, sources)
             
             return answer, sources
             
@@ -135,53 +488,105 @@ class RAGEngine:
             logger.error(f"RAG processing failed: {str(e)}")
             raise HTTPException(status_code=500, detail=f"RAG processing failed: {str(e)}")
     
-    def ask_concise_question(self, question):
-        """Get concise, non-repetitive answer - EXACT MATCH TO COLAB"""
-        docs = self.vectordb.as_retriever(search_kwargs={"k": 4}).get_relevant_documents(question)
+    async def astream_comprehensive_question(self, question, prior_doc_ids=None):
+        """Stream a comprehensive answer as ("sources", list) followed by ("token", str) events"""
+        query_embedding, cached = await run_in_cpu_pool(self._lookup_cached_answer, question, prior_doc_ids)
+        if cached is not None:
+            logger.info("Answer cache hit")
+            answer, sources = cached
+            yield "sources", sources
+            yield "token", answer
+            return
         
-        context = ""
-        for i, doc in enumerate(docs):
-            if doc.page_content.strip():
-                context += f"Document {i+1}: {doc.page_content[:200]}\n\n"
+        trace = await self.aretrieve(question, query_embedding, prior_doc_ids)
+        sources = self._format_sources(trace)
+        yield "sources", sources
         
-        concise_prompt = f"""Answer this question using only the provided context. Be clear and concise. Do not repeat information.
-
-Context: {context}
-
-Question: {question}
-
-Concise Answer:"""
+        formatted_prompt = self._build_comprehensive_prompt(trace)
+        cleaner = StreamingTextCleaner()
+        started = time.perf_counter()
+        first_token_at = None
+        usage_chunk = None
+        async for chunk in self.llm.astream(formatted_prompt):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            if getattr(chunk, "usage_metadata", None):
+                usage_chunk = chunk
+            text = cleaner.feed(self._response_text(chunk))
+            if text:
+                yield "token", text
+            if cleaner.stopped:
+                # The model is repeating itself; stop paying for more tokens
+                break
         
-        try:
-            response = self.llm.invoke(concise_prompt)
-            return response.content if hasattr(response, 'content') else str(response)
-        except:
-            return self.llm(concise_prompt)
+        text = cleaner.finish()
+        self._observe_llm(started, formatted_prompt, cleaner.text, usage_chunk, first_token_at)
+        if text:
+            yield "token", text
+        
+        if query_embedding is not None:
+            self.answer_cache.put(query_embedding, cleaner.text, sources)
     
-    def debug_rag_response(self, question):
-        """Debug function to see what context is being retrieved - EXACT MATCH TO COLAB"""
-        logger.info(f"🔍 Question: {question}")
+    def ask_concise_question(self, question, trace=None):
+        """Get concise, non-repetitive answer - EXACT MATCH TO COLAB"""
+        trace = trace or self.retrieve(question)
+        concise_prompt = self._build_concise_prompt(trace)
         
-        docs = self.vectordb.as_retriever(search_kwargs={"k": 4}).get_relevant_documents(question)
-        logger.info(f"\n📚 Retrieved {len(docs)} documents")
+        try:
+            started = time.perf_counter()
+            response = self._concise_model(question).invoke(concise_prompt)
+            self._observe_llm(started, concise_prompt, self._response_text(response), response)
+            return self._response_text(response)
+        except Exception as e:
+            # The router has already failed over across backends; retrying it here would only repeat that
+            logger.error(f"Concise answer failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"RAG processing failed: {str(e)}")
+    
+    async def aask_concise_question(self, question, trace=None):
+        """Async variant of ask_concise_question"""
+        if trace is not None:
+            return await self._aask_concise_question(question, trace)
+        return await self._coalesced("concise", question, lambda: self._aask_concise_question(question))
+    
+    async def _aask_concise_question(self, question, trace=None):
+        trace = trace or await self.aretrieve(question)
+        concise_prompt = self._build_concise_prompt(trace)
         
-        context_preview = ""
-        for i, doc in enumerate(docs):
-            if doc.page_content.strip():
-                context_preview += f"Doc {i+1}: {doc.page_content[:100]}...\n"
+        try:
+            started = time.perf_counter()
+            response = await self._concise_model(question).ainvoke(concise_prompt)
+            self._observe_llm(started, concise_prompt, self._response_text(response), response)
+            return self._response_text(response)
+        except Exception as e:
+            # CancelledError is not an Exception, so a cancelled request stops here without another LLM call
+            logger.error(f"Concise answer failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"RAG processing failed: {str(e)}")
+    
+    def debug_rag_response(self, question, trace=None):
+        """Debug function to see what context is being retrieved - EXACT MATCH TO COLAB"""
+        trace = trace or self.retrieve(question)
+        self._log_debug_context(trace)
         
-        logger.info(f"\n📖 Context preview:\n{context_preview}")
+        formatted_prompt = self._build_comprehensive_prompt(trace)
+        started = time.perf_counter()
+        response = self.llm.invoke(formatted_prompt)
+        answer = self._response_text(response)
+        self._observe_llm(started, formatted_prompt, answer, response)
+        logger.info(f"\n🤖 Comprehensive Answer:\n{answer}")
+        return answer
+    
+    async def adebug_rag_response(self, question, trace=None):
+        """Async variant of debug_rag_response"""
+        trace = trace or await self.aretrieve(question)
+        self._log_debug_context(trace)
         
-        try:
-            result = self.qa.invoke({"query": question})
-            answer = result['result']
-            logger.info(f"\n🤖 Comprehensive Answer:\n{answer}")
-            return answer
-        except:
-            result = self.qa.invoke({"query": question})
-            answer = result['result']
-            logger.info(f"\n🤖 Comprehensive Answer:\n{answer}")
-            return answer
+        formatted_prompt = self._build_comprehensive_prompt(trace)
+        started = time.perf_counter()
+        response = await self.llm.ainvoke(formatted_prompt)
+        answer = self._response_text(response)
+        self._observe_llm(started, formatted_prompt, answer, response)
+        logger.info(f"\n🤖 Comprehensive Answer:\n{answer}")
+        return answer
 
 # Global RAG engine instance
 rag_engine = RAGEngine()
\ No newline at end of file
@@ -0,0 +1,68 @@
+# core/reranker.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class CrossEncoderReranker:
+    """Scores (question, chunk) pairs with a small CPU cross-encoder in one batch"""
+
+    def __init__(self, model_name, budget_ms=800, max_length=256, workers=2, model=None):
+        if model is None:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        self.model = model
+        self.budget_ms = budget_ms
+        # A few scoring threads so reranking never oversubscribes the CPU. A job that
+        # overruns the budget can't be cancelled once it runs, so while every thread is
+        # busy new requests skip reranking instead of queueing behind it
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rerank")
+        self._slots = threading.BoundedSemaphore(workers)
+
+        self.reranked = 0
+        self.fallbacks = 0
+        self.skipped = 0
+
+    def _score(self, question, texts):
+        try:
+            pairs = [(question, text) for text in texts]
+            return self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False, convert_to_numpy=True)
+        finally:
+            self._slots.release()
+
+    def rerank(self, question, texts, k):
+        """Return (indices, scores) of the top k texts, or None to keep the retrieval order.
+
+        None when the budget ran out, every worker is busy or scoring failed.
+        """
+        if not texts:
+            return [], []
+
+        if not self._slots.acquire(blocking=False):
+            self.skipped += 1
+            logger.debug("All rerank workers busy, keeping retrieval order")
+            return None
+
+        started = time.perf_counter()
+        future = self._executor.submit(self._score, question, texts)
+        try:
+            scores = future.result(timeout=self.budget_ms / 1000)
+        except TimeoutError:
+            # The job keeps running and frees its slot when done
+            self.fallbacks += 1
+            logger.warning(f"Rerank exceeded {self.budget_ms}ms budget, keeping retrieval order")
+            return None
+        except Exception as e:
+            self.fallbacks += 1
+            logger.error(f"Rerank failed, keeping retrieval order: {e}")
+            return None
+
+        order = np.argsort(-scores)[:k]
+        self.reranked += 1
+        logger.debug(f"Reranked {len(texts)} chunks in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return order.tolist(), [float(scores[i]) for i in order]
@@ -0,0 +1,30 @@
+# core/retrieval.py
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from langchain_core.documents import Document
+
+@dataclass
+class RetrievalTrace:
+    """Result of one retrieval pass, shared by the comprehensive, concise and debug modes"""
+    question: str
+    query_embedding: List[float]
+    docs: List[Document] = field(default_factory=list)
+    doc_ids: List[str] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)  # vector relevance, RRF or rerank score
+    reranked: bool = False
+    duplicates_dropped: int = 0
+    context: str = ""
+    context_tokens: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)  # milliseconds per stage
+
+    def to_dict(self):
+        """JSON-friendly summary for the debug endpoint and logs"""
+        return {
+            "doc_ids": self.doc_ids,
+            "scores": [round(score, 4) if score is not None else None for score in self.scores],
+            "timings_ms": {stage: round(ms, 2) for stage, ms in self.timings.items()},
+            "reranked": self.reranked,
+            "duplicates_dropped": self.duplicates_dropped,
+            "context_tokens": self.context_tokens
+        }
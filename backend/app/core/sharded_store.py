@@ -0,0 +1,121 @@
+# core/sharded_store.py
+"""Vector search partitioned across shard processes (VECTOR_STORE=sharded).
+
+Each shard is a Chroma DB of its own, served by `python -m app.sidecar --shard i`;
+queries fan out to every shard and the per-shard top-k are merged by heap.
+Shards are split out of DB_PATH with `python -m app.scripts.shard_index`.
+"""
+import heapq
+import logging
+import os
+import shutil
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.config.settings import settings
+from app.core.vector_store import get_across
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "current"
+
+def shard_socket_path(shard):
+    return settings.SHARD_SOCKET_PATH.format(shard=shard)
+
+def shard_of(chunk_id, shards):
+    """Stable shard assignment, so re-splitting keeps chunks where they were"""
+    return zlib.crc32(chunk_id.encode("utf-8")) % shards
+
+def read_shard_generation(root):
+    """Generation of the shard set currently published under root (0 if none)"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+def shard_db_path(root, generation, shard):
+    return os.path.join(root, f"gen-{generation}", f"shard-{shard}")
+
+def split_collection(collection, root, shards, collection_name, batch_size=5000):
+    """Copy a Chroma collection (with its embeddings) into a new generation of shard DBs.
+
+    Shard servers keep reading the previous generation until they are told to
+    reload, so the split never rewrites files that are being served.
+    """
+    import chromadb
+
+    generation = read_shard_generation(root) + 1
+    targets = []
+    for shard in range(shards):
+        path = shard_db_path(root, generation, shard)
+        shutil.rmtree(path, ignore_errors=True)
+        client = chromadb.PersistentClient(path=path)
+        targets.append(client.get_or_create_collection(
+            collection_name, embedding_function=None, metadata=collection.metadata
+        ))
+
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        batch = collection.get(include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+        assignment = np.array([shard_of(chunk_id, shards) for chunk_id in batch["ids"]])
+        for shard, target in enumerate(targets):
+            rows = np.flatnonzero(assignment == shard)
+            if not len(rows):
+                continue
+            target.add(
+                ids=[batch["ids"][i] for i in rows],
+                documents=[batch["documents"][i] for i in rows],
+                metadatas=[batch["metadatas"][i] for i in rows],
+                embeddings=np.asarray(batch["embeddings"], dtype=np.float32)[rows].tolist()
+            )
+        logger.info(f"Split {min(offset + batch_size, total)}/{total} chunks into {shards} shards")
+
+    path = os.path.join(root, CURRENT_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(generation))
+    os.replace(tmp_path, path)
+
+    # Keep the previous generation for servers that haven't reloaded yet
+    for name in os.listdir(root):
+        if name.startswith("gen-") and int(name[4:]) < generation - 1:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    logger.info(f"✅ Published shard generation {generation} ({shards} shards, {total} chunks)")
+    return generation
+
+class ShardedVectorStore:
+    """Vector-store backend that queries every shard process concurrently and merges by relevance"""
+
+    def __init__(self, socket_paths, timeout=10.0, fresh=False):
+        from app.sidecar.client import SidecarClient, SidecarVectorStore
+
+        self.shards = [SidecarVectorStore(SidecarClient(path, timeout=timeout)) for path in socket_paths]
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="shard-search")
+        if fresh:
+            self.reload()
+        logger.info(f"Sharded vector store over {len(self.shards)} shards")
+
+    def _map(self, fn):
+        return [future.result() for future in [self._executor.submit(fn, shard) for shard in self.shards]]
+
+    def search(self, query_embedding, k):
+        """Nearest chunks as [(id, Document, relevance)] across all shards, best first"""
+        query = np.asarray(query_embedding, dtype=np.float32).tolist()
+        hits = [hit for shard_hits in self._map(lambda shard: shard.search(query, k)) for hit in shard_hits]
+        return heapq.nlargest(k, hits, key=lambda hit: hit[2])
+
+    def count(self):
+        return sum(self._map(lambda shard: shard.count()))
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        return get_across(self.shards, ids=ids, include=include, limit=limit, offset=offset)
+
+    def reload(self):
+        """Have every shard pick up a newly published shard generation"""
+        return self._map(lambda shard: shard.reload())
+
+    def shard_stats(self):
+        return self._map(lambda shard: shard.client.stats())
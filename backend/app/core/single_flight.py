@@ -0,0 +1,56 @@
+# core/single_flight.py
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesces concurrent async calls with the same key into one execution.
+
+    The first caller (leader) starts the work as its own task; callers arriving
+    while it runs (followers) await the same task. Results and exceptions reach
+    every waiter. A waiter being cancelled only cancels the work when nobody
+    else is still waiting for it. Nothing is kept once the task finishes.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _finished(self, key, flight, task):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(self, key, factory):
+        """Await factory() for key, sharing an identical call already in flight"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+            self._flights[key] = flight
+            self.leaders += 1
+        else:
+            self.followers += 1
+
+        flight.waiters += 1
+        try:
+            # shield: one waiter's cancellation mustn't cancel the shared task for the others
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                logger.info("All waiters left, cancelling coalesced request")
+                flight.task.cancel()
+
+    def stats(self):
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers
+        }
@@ -0,0 +1,55 @@
+# core/startup.py
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class StartupState:
+    """Boot and warm-up progress for the probes, with a per-phase time profile.
+
+    The clock starts when this module is first imported (from app.main), so the
+    "boot" phase covers imports and app construction up to accepting traffic.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ready = False
+        self.error = None
+        self.phases = {}
+
+    def _elapsed_ms(self, since):
+        return round((time.perf_counter() - since) * 1000, 1)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a startup step into the profile"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self._elapsed_ms(started)
+
+    def mark_booted(self):
+        self.phases["boot"] = self._elapsed_ms(self.started)
+        logger.info(f"Accepting traffic after {self.phases['boot']:.0f}ms, warming up in the background")
+
+    def mark_ready(self):
+        self.phases["total"] = self._elapsed_ms(self.started)
+        self.ready = True
+        logger.info(f"✅ Ready after {self.phases['total']:.0f}ms: {self.phases}")
+
+    def mark_failed(self, error):
+        self.error = str(error)
+        logger.error(f"Warm-up failed after {self._elapsed_ms(self.started):.0f}ms: {self.error}")
+
+    def profile(self):
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "uptime_seconds": round(time.perf_counter() - self.started, 1),
+            "phases_ms": dict(self.phases)
+        }
+
+# Global startup state
+startup_state = StartupState()
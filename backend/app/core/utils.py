@@ -1,5 +1,7 @@
 import logging
 
+from app.core.context_packer import token_counter, pack_documents
+
 logger = logging.getLogger(__name__)
 
 def clean_repetitive_text(text):
@@ -22,24 +24,59 @@ def clean_repetitive_text(text):
     return '. '.join(cleaned_sentences) + ('.' if cleaned_sentences else '')
 
 def count_tokens(text):
-    """Estimate token count (rough approximation: ~4 chars per token)"""
-    return len(text) // 4
+    """Token count using the LLM's tokenizer (cached; ~4 chars/token if unavailable)"""
+    return token_counter.count(text)
 
 def truncate_documents(docs, max_context_tokens=2500):
-    """Truncate document content to fit within token limits"""
-    context = ""
-    current_tokens = 0
-    
-    for i, doc in enumerate(docs):
-        if doc.page_content.strip():
-            # Start with 200 chars per doc, adjust if needed
-            doc_content = doc.page_content[:200]
-            doc_tokens = count_tokens(doc_content)
-            
-            if current_tokens + doc_tokens > max_context_tokens:
+    """Pack ranked documents into the token budget, cutting at sentence boundaries"""
+    context, _ = pack_documents(docs, max_context_tokens)
+    return context
+
+
+class StreamingTextCleaner:
+    """Incremental clean_repetitive_text for streamed LLM output.
+
+    Text is released sentence by sentence as each '.' arrives; the concatenated
+    output equals clean_repetitive_text() applied to the full text.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._seen_sentences = set()
+        self._kept = 0
+        self.stopped = False
+        self.text = ""
+
+    def _accept(self, sentence):
+        sentence = sentence.strip()
+        if sentence and sentence not in self._seen_sentences:
+            self._seen_sentences.add(sentence)
+            cleaned = (" " if self._kept else "") + sentence + "."
+            self._kept += 1
+            return cleaned
+        elif self._kept > 5:
+            # Same cut-off as clean_repetitive_text: the model has started looping
+            self.stopped = True
+        return ""
+
+    def feed(self, chunk):
+        """Add a streamed chunk and return the newly cleaned text (may be empty)"""
+        if self.stopped or not chunk:
+            return ""
+
+        *complete, self._buffer = (self._buffer + chunk).split('.')
+        cleaned = ""
+        for sentence in complete:
+            cleaned += self._accept(sentence)
+            if self.stopped:
                 break
-                
-            context += f"Document {i+1}: {doc_content}\n\n"
-            current_tokens += doc_tokens
-    
-    return context.strip()
\ No newline at end of file
+
+        self.text += cleaned
+        return cleaned
+
+    def finish(self):
+        """Flush the trailing sentence once the stream has ended"""
+        cleaned = "" if self.stopped else self._accept(self._buffer)
+        self._buffer = ""
+        self.text += cleaned
+        return cleaned
@@ -0,0 +1,113 @@
+# core/vector_store.py
+import logging
+import math
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Distance -> relevance (higher is better), matching LangChain's Chroma conventions
+RELEVANCE_FUNCTIONS = {
+    "l2": lambda distance: 1.0 - distance / math.sqrt(2),
+    "cosine": lambda distance: 1.0 - distance,
+    "ip": lambda distance: 1.0 - distance if distance > 0 else -distance,
+}
+
+class ChromaVectorStore:
+    """Default backend: the Chroma collection at DB_PATH.
+
+    Backends expose search() plus Chroma's count()/get() shape, which is what the
+    engine and the BM25 builder rely on.
+    """
+
+    def __init__(self, path, collection_name, fresh=False):
+        import chromadb
+
+        if fresh:
+            # Chroma caches one client per path; drop it so a reload reads the updated segments
+            from chromadb.api.client import SharedSystemClient
+            SharedSystemClient.clear_system_cache()
+
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection(collection_name, embedding_function=None)
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        self.relevance = RELEVANCE_FUNCTIONS[space]
+
+    def count(self):
+        return self.collection.count()
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        return self.collection.get(ids=ids, include=list(include), limit=limit, offset=offset)
+
+    def search(self, query_embedding, k):
+        """Nearest chunks as [(id, Document, relevance)], best first"""
+        result = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            (doc_id, Document(page_content=text, metadata=metadata or {}), self.relevance(distance))
+            for doc_id, text, metadata, distance in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+def get_across(stores, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+    """Chroma-shaped get() over several stores: by ids, or by position in store order"""
+    include = list(include)
+    keys = ["ids"] + [key for key in ("documents", "metadatas", "embeddings") if key in include]
+    merged = {key: [] for key in keys}
+
+    if ids is not None:
+        parts = [store.get(ids=ids, include=include) for store in stores]
+    else:
+        parts = []
+        start = offset or 0
+        remaining = limit
+        for store in stores:
+            size = store.count()
+            if start >= size:
+                start -= size
+                continue
+            part = store.get(include=include, limit=remaining, offset=start)
+            parts.append(part)
+            start = 0
+            if remaining is not None:
+                remaining -= len(part["ids"])
+                if remaining <= 0:
+                    break
+
+    for part in parts:
+        for key in keys:
+            merged[key].extend(part[key])
+    if "embeddings" in merged:
+        merged["embeddings"] = np.asarray(merged["embeddings"], dtype=np.float32)
+    return merged
+
+def open_vector_store(fresh=False):
+    """Open the backend selected by VECTOR_STORE ("chroma", "hnsw", "domains" or "sharded")"""
+    if settings.VECTOR_STORE == "chroma":
+        return ChromaVectorStore(settings.DB_PATH, settings.COLLECTION_NAME, fresh=fresh)
+    if settings.VECTOR_STORE == "hnsw":
+        from app.core.hnsw_store import HnswVectorStore
+
+        return HnswVectorStore(settings.HNSW_INDEX_PATH, ef_search=settings.HNSW_EF_SEARCH)
+    if settings.VECTOR_STORE == "domains":
+        from app.core.domain_router import DomainRoutedStore
+
+        return DomainRoutedStore.open(
+            settings.DB_PATH, fresh=fresh,
+            top_domains=settings.DOMAIN_TOP_N, margin=settings.DOMAIN_SIMILARITY_MARGIN
+        )
+    if settings.VECTOR_STORE == "sharded":
+        from app.core.sharded_store import ShardedVectorStore, shard_socket_path
+
+        return ShardedVectorStore(
+            [shard_socket_path(shard) for shard in range(settings.SHARD_COUNT)],
+            timeout=settings.SIDECAR_TIMEOUT_SECONDS, fresh=fresh
+        )
+    raise ValueError(f"Unknown VECTOR_STORE: {settings.VECTOR_STORE}")
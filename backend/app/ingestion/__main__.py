@@ -0,0 +1,61 @@
+# ingestion/__main__.py
+"""Build or incrementally update the Chroma DB from a directory of documents.
+
+    python -m app.ingestion ./corpus --workers 8
+"""
+import argparse
+import logging
+
+from app.config.settings import settings
+from app.core.domain_router import domain_collection_name
+from app.ingestion.pipeline import IngestionPipeline
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest documents into the RAG vector DB")
+    parser.add_argument("source_dir", help="Directory containing the source documents")
+    parser.add_argument("--db-path", default=settings.DB_PATH, help="Chroma persist directory")
+    parser.add_argument("--collection", default=settings.COLLECTION_NAME, help="Chroma collection name")
+    parser.add_argument("--domain", help="Ingest into this domain's collection and refresh its routing centroid")
+    parser.add_argument("--workers", type=int, default=None, help="Chunking processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_BATCH_SIZE,
+                        help="Chunks per embed + upsert round")
+    parser.add_argument("--embed-batch-size", type=int, default=settings.INGEST_EMBED_BATCH_SIZE,
+                        help="Sentence-transformer batch size")
+    parser.add_argument("--chunk-size", type=int, default=settings.INGEST_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=settings.INGEST_CHUNK_OVERLAP)
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-embed everything")
+    parser.add_argument("--prune-unmanaged", action="store_true",
+                        help="Delete chunks not created by this pipeline (e.g. from a hand-built DB)")
+    parser.add_argument("--skip-bm25", action="store_true", help="Don't rebuild the BM25 index afterwards")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.domain:
+        args.collection = domain_collection_name(args.domain)
+
+    pipeline = IngestionPipeline(
+        args.source_dir,
+        db_path=args.db_path,
+        collection_name=args.collection,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        embed_batch_size=args.embed_batch_size,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        full=args.full
+    )
+    pipeline.run()
+    if args.prune_unmanaged:
+        pipeline.prune_unmanaged()
+
+    if not pipeline.changed:
+        return
+
+    if args.domain:
+        pipeline.update_domain_centroid(args.domain)
+    if settings.HYBRID_RETRIEVAL_ENABLED and not args.skip_bm25:
+        pipeline.rebuild_lexical_index()
+    pipeline.publish()
+
+if __name__ == "__main__":
+    main()
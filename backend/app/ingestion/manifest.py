@@ -0,0 +1,89 @@
+# ingestion/manifest.py
+import os
+import sqlite3
+import time
+
+from app.config.settings import settings
+
+MANIFEST_FILE = "ingest_manifest.sqlite3"
+GENERATION_FILE = "index_generation"
+
+def manifest_file(collection_name=None):
+    """One manifest per collection; the default collection keeps the original file name"""
+    if not collection_name or collection_name == settings.COLLECTION_NAME:
+        return MANIFEST_FILE
+    return f"ingest_manifest-{collection_name}.sqlite3"
+
+class IndexManifest:
+    """Content hashes of every indexed source and chunk, kept next to the Chroma DB"""
+
+    def __init__(self, db_path, collection_name=None):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(os.path.join(db_path, manifest_file(collection_name)), isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_by_source ON chunks (source);
+        """)
+
+    def source_hashes(self):
+        """{source: content_hash} for everything currently indexed"""
+        return dict(self.conn.execute("SELECT source, content_hash FROM sources"))
+
+    def chunk_ids(self, source):
+        return {row[0] for row in self.conn.execute("SELECT chunk_id FROM chunks WHERE source = ?", (source,))}
+
+    def all_chunk_ids(self):
+        return {row[0] for row in self.conn.execute("SELECT chunk_id FROM chunks")}
+
+    def record_source(self, source, content_hash, chunk_ids):
+        """Atomically replace the chunk list of one source"""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, source) VALUES (?, ?)",
+                ((chunk_id, source) for chunk_id in chunk_ids)
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources (source, content_hash, indexed_at) VALUES (?, ?, ?)",
+                (source, content_hash, time.time())
+            )
+
+    def remove_source(self, source):
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+
+    def reset(self):
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM chunks")
+            self.conn.execute("DELETE FROM sources")
+
+    def bump_generation(self):
+        """Publish a new index generation; running API workers poll this file to reload"""
+        path = os.path.join(self.db_path, GENERATION_FILE)
+        generation = read_generation(self.db_path) + 1
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(generation))
+        os.replace(tmp_path, path)
+        return generation
+
+def read_generation(db_path):
+    """Current index generation (0 if the DB was never built by the pipeline)"""
+    try:
+        with open(os.path.join(db_path, GENERATION_FILE)) as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
@@ -0,0 +1,321 @@
+# ingestion/pipeline.py
+import hashlib
+import io
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from app.config.settings import settings
+from app.ingestion.manifest import IndexManifest
+
+logger = logging.getLogger(__name__)
+
+# Per-process text splitter, created once by the pool initializer
+_splitter = None
+
+def _init_worker(chunk_size, chunk_overlap):
+    global _splitter
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    _splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+def iter_source_files(root, extensions):
+    """Yield matching files under root in a stable order without listing the whole tree up front"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(extensions):
+                yield os.path.join(dirpath, name)
+
+def decode_text(path, raw):
+    """Plain text for a source file's bytes (PDFs go through pypdf)"""
+    if path.lower().endswith(".pdf"):
+        from pypdf import PdfReader
+
+        return "\n".join(page.extract_text() or "" for page in PdfReader(io.BytesIO(raw)).pages)
+    return raw.decode("utf-8", errors="ignore")
+
+def chunk_ids_for(source, texts):
+    """Content-derived chunk ids: an unchanged chunk keeps its id when the file around it changes"""
+    ids = []
+    occurrences = {}
+    for text in texts:
+        digest = hashlib.sha1(f"{source}\0{text}".encode("utf-8")).hexdigest()
+        # Identical chunks inside one source still need distinct ids
+        seen = occurrences.get(digest, 0)
+        occurrences[digest] = seen + 1
+        ids.append(digest if not seen else f"{digest}-{seen}")
+    return ids
+
+def chunk_file(path, root, known_hash):
+    """Worker task: hash one file and, if it changed, split it into (id, text, metadata) chunks"""
+    source = os.path.relpath(path, root)
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    content_hash = hashlib.sha1(raw).hexdigest()
+    if content_hash == known_hash:
+        return source, content_hash, None
+
+    texts = _splitter.split_text(decode_text(path, raw))
+    chunks = [
+        (chunk_id, text, {"source": source, "chunk": index})
+        for index, (chunk_id, text) in enumerate(zip(chunk_ids_for(source, texts), texts))
+    ]
+    return source, content_hash, chunks
+
+class IngestionPipeline:
+    """Stream files -> chunk in a process pool -> batch-embed -> bulk upsert into Chroma.
+
+    A manifest of source and chunk hashes makes re-runs incremental: unchanged
+    files are skipped after hashing, only new chunks are embedded, and chunks of
+    edited or deleted sources are removed from the collection.
+    """
+
+    def __init__(self, source_dir, db_path=None, collection_name=None, workers=None,
+                 batch_size=None, embed_batch_size=None, chunk_size=None, chunk_overlap=None,
+                 full=False):
+        self.source_dir = os.path.abspath(source_dir)
+        self.db_path = db_path or settings.DB_PATH
+        self.collection_name = collection_name or settings.COLLECTION_NAME
+        self.workers = workers or os.cpu_count() or 2
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.embed_batch_size = embed_batch_size or settings.INGEST_EMBED_BATCH_SIZE
+        self.chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else settings.INGEST_CHUNK_OVERLAP
+        self.full = full
+
+        self.embedding = None
+        self.collection = None
+        self.manifest = None
+        self._max_batch = None
+
+        self.files_done = 0
+        self.files_unchanged = 0
+        self.files_deleted = 0
+        self.files_failed = 0
+        self.chunks_embedded = 0
+        self.chunks_deleted = 0
+        self._started = None
+
+    @property
+    def changed(self):
+        return bool(self.chunks_embedded or self.chunks_deleted)
+
+    def _open(self):
+        import chromadb
+        from app.core.embeddings import build_embeddings
+
+        os.makedirs(self.db_path, exist_ok=True)
+        self.embedding = build_embeddings(batch_size=self.embed_batch_size)
+        client = chromadb.PersistentClient(path=self.db_path)
+        if self.full:
+            self._drop_index(client)
+        self.collection = client.get_or_create_collection(self.collection_name, embedding_function=None)
+        # Chroma caps the records per call (method on newer clients, property on older ones)
+        get_max_batch_size = getattr(client, "get_max_batch_size", None)
+        self._max_batch = get_max_batch_size() if get_max_batch_size else getattr(client, "max_batch_size", 5000)
+
+        self.manifest = IndexManifest(self.db_path, self.collection_name)
+        if self.full:
+            self.manifest.reset()
+
+    def _drop_index(self, client):
+        """Full rebuild: start from an empty collection, manifest and BM25 index.
+
+        Resetting only the manifest would leave the chunks of edited and deleted
+        sources in the collection with nothing left to find them by.
+        """
+        try:
+            stale = client.get_collection(self.collection_name)
+        except Exception:
+            stale = None
+        if stale is not None:
+            self.chunks_deleted += stale.count()
+            client.delete_collection(self.collection_name)
+        shutil.rmtree(os.path.join(self.db_path, "bm25"), ignore_errors=True)
+        logger.info(f"Full rebuild: dropped collection {self.collection_name} ({self.chunks_deleted} chunks)")
+
+    def _delete_chunks(self, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), self._max_batch):
+            self.collection.delete(ids=ids[start:start + self._max_batch])
+        self.chunks_deleted += len(ids)
+
+    def _flush(self, buffer):
+        """Embed and upsert new chunks, drop stale ones, then record each source in the manifest"""
+        if not buffer:
+            return
+
+        new_chunks = [chunk for update in buffer for chunk in update["new"]]
+        if new_chunks:
+            ids = [chunk_id for chunk_id, _, _ in new_chunks]
+            texts = [text for _, text, _ in new_chunks]
+            metadatas = [metadata for _, _, metadata in new_chunks]
+            embeddings = self.embedding.embed_documents(texts)
+            for start in range(0, len(ids), self._max_batch):
+                end = start + self._max_batch
+                self.collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=embeddings[start:end],
+                    documents=texts[start:end],
+                    metadatas=metadatas[start:end]
+                )
+            self.chunks_embedded += len(new_chunks)
+
+        # Chunks that survived an edit keep their vectors; only their position metadata moves
+        kept_chunks = [chunk for update in buffer for chunk in update["kept"]]
+        for start in range(0, len(kept_chunks), self._max_batch):
+            batch = kept_chunks[start:start + self._max_batch]
+            self.collection.update(
+                ids=[chunk_id for chunk_id, _, _ in batch],
+                metadatas=[metadata for _, _, metadata in batch]
+            )
+
+        self._delete_chunks([chunk_id for update in buffer for chunk_id in update["removed"]])
+
+        for update in buffer:
+            self.manifest.record_source(update["source"], update["hash"], update["ids"])
+        self.files_done += len(buffer)
+
+        self._log_progress()
+        buffer.clear()
+
+    def _log_progress(self):
+        elapsed = time.perf_counter() - self._started
+        scanned = self.files_done + self.files_unchanged
+        logger.info(
+            f"📥 {scanned} documents scanned, {self.files_done} changed, "
+            f"{self.chunks_embedded} chunks embedded ({scanned / elapsed:.1f} docs/s)"
+        )
+
+    def _plan_update(self, source, content_hash, chunks):
+        """Split a changed source's chunks into new, kept and removed relative to the manifest"""
+        previous = self.manifest.chunk_ids(source)
+        current = {chunk_id for chunk_id, _, _ in chunks}
+        return {
+            "source": source,
+            "hash": content_hash,
+            "ids": [chunk_id for chunk_id, _, _ in chunks],
+            "new": [chunk for chunk in chunks if chunk[0] not in previous],
+            "kept": [chunk for chunk in chunks if chunk[0] in previous],
+            "removed": previous - current
+        }
+
+    def run(self):
+        """Bring the collection in line with source_dir, touching only what changed"""
+        self._open()
+        self._started = time.perf_counter()
+
+        known = self.manifest.source_hashes()
+        seen = set()
+        pending = iter_source_files(self.source_dir, settings.INGEST_EXTENSIONS)
+
+        buffer = []
+        buffered_chunks = 0
+        in_flight = {}
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.chunk_size, self.chunk_overlap)
+        ) as pool:
+            def submit_next():
+                path = next(pending, None)
+                if path is not None:
+                    source = os.path.relpath(path, self.source_dir)
+                    seen.add(source)
+                    in_flight[pool.submit(chunk_file, path, self.source_dir, known.get(source))] = path
+
+            # Keep a bounded number of files in flight so memory doesn't grow with the corpus
+            for _ in range(self.workers * 2):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        source, content_hash, chunks = future.result()
+                    except Exception as e:
+                        self.files_failed += 1
+                        logger.error(f"Failed to chunk {path}: {e}")
+                        continue
+
+                    if chunks is None:
+                        self.files_unchanged += 1
+                        continue
+                    update = self._plan_update(source, content_hash, chunks)
+                    buffer.append(update)
+                    # Kept chunks are held in the buffer too, so they count toward the bound
+                    buffered_chunks += len(update["new"]) + len(update["kept"])
+
+                if buffered_chunks >= self.batch_size:
+                    self._flush(buffer)
+                    buffered_chunks = 0
+
+        self._flush(buffer)
+
+        # Sources that disappeared from disk take their chunks with them
+        for source in set(known) - seen:
+            self._delete_chunks(self.manifest.chunk_ids(source))
+            self.manifest.remove_source(source)
+            self.files_deleted += 1
+
+        elapsed = time.perf_counter() - self._started
+        logger.info(
+            f"✅ Ingestion finished in {elapsed:.1f}s: {self.files_done} changed, "
+            f"{self.files_unchanged} unchanged, {self.files_deleted} deleted, {self.files_failed} failed; "
+            f"{self.chunks_embedded} chunks embedded, {self.chunks_deleted} deleted"
+        )
+        return {
+            "changed": self.files_done,
+            "unchanged": self.files_unchanged,
+            "deleted": self.files_deleted,
+            "failed": self.files_failed,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_deleted": self.chunks_deleted,
+            "seconds": round(elapsed, 2)
+        }
+
+    def prune_unmanaged(self):
+        """Delete chunks the manifest doesn't know about (e.g. from a hand-built DB)"""
+        managed = self.manifest.all_chunk_ids()
+        unmanaged = []
+        total = self.collection.count()
+        for offset in range(0, total, self._max_batch):
+            batch = self.collection.get(include=[], limit=self._max_batch, offset=offset)
+            unmanaged.extend(chunk_id for chunk_id in batch["ids"] if chunk_id not in managed)
+
+        self._delete_chunks(unmanaged)
+        logger.info(f"Pruned {len(unmanaged)} unmanaged chunks")
+
+    def rebuild_lexical_index(self):
+        """Refresh the BM25 index so API workers don't rebuild it on startup"""
+        from app.core.lexical_index import BM25Index
+
+        source = self.collection
+        if settings.VECTOR_STORE == "domains":
+            # The API serves every domain collection, so the lexical index spans them all
+            # (tagged by domain, so queries only see hits from the domains they route to)
+            from app.core.domain_router import DomainRoutedStore
+
+            source = DomainRoutedStore.open(self.db_path)
+        BM25Index.build(
+            source, os.path.join(self.db_path, "bm25"),
+            k1=settings.BM25_K1, b=settings.BM25_B
+        )
+
+    def update_domain_centroid(self, domain):
+        """Recompute this domain's centroid for the query router"""
+        from app.core.domain_router import update_centroids
+
+        update_centroids(self.db_path, {domain: self.collection})
+
+    def publish(self):
+        """Tell running API workers to pick up the new index"""
+        generation = self.manifest.bump_generation()
+        logger.info(f"Published index generation {generation}")
@@ -1,16 +1,21 @@
 # app/main.py
-from fastapi import FastAPI, Depends
+# Imported first so the startup profile's clock covers every import below
+from app.core.startup import startup_state
+
+from fastapi import FastAPI, Depends, Response
+import asyncio
 import uvicorn
 import logging
 
 from app.config.settings import settings
 from app.middleware.cors import add_cors_middleware
+from app.middleware.metrics import add_metrics_middleware
 from app.models.schemas import (
     ChatRequest, ChatResponse, GoogleTokenRequest, AuthResponse, UserInfo
 )
 from app.api.endpoints import (
     # Existing endpoints
-    health_check, chat, debug_question, concise_chat,
+    health_check, liveness_check, readiness_check, chat, chat_stream, debug_question, concise_chat,
     # New auth endpoints
     google_login, get_user_status, check_chat_limits, upgrade_placeholder,
     # New chat history endpoints
@@ -19,6 +24,8 @@ from app.api.endpoints import (
 from app.core.rag_engine import rag_engine
 from app.core.auth import get_current_user, check_chat_limit
 from app.core.firebase_service import firebase_service
+from app.core.concurrency import shutdown_pools, run_in_cpu_pool, run_in_io_pool, cpu_pool, io_pool
+from app.core import metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,25 +36,84 @@ app = FastAPI(title=settings.TITLE, version=settings.VERSION)
 
 # Add middleware
 add_cors_middleware(app)
+add_metrics_middleware(app)
+metrics.register_runtime_collector(rag_engine, {"cpu": cpu_pool, "io": io_pool})
 
 # Event handlers
 @app.on_event("startup")
 async def startup_event():
-    """Initialize RAG and Firebase on startup"""
-    # Initialize Firebase first
-    firebase_initialized = firebase_service.initialize()
+    """Initialize Firebase, then start serving; the RAG engine is initialized in the background"""
+    # Firebase is cheap to set up and the auth, limit and history routes have no readiness
+    # gate, so it must be initialized before the first request is accepted
+    with startup_state.phase("firebase"):
+        firebase_initialized = await run_in_io_pool(firebase_service.initialize)
     if not firebase_initialized:
         logger.warning("Firebase initialization failed - running without persistent storage")
-    
-    # Initialize RAG
-    rag_engine.initialize()
+    startup_state.mark_booted()
+    # Keep a reference so the task isn't garbage collected mid-warm-up
+    app.state.warm_up_task = asyncio.create_task(warm_up())
     logger.info("Application startup complete")
 
+async def warm_up():
+    """Initialize the RAG engine off the event loop, run a warm-up query, mark ready"""
+    try:
+        with startup_state.phase("rag_engine"):
+            await run_in_cpu_pool(rag_engine.initialize)
+        with startup_state.phase("warm_up_query"):
+            await run_in_cpu_pool(rag_engine.warm_up)
+    except Exception as e:
+        startup_state.mark_failed(e)
+        return
+    
+    startup_state.mark_ready()
+    
+    # Pick up incremental re-indexes published by the ingestion pipeline (referenced like warm_up_task)
+    app.state.index_watch_task = asyncio.create_task(watch_index_updates())
+
+async def watch_index_updates():
+    """Poll for a new index generation and reload the vector DB when one appears"""
+    while True:
+        await asyncio.sleep(settings.INDEX_REFRESH_INTERVAL_SECONDS)
+        try:
+            await run_in_cpu_pool(rag_engine.refresh_if_changed)
+        except Exception as e:
+            logger.error(f"Index refresh failed: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background tasks and embedding batcher, then release the worker thread pools"""
+    tasks = [getattr(app.state, name, None) for name in ("warm_up_task", "index_watch_task")]
+    tasks = [task for task in tasks if task is not None and not task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if rag_engine.embedding_batcher is not None:
+        rag_engine.embedding_batcher.close()
+    shutdown_pools()
+
 # Health Routes
 @app.get("/health")
 async def health_endpoint():
     return await health_check()
 
+@app.get("/health/live")
+async def liveness_endpoint():
+    return await liveness_check()
+
+@app.get("/health/ready")
+async def readiness_endpoint():
+    return await readiness_check()
+
+# Metrics Routes
+@app.get("/metrics")
+async def metrics_endpoint():
+    rendered = metrics.render()
+    if rendered is None:
+        return Response("Metrics disabled (set METRICS_ENABLED=true and install prometheus_client)\n",
+                        status_code=404, media_type="text/plain")
+    body, content_type = rendered
+    return Response(body, media_type=content_type)
+
 # Authentication Routes
 @app.post("/auth/google", response_model=AuthResponse)
 async def google_login_endpoint(request: GoogleTokenRequest):
@@ -70,6 +136,10 @@ async def upgrade_endpoint():
 async def chat_endpoint(request: ChatRequest, current_user: UserInfo = Depends(check_chat_limit)):
     return await chat(request, current_user)
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, current_user: UserInfo = Depends(check_chat_limit)):
+    return await chat_stream(request, current_user)
+
 @app.post("/debug")
 async def debug_endpoint(request: ChatRequest, current_user: UserInfo = Depends(get_current_user)):
     return await debug_question(request, current_user)
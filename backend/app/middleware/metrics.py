@@ -0,0 +1,18 @@
+from app.core.metrics import endpoint_label, track_request
+
+class MetricsMiddleware:
+    """Labels each request with its endpoint and tracks in-flight count and latency"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        # Plain ASGI (not BaseHTTPMiddleware) so streamed responses are timed until the last byte
+        with track_request(endpoint_label(scope["path"])):
+            await self.app(scope, receive, send)
+
+def add_metrics_middleware(app):
+    """Add the Prometheus metrics middleware to the FastAPI app"""
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,27 @@
+# scripts/chroma_to_hnsw.py
+"""Convert the Chroma DB into the mmap-friendly HNSW store (VECTOR_STORE=hnsw).
+
+    python -m app.scripts.chroma_to_hnsw --out ./hnsw_index
+"""
+import argparse
+import logging
+
+from app.config.settings import settings
+from app.core.hnsw_store import build_from_collection
+from app.core.vector_store import ChromaVectorStore
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the Chroma collection to an HNSW store")
+    parser.add_argument("--db-path", default=settings.DB_PATH)
+    parser.add_argument("--collection", default=settings.COLLECTION_NAME)
+    parser.add_argument("--out", default=settings.HNSW_INDEX_PATH)
+    parser.add_argument("--m", type=int, default=settings.HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=settings.HNSW_EF_CONSTRUCTION)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = ChromaVectorStore(args.db_path, args.collection)
+    build_from_collection(store.collection, args.out, m=args.m, ef_construction=args.ef_construction)
+
+if __name__ == "__main__":
+    main()
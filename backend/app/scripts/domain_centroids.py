@@ -0,0 +1,31 @@
+# scripts/domain_centroids.py
+"""Recompute the routing centroid of every domain collection (VECTOR_STORE=domains).
+
+    python -m app.scripts.domain_centroids
+"""
+import argparse
+import logging
+
+import chromadb
+
+from app.config.settings import settings
+from app.core.domain_router import update_centroids
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute domain centroids for query routing")
+    parser.add_argument("--db-path", default=settings.DB_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    client = chromadb.PersistentClient(path=args.db_path)
+    prefix = settings.DOMAIN_COLLECTION_PREFIX
+    collections = {}
+    for entry in client.list_collections():
+        # Newer clients return names, older ones Collection objects
+        name = entry if isinstance(entry, str) else entry.name
+        if name.startswith(prefix):
+            collections[name[len(prefix):]] = client.get_collection(name)
+    update_centroids(args.db_path, collections)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# scripts/onnx_embeddings.py
+"""Export the embedding model to ONNX (+ int8) and check it against PyTorch.
+
+    python -m app.scripts.onnx_embeddings export
+    python -m app.scripts.onnx_embeddings parity --backend onnx-int8 --samples 500
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from app.config.settings import settings
+from app.core.embeddings import ONNX_MODEL_FILE, ONNX_INT8_MODEL_FILE, build_embeddings
+
+logger = logging.getLogger(__name__)
+
+def export(model_dir, opset=17):
+    """Write model.onnx, model_int8.onnx and tokenizer.json into model_dir"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(settings.EMBEDDING_MODEL)
+    model = AutoModel.from_pretrained(settings.EMBEDDING_MODEL).eval()
+    tokenizer.save_pretrained(model_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+    dynamic_axes = {"input_ids": {0: "batch", 1: "sequence"}, "attention_mask": {0: "batch", 1: "sequence"},
+                    "last_hidden_state": {0: "batch", 1: "sequence"}}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    logger.info(f"Exported {fp32_path}")
+
+    int8_path = os.path.join(model_dir, ONNX_INT8_MODEL_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    logger.info(f"Quantized {int8_path}")
+
+def load_samples(limit):
+    """Chunk texts from the Chroma collection to compare on"""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=settings.DB_PATH)
+    collection = client.get_collection(settings.COLLECTION_NAME)
+    return [text for text in collection.get(include=["documents"], limit=limit)["documents"] if text]
+
+def timed_encode(embedding, texts):
+    started = time.perf_counter()
+    vectors = np.asarray(embedding.embed_documents(texts), dtype=np.float32)
+    return vectors, time.perf_counter() - started
+
+def parity(backend, samples, min_cosine):
+    """Cosine drift of an ONNX backend against the PyTorch embeddings; returns True if within bounds"""
+    texts = load_samples(samples)
+    reference, reference_seconds = timed_encode(build_embeddings("torch"), texts)
+    candidate, candidate_seconds = timed_encode(build_embeddings(backend), texts)
+
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate /= np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosine = (reference * candidate).sum(axis=1)
+
+    print(f"samples:         {len(texts)}")
+    print(f"cosine mean:     {cosine.mean():.5f}")
+    print(f"cosine p01:      {np.percentile(cosine, 1):.5f}")
+    print(f"cosine min:      {cosine.min():.5f}")
+    print(f"torch encode:    {reference_seconds:.2f}s")
+    print(f"{backend} encode: {candidate_seconds:.2f}s ({reference_seconds / candidate_seconds:.2f}x)")
+    return cosine.min() >= min_cosine
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX embedding backend tools")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subcommands.add_parser("export", help="Export the embedding model to ONNX and int8")
+    export_parser.add_argument("--model-dir", default=settings.ONNX_MODEL_DIR)
+
+    parity_parser = subcommands.add_parser("parity", help="Measure cosine drift against PyTorch")
+    parity_parser.add_argument("--backend", choices=["onnx", "onnx-int8"], default="onnx-int8")
+    parity_parser.add_argument("--samples", type=int, default=500)
+    parity_parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        export(args.model_dir)
+    elif not parity(args.backend, args.samples, args.min_cosine):
+        print(f"FAIL: minimum cosine below {args.min_cosine}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# scripts/shard_index.py
+"""Split the Chroma DB into shards for VECTOR_STORE=sharded.
+
+    python -m app.scripts.shard_index --shards 4
+    python -m app.sidecar --shards 4 &
+
+Re-run after each ingestion; running shard servers switch over on the next reload.
+"""
+import argparse
+import logging
+
+from app.config.settings import settings
+from app.core.sharded_store import split_collection
+from app.core.vector_store import ChromaVectorStore
+from app.ingestion.manifest import IndexManifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition the Chroma collection into shard DBs")
+    parser.add_argument("--db-path", default=settings.DB_PATH)
+    parser.add_argument("--collection", default=settings.COLLECTION_NAME)
+    parser.add_argument("--out", default=settings.SHARD_DB_PATH)
+    parser.add_argument("--shards", type=int, default=settings.SHARD_COUNT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = ChromaVectorStore(args.db_path, args.collection)
+    split_collection(store.collection, args.out, args.shards, args.collection)
+    # API workers watch the DB generation; bumping it makes them (and the shards) reload
+    IndexManifest(args.db_path).bump_generation()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# sidecar/__main__.py
+"""Run the shared embedding/search sidecar for the API workers on this host.
+
+    python -m app.sidecar &
+    SIDECAR_ENABLED=true uvicorn app.main:app --workers 8
+
+Or serve a sharded index (VECTOR_STORE=sharded), one process per shard:
+
+    python -m app.sidecar --shards 4 &
+"""
+import argparse
+import logging
+import multiprocessing
+
+from app.config.settings import settings
+from app.sidecar.server import SidecarServer
+
+def serve_shard(shard):
+    from app.core.sharded_store import shard_socket_path
+
+    logging.basicConfig(level=logging.INFO)
+    SidecarServer(shard_socket_path(shard), shard=shard).serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve embeddings and vector search over a Unix socket")
+    parser.add_argument("--socket", default=settings.SIDECAR_SOCKET_PATH, help="Unix socket path")
+    parser.add_argument("--shard", type=int, help="Serve only this index shard")
+    parser.add_argument("--shards", type=int, help="Start this many shard servers, one process each")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.shard is not None:
+        serve_shard(args.shard)
+    elif args.shards:
+        processes = [
+            multiprocessing.Process(target=serve_shard, args=(shard,), name=f"shard-{shard}")
+            for shard in range(args.shards)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        SidecarServer(args.socket).serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# sidecar/client.py
+import logging
+import socket
+import threading
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.sidecar import protocol
+
+logger = logging.getLogger(__name__)
+
+class SidecarClient:
+    """Thin client for the sidecar: one Unix socket per calling thread, reconnecting once if it was dropped"""
+
+    def __init__(self, socket_path, timeout=10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def _request(self, op, payload=b""):
+        for attempt in range(2):
+            try:
+                sock = getattr(self._local, "sock", None) or self._connect()
+                protocol.send_frame(sock, op, payload)
+                status, response = protocol.recv_frame(sock)
+                break
+            except (ConnectionError, FileNotFoundError) as e:
+                # The sidecar restarted (reset, broken pipe, socket file missing): reconnect once
+                self._close()
+                if attempt:
+                    raise protocol.SidecarError(f"Sidecar unavailable at {self.socket_path}: {e}") from e
+            except OSError as e:
+                # Timeouts included: the sidecar is slow, so sending the request again would only add load.
+                # A half-read stream can't be reused either way
+                self._close()
+                raise protocol.SidecarError(f"Sidecar request failed at {self.socket_path}: {e}") from e
+        if status == protocol.OP_ERROR:
+            raise protocol.SidecarError(response.decode("utf-8", errors="replace"))
+        return response
+
+    def encode(self, texts):
+        """Embed texts as a (len(texts), dim) float32 array"""
+        return protocol.unpack_vectors(self._request(protocol.OP_ENCODE, protocol.pack_texts(texts)))
+
+    def search(self, query_embedding, k):
+        payload = protocol.UINT32.pack(k) + protocol.pack_vectors(np.asarray(query_embedding, dtype=np.float32))
+        return protocol.unpack_json(self._request(protocol.OP_SEARCH, payload))
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        include = list(include)
+        payload = protocol.pack_json({"ids": ids, "include": include, "limit": limit, "offset": offset})
+        response = self._request(protocol.OP_GET, payload)
+        (length,) = protocol.UINT32.unpack_from(response)
+        end = protocol.UINT32.size + length
+        result = protocol.unpack_json(response[protocol.UINT32.size:end])
+        if "embeddings" in include:
+            result["embeddings"] = protocol.unpack_vectors(response, end)
+        return result
+
+    def count(self):
+        (count,) = protocol.UINT32.unpack(self._request(protocol.OP_COUNT))
+        return count
+
+    def reload(self):
+        return protocol.unpack_json(self._request(protocol.OP_RELOAD))["generation"]
+
+    def stats(self):
+        return protocol.unpack_json(self._request(protocol.OP_STATS))
+
+class SidecarEmbeddings(Embeddings):
+    """Embeddings computed by the sidecar's shared model"""
+
+    def __init__(self, client: SidecarClient):
+        self.client = client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.encode(list(texts)).tolist() if texts else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.encode([text])[0].tolist()
+
+class SidecarVectorStore:
+    """Vector-store backend (search/count/get) served by the sidecar"""
+
+    def __init__(self, client: SidecarClient):
+        self.client = client
+
+    def count(self):
+        return self.client.count()
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        return self.client.get(ids=ids, include=include, limit=limit, offset=offset)
+
+    def search(self, query_embedding, k):
+        """Nearest chunks as [(id, Document, relevance)], best first"""
+        return [
+            (doc_id, Document(page_content=text, metadata=metadata or {}), relevance)
+            for doc_id, text, metadata, relevance in self.client.search(query_embedding, k)
+        ]
+
+    def reload(self):
+        """Ask the sidecar to pick up a newly published index generation"""
+        return self.client.reload()
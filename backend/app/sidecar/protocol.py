@@ -0,0 +1,85 @@
+# sidecar/protocol.py
+"""Binary framing for the embedding/search sidecar.
+
+Every message is a 5-byte header (opcode: uint8, payload length: uint32,
+big-endian) followed by the payload. Texts travel as length-prefixed UTF-8,
+vectors as raw little-endian float32 rows; only document records use JSON.
+"""
+import json
+import struct
+
+import numpy as np
+
+HEADER = struct.Struct("!BI")
+UINT32 = struct.Struct("!I")
+
+# Requests
+OP_ENCODE = 1   # texts -> vectors
+OP_SEARCH = 2   # k + vector -> [[id, text, metadata, relevance], ...]
+OP_GET = 3      # JSON get() arguments -> JSON records (+ vectors)
+OP_COUNT = 4    # -> uint32
+OP_RELOAD = 5   # -> JSON {"generation": ...}
+OP_STATS = 6    # -> JSON stats
+
+# Responses
+OP_OK = 0
+OP_ERROR = 255
+
+class SidecarError(RuntimeError):
+    """The sidecar reported an error or the connection broke mid-request"""
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ConnectionError("Sidecar connection closed")
+        received += n
+    return bytes(buffer)
+
+def send_frame(sock, op, payload=b""):
+    sock.sendall(HEADER.pack(op, len(payload)) + payload)
+
+def recv_frame(sock):
+    """Read one (opcode, payload) frame; raises ConnectionError on EOF"""
+    op, length = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    return op, _recv_exact(sock, length) if length else b""
+
+def pack_texts(texts):
+    parts = [UINT32.pack(len(texts))]
+    for text in texts:
+        encoded = text.encode("utf-8")
+        parts.append(UINT32.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+def unpack_texts(payload):
+    (count,), offset = UINT32.unpack_from(payload), UINT32.size
+    texts = []
+    for _ in range(count):
+        (length,) = UINT32.unpack_from(payload, offset)
+        offset += UINT32.size
+        texts.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+    return texts
+
+def pack_vectors(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    rows, dim = vectors.shape if vectors.size else (0, 0)
+    return UINT32.pack(rows) + UINT32.pack(dim) + vectors.tobytes()
+
+def unpack_vectors(payload, offset=0):
+    (rows,) = UINT32.unpack_from(payload, offset)
+    (dim,) = UINT32.unpack_from(payload, offset + UINT32.size)
+    start = offset + 2 * UINT32.size
+    return np.frombuffer(payload, dtype="<f4", count=rows * dim, offset=start).reshape(rows, dim)
+
+def pack_json(value):
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+def unpack_json(payload):
+    return json.loads(payload.decode("utf-8"))
@@ -0,0 +1,172 @@
+# sidecar/server.py
+import logging
+import os
+import socketserver
+import threading
+
+import numpy as np
+
+from app.config.settings import settings
+from app.sidecar import protocol
+
+logger = logging.getLogger(__name__)
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    """Serves one API worker's connection until it closes"""
+
+    def handle(self):
+        sidecar = self.server.sidecar
+        while True:
+            try:
+                op, payload = protocol.recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                response = sidecar.dispatch(op, payload)
+                protocol.send_frame(self.request, protocol.OP_OK, response)
+            except (ConnectionError, BrokenPipeError):
+                return
+            except Exception as e:
+                logger.error(f"Sidecar request {op} failed: {e}")
+                protocol.send_frame(self.request, protocol.OP_ERROR, str(e).encode("utf-8"))
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class SidecarServer:
+    """Owns the embedding model and vector store for every API worker on the host.
+
+    Each worker connection gets a thread; encode requests from all of them go
+    through one MicroBatchingEmbeddings, so concurrent queries from different
+    workers share a forward pass.
+
+    With shard set, the process serves only that shard's slice of the index
+    (no embedding model); ShardedVectorStore fans queries out across them.
+    """
+
+    def __init__(self, socket_path, embedding=None, store=None, shard=None):
+        self.socket_path = socket_path
+        self.shard = shard
+        self._reload_lock = threading.Lock()
+        self.batcher = None
+
+        if embedding is None and shard is None:
+            from app.core.batching import MicroBatchingEmbeddings
+            from app.core.embeddings import build_embeddings
+
+            embedding = self.batcher = MicroBatchingEmbeddings(
+                build_embeddings(),
+                window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+                max_batch=settings.EMBEDDING_MAX_BATCH
+            )
+        self.embedding = embedding
+
+        self._owns_store = store is None
+        self.generation = None
+        self.store = store
+        if self._owns_store:
+            self._open_store(fresh=False)
+
+    def _read_generation(self):
+        if self.shard is not None:
+            from app.core.sharded_store import read_shard_generation
+
+            return read_shard_generation(settings.SHARD_DB_PATH)
+        from app.ingestion.manifest import read_generation
+
+        return read_generation(settings.DB_PATH)
+
+    def _open_store(self, fresh):
+        from app.core.vector_store import ChromaVectorStore, open_vector_store
+
+        self.generation = self._read_generation()
+        if self.shard is not None:
+            from app.core.sharded_store import shard_db_path
+
+            path = shard_db_path(settings.SHARD_DB_PATH, self.generation, self.shard)
+            self.store = ChromaVectorStore(path, settings.COLLECTION_NAME, fresh=fresh)
+            logger.info(f"✅ Shard {self.shard} ready with {self.store.count()} chunks (generation {self.generation})")
+            return
+        self.store = open_vector_store(fresh=fresh)
+        logger.info(f"✅ Sidecar vector store ready (generation {self.generation})")
+
+    def reload(self):
+        """Reopen the store if the ingestion pipeline (or shard split) published a new generation"""
+        if not self._owns_store:
+            return self.generation
+
+        with self._reload_lock:
+            if self._read_generation() != self.generation:
+                self._open_store(fresh=True)
+        return self.generation
+
+    def dispatch(self, op, payload):
+        if op == protocol.OP_ENCODE:
+            if self.embedding is None:
+                raise ValueError("This sidecar serves an index shard and has no embedding model")
+            texts = protocol.unpack_texts(payload)
+            if len(texts) == 1:
+                # Single queries go through embed_query so they get micro-batched
+                vectors = [self.embedding.embed_query(texts[0])]
+            else:
+                vectors = self.embedding.embed_documents(texts)
+            return protocol.pack_vectors(np.asarray(vectors, dtype=np.float32))
+
+        if op == protocol.OP_SEARCH:
+            (k,) = protocol.UINT32.unpack_from(payload)
+            query = protocol.unpack_vectors(payload, protocol.UINT32.size)[0]
+            hits = self.store.search(query.tolist(), k)
+            return protocol.pack_json([
+                [doc_id, doc.page_content, doc.metadata, relevance] for doc_id, doc, relevance in hits
+            ])
+
+        if op == protocol.OP_GET:
+            args = protocol.unpack_json(payload)
+            include = args.get("include") or []
+            result = self.store.get(ids=args.get("ids"), include=include,
+                                    limit=args.get("limit"), offset=args.get("offset"))
+            records = {key: result[key] for key in ("ids", "documents", "metadatas") if key in result}
+            body = protocol.pack_json(records)
+            response = protocol.UINT32.pack(len(body)) + body
+            if "embeddings" in include:
+                response += protocol.pack_vectors(np.asarray(result["embeddings"], dtype=np.float32))
+            return response
+
+        if op == protocol.OP_COUNT:
+            return protocol.UINT32.pack(self.store.count())
+
+        if op == protocol.OP_RELOAD:
+            return protocol.pack_json({"generation": self.reload()})
+
+        if op == protocol.OP_STATS:
+            return protocol.pack_json({
+                "generation": self.generation,
+                "count": self.store.count(),
+                "shard": self.shard,
+                "shards": self.store.shard_stats() if hasattr(self.store, "shard_stats") else None,
+                "embedding_batches": self.batcher.stats() if self.batcher else None
+            })
+
+        raise ValueError(f"Unknown sidecar opcode {op}")
+
+    def bind(self):
+        """Create the listening socket (replacing a stale one from a previous run)"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = _UnixServer(self.socket_path, _ConnectionHandler)
+        server.sidecar = self
+        # Only processes running as the same user may connect
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"✅ Sidecar listening on {self.socket_path}")
+        return server
+
+    def serve_forever(self):
+        server = self.bind()
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if self.batcher is not None:
+                self.batcher.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
@@ -0,0 +1,185 @@
+# benchmarks/fakes.py
+"""Deterministic stand-ins so the benchmarks run offline.
+
+FakeChatGroq and FakeFirebaseService mimic the parts of ChatGroq and
+firebase_service the app calls; FakeEmbeddings and FakeVectorStore replace the
+sentence-transformer and Chroma when --real-model / --real-store aren't given.
+"""
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+from langchain_core.documents import Document
+
+# A plausible answer with the kind of repetition clean_repetitive_text has to remove
+FAKE_ANSWER = (
+    "Solar energy is energy from the sun that is converted into thermal or electrical energy. "
+    "Photovoltaic panels convert sunlight directly into electricity using semiconductor cells. "
+    "Solar thermal systems use mirrors to concentrate sunlight and heat a fluid. "
+    "The amount of energy available depends on location, season and weather conditions. "
+) * 3
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+class FakeChatGroq:
+    """Returns a fixed answer after an optional simulated latency"""
+
+    def __init__(self, answer=FAKE_ANSWER, latency_ms=0.0, chunk_chars=16):
+        self.answer = answer
+        self.latency = latency_ms / 1000
+        self.chunk_chars = chunk_chars
+
+    def invoke(self, prompt):
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeMessage(self.answer)
+
+    async def ainvoke(self, prompt):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return FakeMessage(self.answer)
+
+    async def astream(self, prompt):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for start in range(0, len(self.answer), self.chunk_chars):
+            yield FakeMessage(self.answer[start:start + self.chunk_chars])
+
+    def __call__(self, prompt):
+        return self.invoke(prompt).content
+
+class FakeFirebaseService:
+    """In-memory Firestore replacement with the firebase_service interface"""
+
+    def __init__(self, latency_ms=0.0, chat_limit=10**9):
+        self.latency = latency_ms / 1000
+        self.chat_limit = chat_limit
+        self.initialized = True
+        self.users = {}
+        self.chat_counts = defaultdict(int)
+        self.messages = defaultdict(list)
+        self.owners = {}
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_user(self, google_id):
+        self._wait()
+        return self.users.get(google_id)
+
+    def create_or_update_user(self, user_info):
+        self._wait()
+        self.users[user_info.google_id] = user_info.dict()
+        return True
+
+    def get_user_chat_count(self, google_id):
+        self._wait()
+        return self.chat_counts[google_id]
+
+    def increment_chat_count(self, google_id):
+        self._wait()
+        self.chat_counts[google_id] += 1
+        return self.chat_counts[google_id]
+
+    def save_message(self, google_id, conversation_id, message_type, content, sources=None):
+        self._wait()
+        self.owners.setdefault(conversation_id, google_id)
+        self.messages[conversation_id].append({
+            "type": message_type,
+            "content": content,
+            "sources": sources or [],
+            "timestamp": datetime.utcnow()
+        })
+        return True
+
+    def get_user_conversations(self, google_id, limit=20):
+        self._wait()
+        return [{"conversation_id": conversation_id} for conversation_id in list(self.messages)[:limit]]
+
+    def get_conversation_messages(self, conversation_id, limit=50):
+        self._wait()
+        return self.messages[conversation_id][:limit]
+
+    def get_recent_conversation_messages(self, google_id, conversation_id, limit=50):
+        self._wait()
+        if self.owners.get(conversation_id, google_id) != google_id:
+            raise PermissionError(f"Conversation {conversation_id} does not belong to {google_id}")
+        return self.messages[conversation_id][-limit:]
+
+    def can_user_chat(self, google_id):
+        self._wait()
+        return self.chat_counts[google_id] < self.chat_limit
+
+    def get_remaining_chats(self, google_id):
+        self._wait()
+        return max(0, self.chat_limit - self.chat_counts[google_id])
+
+class FakeEmbeddings:
+    """Hash-seeded unit vectors: stable across runs, no model needed"""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def embed_query(self, text):
+        return self._vector(text).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text).tolist() for text in texts]
+
+def synthetic_corpus(size, seed=0, words_per_chunk=160):
+    """Chunks of pseudo-text drawn from a fixed vocabulary"""
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"term{i}" for i in range(5000)] + FAKE_ANSWER.split()
+    texts = []
+    for _ in range(size):
+        words = rng.choice(vocabulary, size=words_per_chunk)
+        texts.append(" ".join(words) + ".")
+    return texts
+
+class FakeVectorStore:
+    """Exact search over an in-memory matrix, with the vector-store interface"""
+
+    def __init__(self, texts, embedding, id_prefix="chunk"):
+        self.ids = [f"{id_prefix}-{i}" for i in range(len(texts))]
+        self.texts = texts
+        self.metadatas = [{"source": f"doc{i // 10}.txt", "chunk": i % 10} for i in range(len(texts))]
+        self.vectors = np.asarray(embedding.embed_documents(texts), dtype=np.float32)
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        if ids is not None:
+            positions = [self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions]
+        else:
+            start = offset or 0
+            positions = list(range(start, len(self.ids) if limit is None else min(len(self.ids), start + limit)))
+        result = {"ids": [self.ids[i] for i in positions]}
+        if "documents" in include:
+            result["documents"] = [self.texts[i] for i in positions]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[i] for i in positions]
+        if "embeddings" in include:
+            result["embeddings"] = self.vectors[positions]
+        return result
+
+    def search(self, query_embedding, k):
+        scores = self.vectors @ np.asarray(query_embedding, dtype=np.float32)
+        top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self.ids[i], Document(page_content=self.texts[i], metadata=self.metadatas[i]), float(scores[i]))
+            for i in top
+        ]
@@ -0,0 +1,92 @@
+# benchmarks/hnsw_vs_chroma.py
+"""Recall@k and search latency of the HNSW store against Chroma.
+
+Queries are stored chunk vectors (with a little noise so a chunk isn't trivially
+its own nearest neighbour); ground truth is an exact scan over all vectors.
+
+    cd backend && python -m benchmarks.hnsw_vs_chroma --queries 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.config.settings import settings
+from app.core.hnsw_store import HnswVectorStore
+from app.core.vector_store import ChromaVectorStore
+
+def exact_top_k(vectors, queries, k, space, block_size=20000):
+    """Labels of the exact k nearest vectors per query, best first.
+
+    vectors is scanned in blocks (it may be the float16 memmap), keeping a running
+    top k, so memory is queries x block_size rather than queries x N x dim.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    if space == "cosine":
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    best_labels = np.empty((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        if space == "l2":
+            # -||q - v||^2 up to the per-query constant ||q||^2
+            scores = 2 * queries @ block.T - (block * block).sum(axis=1)[None, :]
+        else:
+            if space == "cosine":
+                block = block / np.linalg.norm(block, axis=1, keepdims=True)
+            scores = queries @ block.T
+        labels = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        labels = np.concatenate([best_labels, labels], axis=1)
+        if scores.shape[1] > k:
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, keep, axis=1)
+            labels = np.take_along_axis(labels, keep, axis=1)
+        best_scores, best_labels = scores, labels
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_labels, order, axis=1)
+
+def measure(store, queries, k, truth_ids):
+    latencies = []
+    hits = 0
+    for query, truth in zip(queries, truth_ids):
+        started = time.perf_counter()
+        results = store.search(query.tolist(), k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len({doc_id for doc_id, _, _ in results} & truth)
+    latencies = np.asarray(latencies)
+    return {
+        "recall": hits / (len(queries) * k),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HNSW store and Chroma search")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_K)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chroma = ChromaVectorStore(settings.DB_PATH, settings.COLLECTION_NAME)
+    hnsw = HnswVectorStore(settings.HNSW_INDEX_PATH, ef_search=settings.HNSW_EF_SEARCH)
+
+    vectors = hnsw.vectors  # float16 memmap, scanned block by block
+    rng = np.random.default_rng(args.seed)
+    picks = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = np.asarray(vectors[picks], dtype=np.float32) + rng.normal(0, args.noise, size=(len(picks), vectors.shape[1])).astype(np.float32)
+
+    truth_ids = []
+    for start in range(0, len(queries), 64):
+        for row in exact_top_k(vectors, queries[start:start + 64], args.k, hnsw.meta["space"]):
+            truth_ids.append({hnsw.ids[label] for label in row})
+
+    print(f"{len(vectors)} chunks, {len(queries)} queries, k={args.k}, ef_search={settings.HNSW_EF_SEARCH}")
+    for name, store in (("chroma", chroma), ("hnsw", hnsw)):
+        result = measure(store, queries, args.k, truth_ids)
+        print(f"{name:>7}: recall@{args.k}={result['recall']:.4f}  "
+              f"p50={result['p50_ms']:.2f}ms  p95={result['p95_ms']:.2f}ms")
+
+if __name__ == "__main__":
+    main()
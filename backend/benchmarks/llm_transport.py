@@ -0,0 +1,81 @@
+# benchmarks/llm_transport.py
+"""Tail latency and error rate of LLM calls through the transport, against the stub server.
+
+    cd backend
+    python -m benchmarks.stub_llm_server --tail-rate 0.05 --rate-limit-rate 0.05 --error-rate 0.02 &
+    python -m benchmarks.llm_transport --requests 400 --concurrency 16
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+from app.core.llm_transport import AsyncRetryingTransport, RetryPolicy
+
+async def run(client, url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, json={
+                    "model": "stub", "messages": [{"role": "user", "content": f"question {i}"}]
+                })
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                failures += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, failures
+
+def report(name, latencies, failures, stats=None):
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        line = f"{name:>16}: p50={p50:.0f}ms p95={p95:.0f}ms p99={p99:.0f}ms"
+    else:
+        line = f"{name:>16}: no successful requests"
+    print(f"{line} failures={failures}" + (f" {stats}" if stats else ""))
+
+async def main_async(args):
+    url = f"{args.base_url}/openai/v1/chat/completions"
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    policy = RetryPolicy(max_retries=args.max_retries, deadline=args.deadline)
+
+    configurations = [
+        ("no retries", None),
+        ("retries", AsyncRetryingTransport(httpx.AsyncHTTPTransport(limits=limits), policy)),
+        ("retries+hedging", AsyncRetryingTransport(
+            httpx.AsyncHTTPTransport(limits=limits), policy, hedge=True,
+            hedge_delay=args.hedge_delay_ms / 1000
+        )),
+    ]
+    for name, transport in configurations:
+        client = httpx.AsyncClient(
+            transport=transport or httpx.AsyncHTTPTransport(limits=limits), timeout=args.deadline
+        )
+        async with client:
+            latencies, failures = await run(client, url, args.requests, args.concurrency)
+        report(name, latencies, failures, transport.stats.as_dict() if transport else None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LLM transport policies against the stub server")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8081")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--deadline", type=float, default=30.0)
+    parser.add_argument("--hedge-delay-ms", type=float, default=1500.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# benchmarks/stages.py
+"""Per-stage micro-benchmarks for the RAG pipeline and the /chat handler.
+
+Runs offline against a deterministic fake LLM, an in-memory Firestore and (by
+default) hash-seeded embeddings over a synthetic corpus, so timings reflect
+our own code rather than Groq or the network.
+
+    cd backend
+    python -m benchmarks.stages run --out benchmarks/results/baseline.json
+    python -m benchmarks.stages run --out benchmarks/results/current.json
+    python -m benchmarks.stages compare benchmarks/results/baseline.json benchmarks/results/current.json
+
+compare exits with status 1 if any stage's p50 regressed beyond --threshold.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.config.settings import settings
+from benchmarks.fakes import (
+    FAKE_ANSWER, FakeChatGroq, FakeEmbeddings, FakeFirebaseService, FakeVectorStore, synthetic_corpus
+)
+
+QUESTIONS = [
+    "What is solar energy?",
+    "How do photovoltaic panels convert sunlight into electricity?",
+    "Which factors affect how much solar energy a location receives?",
+    "What is the difference between solar thermal and photovoltaic systems?",
+    "How are mirrors used in concentrated solar power plants?",
+    "¿Qué es la energía solar y cómo se almacena?",
+    "Quels sont les avantages de l'énergie solaire ?",
+    "How efficient are modern semiconductor solar cells?",
+]
+
+def summarize(samples_ns):
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    return {
+        "iterations": len(samples),
+        "mean_ms": round(float(samples.mean()), 4),
+        "p50_ms": round(float(np.percentile(samples, 50)), 4),
+        "p95_ms": round(float(np.percentile(samples, 95)), 4),
+        "min_ms": round(float(samples.min()), 4),
+        "max_ms": round(float(samples.max()), 4)
+    }
+
+def measure(fn, iterations, warmup):
+    """Time fn(i) per call after a warm-up"""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter_ns()
+        fn(i)
+        samples.append(time.perf_counter_ns() - started)
+    return summarize(samples)
+
+async def ameasure(fn, iterations, warmup):
+    """Time await fn(i) per call after a warm-up"""
+    for i in range(warmup):
+        await fn(i)
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter_ns()
+        await fn(i)
+        samples.append(time.perf_counter_ns() - started)
+    return summarize(samples)
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def setup(args, workdir):
+    """Point the global engine and endpoint modules at the fakes"""
+    from app.api import endpoints
+    from app.core import auth
+    from app.core.context_compressor import ContextCompressor
+    from app.core.embedding_cache import CachedEmbeddings
+    from app.core.lexical_index import BM25Index
+    from app.core.rag_engine import rag_engine
+    from app.core.startup import startup_state
+
+    # Every iteration should do the full work, not hit the answer cache
+    settings.ANSWER_CACHE_ENABLED = False
+    # Pinned from the command line rather than the environment, so runs are comparable
+    settings.DIVERSITY_ENABLED = args.diversity
+    settings.COMPRESSION_ENABLED = args.compression
+
+    if args.real_model:
+        from app.core.embeddings import build_embeddings
+
+        base_embedding = build_embeddings()
+    else:
+        base_embedding = FakeEmbeddings()
+
+    if args.real_store:
+        from app.core.vector_store import open_vector_store
+
+        store = open_vector_store()
+    else:
+        store = FakeVectorStore(synthetic_corpus(args.corpus_size), FakeEmbeddings())
+
+    rag_engine.embedding = CachedEmbeddings(base_embedding, model_name="benchmark", max_entries=4096)
+    rag_engine.vectordb = store
+    rag_engine.llm = FakeChatGroq(latency_ms=args.llm_latency_ms)
+    rag_engine.reranker = None
+    rag_engine.compressor = None
+    if args.compression:
+        rag_engine.compressor = ContextCompressor(
+            rag_engine.embedding,
+            max_chunks=max(settings.SENTENCE_EMBEDDING_CACHE_SIZE, store.count()),
+            min_similarity=settings.COMPRESSION_MIN_SIMILARITY
+        )
+        # As at warm-up: sentence embeddings are not part of any timed stage
+        rag_engine.compressor.sentences.preload(store)
+    rag_engine.lexical_index = None
+    if settings.HYBRID_RETRIEVAL_ENABLED:
+        rag_engine.lexical_index = BM25Index.build(
+            store, os.path.join(workdir, "bm25"), k1=settings.BM25_K1, b=settings.BM25_B
+        )
+
+    firebase = FakeFirebaseService(latency_ms=args.firestore_latency_ms)
+    endpoints.firebase_service = firebase
+    auth.firebase_service = firebase
+    startup_state.ready = True
+    return rag_engine, base_embedding, firebase
+
+def run_benchmarks(args):
+    from app.api import endpoints
+    from app.core.concurrency import run_in_io_pool
+    from app.core.context_packer import pack_documents
+    from app.core.utils import clean_repetitive_text, truncate_documents
+    from app.models.schemas import ChatRequest, UserInfo
+
+    n, warmup = args.iterations, args.warmup
+    question = lambda i: QUESTIONS[i % len(QUESTIONS)]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine, base_embedding, firebase = setup(args, workdir)
+
+        # Precomputed inputs so each stage is timed in isolation
+        embeddings = [engine.embedding.embed_query(q) for q in QUESTIONS]
+        traces = [engine.retrieve(q, e) for q, e in zip(QUESTIONS, embeddings)]
+        budget = engine._context_budget(QUESTIONS[0])
+        trace = lambda i: traces[i % len(traces)]
+
+        results["embed"] = measure(lambda i: base_embedding.embed_query(f"{question(i)} #{i}"), n, warmup)
+        results["embed_cache_hit"] = measure(lambda i: engine.embedding.embed_query(question(i)), n, warmup)
+        results["vector_search"] = measure(
+            lambda i: engine._vector_search(embeddings[i % len(embeddings)], settings.HYBRID_CANDIDATES), n, warmup
+        )
+        if engine.lexical_index is not None:
+            results["lexical_search"] = measure(
+                lambda i: engine.lexical_index.search(question(i), k=settings.HYBRID_CANDIDATES), n, warmup
+            )
+        results["retrieve"] = measure(
+            lambda i: engine.retrieve(question(i), embeddings[i % len(embeddings)]), n, warmup
+        )
+        results["pack_documents"] = measure(lambda i: pack_documents(trace(i).docs, budget), n, warmup)
+        if engine.compressor is not None:
+            results["compress_context"] = measure(
+                lambda i: engine.compressor.pack(trace(i).docs, embeddings[i % len(embeddings)], budget), n, warmup
+            )
+        results["truncate_documents"] = measure(
+            lambda i: truncate_documents(trace(i).docs, settings.MAX_CONTEXT_TOKENS), n, warmup
+        )
+        results["prompt_format"] = measure(lambda i: engine._build_comprehensive_prompt(trace(i)), n, warmup)
+        results["clean_repetitive_text"] = measure(lambda i: clean_repetitive_text(FAKE_ANSWER), n, warmup)
+        results["format_sources"] = measure(lambda i: engine._format_sources(trace(i)), n, warmup)
+        results["ask_comprehensive_question"] = measure(
+            lambda i: engine.ask_comprehensive_question(question(i)), n, warmup
+        )
+
+        user = UserInfo(google_id="benchmark-user", email="bench@example.com", name="Benchmark")
+
+        async def firestore_save(i):
+            await run_in_io_pool(
+                firebase.save_message, google_id=user.google_id, conversation_id="bench",
+                message_type="user", content=question(i)
+            )
+
+        async def chat_handler(i):
+            await endpoints.chat(ChatRequest(message=question(i), conversation_id="bench"), user)
+
+        async def run_async():
+            results["firestore_save_message"] = await ameasure(firestore_save, n, warmup)
+            results["chat_handler"] = await ameasure(chat_handler, n, warmup)
+
+        asyncio.run(run_async())
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "iterations": n,
+            "warmup": warmup,
+            "corpus_size": None if args.real_store else args.corpus_size,
+            "real_model": args.real_model,
+            "real_store": args.real_store,
+            "diversity": args.diversity,
+            "compression": args.compression,
+            "hybrid": settings.HYBRID_RETRIEVAL_ENABLED,
+            "llm_latency_ms": args.llm_latency_ms,
+            "firestore_latency_ms": args.firestore_latency_ms
+        },
+        "stages": results
+    }
+
+def compare(baseline, current, threshold, metric="p50_ms", min_delta_ms=0.005):
+    """Stage-by-stage ratios; a stage regresses if it's slower by more than threshold (and min_delta_ms)"""
+    rows = []
+    for stage, new in current["stages"].items():
+        old = baseline["stages"].get(stage)
+        if old is None:
+            rows.append((stage, None, new[metric], None, False))
+            continue
+        ratio = new[metric] / old[metric] if old[metric] else float("inf")
+        regressed = ratio > 1 + threshold and new[metric] - old[metric] > min_delta_ms
+        rows.append((stage, old[metric], new[metric], ratio, regressed))
+    return rows
+
+def print_results(result):
+    print(f"{'stage':<28}{'p50 ms':>12}{'p95 ms':>12}{'mean ms':>12}")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<28}{stats['p50_ms']:>12.4f}{stats['p95_ms']:>12.4f}{stats['mean_ms']:>12.4f}")
+
+def print_comparison(rows):
+    print(f"{'stage':<28}{'baseline':>12}{'current':>12}{'ratio':>9}")
+    for stage, old, new, ratio, regressed in rows:
+        old_text = f"{old:.4f}" if old is not None else "-"
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "new"
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{stage:<28}{old_text:>12}{new:>12.4f}{ratio_text:>9}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage RAG micro-benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and write a JSON result")
+    run.add_argument("--out", help="Write results to this JSON file")
+    run.add_argument("--iterations", type=int, default=200)
+    run.add_argument("--warmup", type=int, default=20)
+    run.add_argument("--corpus-size", type=int, default=5000, help="Synthetic chunks in the fake vector store")
+    run.add_argument("--real-model", action="store_true", help="Use the configured embedding model")
+    run.add_argument("--real-store", action="store_true", help="Use the configured vector store")
+    run.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated LLM latency")
+    run.add_argument("--firestore-latency-ms", type=float, default=0.0, help="Simulated Firestore latency")
+    run.add_argument("--diversity", action=argparse.BooleanOptionalAction, default=True,
+                     help="Near-duplicate suppression + MMR in retrieve (default on)")
+    run.add_argument("--compression", action=argparse.BooleanOptionalAction, default=False,
+                     help="Extractive context compression, with sentence embeddings precomputed (default off)")
+
+    diff = commands.add_parser("compare", help="Compare two result files and flag regressions")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown (0.10 = 10%%)")
+    diff.add_argument("--metric", default="p50_ms", choices=["p50_ms", "p95_ms", "mean_ms", "min_ms"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == "run":
+        result = run_benchmarks(args)
+        print_results(result)
+        if args.out:
+            os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+            print(f"Results written to {args.out}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold, metric=args.metric)
+    print_comparison(rows)
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/stub_llm_server.py
+"""OpenAI/Groq-compatible chat completions stand-in with tunable latency and errors.
+
+    cd backend
+    python -m benchmarks.stub_llm_server --port 8081 --latency-ms 300 --tail-ms 3000 --tail-rate 0.05 \\
+        --rate-limit-rate 0.05 --error-rate 0.02
+    LLM_BASE_URL=http://127.0.0.1:8081 GROQ_API_KEY=stub uvicorn app.main:app
+
+Serves POST /openai/v1/chat/completions (the Groq SDK path) and
+/v1/chat/completions, streaming or not.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.fakes import FAKE_ANSWER
+
+def create_app(latency_ms=300.0, tail_ms=3000.0, tail_rate=0.0, rate_limit_rate=0.0,
+               error_rate=0.0, retry_after=1.0, seed=None):
+    app = FastAPI(title="Stub LLM")
+    rng = random.Random(seed)
+    app.state.counts = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    def completion_id():
+        return f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+    def usage(messages, answer):
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in messages) // 4
+        completion_tokens = len(answer) // 4
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.counts["requests"] += 1
+
+        roll = rng.random()
+        if roll < rate_limit_rate:
+            app.state.counts["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                status_code=429, headers={"retry-after": f"{retry_after:g}"}
+            )
+        if roll < rate_limit_rate + error_rate:
+            app.state.counts["errors"] += 1
+            return JSONResponse({"error": {"message": "Service unavailable"}}, status_code=503)
+
+        # Log-normal-ish body latency plus an occasional long tail
+        delay = latency_ms * rng.lognormvariate(0, 0.25)
+        if rng.random() < tail_rate:
+            delay += tail_ms
+        model = body.get("model", "stub")
+        created = int(time.time())
+        answer = FAKE_ANSWER
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay / 1000)
+            return {
+                "id": completion_id(),
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                             "finish_reason": "stop"}],
+                "usage": usage(body.get("messages", []), answer)
+            }
+
+        async def stream():
+            # Time to first token is the configured latency; the rest trickles out quickly
+            await asyncio.sleep(delay / 1000)
+            chunk_id = completion_id()
+            words = answer.split(" ")
+            for i in range(0, len(words), 4):
+                piece = " ".join(words[i:i + 4]) + " "
+                chunk = {"id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0.002)
+            final = {"id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                     "x_groq": {"usage": usage(body.get("messages", []), answer)}}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.counts
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Median response latency")
+    parser.add_argument("--tail-ms", type=float, default=3000.0, help="Extra latency on tail requests")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of requests that get the tail")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction answered with 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.tail_ms, args.tail_rate, args.rate_limit_rate,
+                     args.error_rate, args.retry_after, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+import pytest
+
+# Tests never download models; token budgets use the ~4 chars/token estimate
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("LLM_TOKENIZER", "tests/no-tokenizer.json")
+
+from benchmarks.fakes import FakeChatGroq, FakeEmbeddings, FakeVectorStore, synthetic_corpus
+
+@pytest.fixture
+def engine(monkeypatch):
+    """RAGEngine over the in-memory fakes (no model, Chroma or Groq)"""
+    from app.config.settings import settings
+    from app.core.rag_engine import RAGEngine
+
+    monkeypatch.setattr(settings, "ANSWER_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", True)
+    embedding = FakeEmbeddings()
+    rag = RAGEngine()
+    rag.embedding = embedding
+    rag.vectordb = FakeVectorStore(synthetic_corpus(200), embedding)
+    rag.llm = rag.concise_llm = FakeChatGroq()
+    return rag
+
+class RunningSidecar:
+    """A sidecar served from a thread; stop() drops its connections like a process exit"""
+
+    def __init__(self, socket_path, store, embedding):
+        from app.sidecar.server import SidecarServer
+
+        self.socket_path = socket_path
+        self.server = SidecarServer(socket_path, embedding=embedding, store=store).bind()
+        self.connections = []
+        self.stopped = False
+        process_request = self.server.process_request
+
+        def track(request, client_address):
+            self.connections.append(request)
+            process_request(request, client_address)
+
+        self.server.process_request = track
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        self.server.shutdown()
+        self.server.server_close()
+        for connection in self.connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+@pytest.fixture
+def socket_dir():
+    # Unix socket paths are limited to ~100 bytes, so not under pytest's tmp_path
+    directory = tempfile.mkdtemp(prefix="sidecar")
+    yield directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+@pytest.fixture
+def start_sidecar(socket_dir):
+    """start_sidecar(store, name) serves store over a Unix socket in socket_dir"""
+    running = []
+
+    def start(store, embedding, name="sidecar"):
+        sidecar = RunningSidecar(os.path.join(socket_dir, f"{name}.sock"), store, embedding)
+        running.append(sidecar)
+        return sidecar
+
+    yield start
+    for sidecar in running:
+        sidecar.stop()
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from app.core.answer_cache import SemanticAnswerCache
+
+def unit(*values):
+    return np.asarray(values, dtype=np.float32)
+
+def test_similar_question_hits_and_different_one_misses():
+    cache = SemanticAnswerCache(similarity_threshold=0.95)
+    cache.put(unit(1, 0, 0), "solar", [{"source": "a.txt"}])
+
+    assert cache.get(unit(0.99, 0.05, 0)) == ("solar", [{"source": "a.txt"}])
+    assert cache.get(unit(0, 1, 0)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_returned_sources_are_copies():
+    cache = SemanticAnswerCache()
+    cache.put(unit(1, 0), "solar", [{"source": "a.txt"}])
+    _, sources = cache.get(unit(1, 0))
+    sources[0]["source"] = "changed"
+    assert cache.get(unit(1, 0))[1] == [{"source": "a.txt"}]
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.put(unit(1, 0, 0), "a", [])
+    cache.put(unit(0, 1, 0), "b", [])
+    cache.get(unit(1, 0, 0))
+    cache.put(unit(0, 0, 1), "c", [])
+
+    assert cache.get(unit(0, 1, 0)) is None
+    assert cache.get(unit(1, 0, 0))[0] == "a"
+    assert cache.stats()["evictions"] == 1
+
+def test_expired_entries_miss_and_free_their_slot():
+    cache = SemanticAnswerCache(ttl_seconds=0.01)
+    cache.put(unit(1, 0), "a", [])
+    time.sleep(0.02)
+    assert cache.get(unit(1, 0)) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+def test_clear_drops_everything():
+    cache = SemanticAnswerCache()
+    cache.put(unit(1, 0), "a", [])
+    cache.clear()
+    assert cache.get(unit(1, 0)) is None
+    cache.put(unit(0, 1), "b", [])
+    assert cache.get(unit(0, 1))[0] == "b"
@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.batching import MicroBatchingEmbeddings
+from benchmarks.fakes import FakeEmbeddings
+
+class RecordingEmbeddings(FakeEmbeddings):
+    """Records each embed_documents batch; can be made slow or failing"""
+
+    def __init__(self, delay=0.0, error=None):
+        super().__init__(dim=8)
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.threads = set()
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return super().embed_documents(texts)
+
+def embed_concurrently(batcher, texts):
+    barrier = threading.Barrier(len(texts))
+
+    def embed(text):
+        barrier.wait()
+        return batcher.embed_query(text)
+
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        return list(pool.map(embed, texts))
+
+def test_concurrent_queries_share_one_batch_on_the_dispatcher_thread():
+    model = RecordingEmbeddings()
+    batcher = MicroBatchingEmbeddings(model, window_ms=200, max_batch=8)
+    texts = [f"query {i}" for i in range(8)]
+
+    vectors = embed_concurrently(batcher, texts)
+    assert vectors == FakeEmbeddings(dim=8).embed_documents(texts)
+    assert len(model.calls) == 1 and sorted(model.calls[0]) == sorted(texts)
+    assert model.threads == {"embedding-batcher"}
+    assert batcher.stats()["batch_sizes"] == {8: 1}
+    batcher.close()
+
+def test_queries_after_the_window_go_in_the_next_batch():
+    model = RecordingEmbeddings()
+    batcher = MicroBatchingEmbeddings(model, window_ms=5)
+    batcher.embed_query("first")
+    time.sleep(0.05)
+    batcher.embed_query("second")
+    assert model.calls == [["first"], ["second"]]
+    batcher.close()
+
+def test_max_batch_caps_a_batch():
+    model = RecordingEmbeddings()
+    batcher = MicroBatchingEmbeddings(model, window_ms=200, max_batch=3)
+    embed_concurrently(batcher, [f"query {i}" for i in range(6)])
+    assert all(len(batch) <= 3 for batch in model.calls)
+    assert batcher.stats()["queries"] == 6
+    batcher.close()
+
+def test_encoder_error_reaches_every_caller_and_the_batcher_keeps_running():
+    model = RecordingEmbeddings(error=RuntimeError("model crashed"))
+    batcher = MicroBatchingEmbeddings(model, window_ms=200, max_batch=4)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(batcher.embed_query, f"query {i}") for i in range(4)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model crashed"):
+                future.result()
+
+    model.error = None
+    assert batcher.embed_query("after") == FakeEmbeddings(dim=8).embed_query("after")
+    batcher.close()
+
+def test_close_finishes_queued_queries_then_stops():
+    model = RecordingEmbeddings(delay=0.05)
+    batcher = MicroBatchingEmbeddings(model, window_ms=1, max_batch=1)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(batcher.embed_query, f"query {i}") for i in range(3)]
+        while len(model.calls) + batcher.stats()["queued"] < 3:
+            time.sleep(0.001)
+        batcher.close()
+        assert all(len(future.result()) == 8 for future in futures)
+
+    assert not batcher._dispatcher.is_alive()
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.embed_query("late")
+    batcher.close()  # idempotent
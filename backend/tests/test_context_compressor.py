@@ -0,0 +1,45 @@
+from langchain_core.documents import Document
+
+from app.core.context_compressor import ContextCompressor, SentenceEmbeddingCache
+from benchmarks.fakes import FakeEmbeddings, FakeVectorStore, synthetic_corpus
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(dim=16)
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+def test_preload_leaves_nothing_to_embed_on_the_request_path():
+    corpus = synthetic_corpus(30, words_per_chunk=20)
+    embedding = CountingEmbeddings()
+    store = FakeVectorStore(corpus, embedding)
+    compressor = ContextCompressor(embedding, max_chunks=100)
+
+    assert compressor.sentences.preload(store, batch_size=7) == 30
+    embedding.embedded = 0
+    docs = [Document(page_content=text) for text in corpus[:5]]
+    compressor.pack(docs, embedding.embed_query("term1 term2"), max_context_tokens=200)
+
+    assert embedding.embedded == 0
+    assert compressor.stats() == {"chunks": 30, "hits": 5, "misses": 0}
+
+def test_preload_stops_at_the_cache_size():
+    corpus = synthetic_corpus(30, words_per_chunk=20)
+    embedding = CountingEmbeddings()
+    cache = SentenceEmbeddingCache(embedding, max_chunks=10)
+    assert cache.preload(FakeVectorStore(corpus, embedding)) == 10
+    assert cache.stats()["chunks"] == 10
+
+def test_pack_keeps_document_order_within_the_budget():
+    embedding = FakeEmbeddings(dim=16)
+    compressor = ContextCompressor(embedding)
+    docs = [Document(page_content="Solar panels convert light. Wind turns turbines."),
+            Document(page_content="Hydro uses rivers.")]
+    context, tokens = compressor.pack(docs, embedding.embed_query("Hydro uses rivers."), max_context_tokens=1000)
+
+    assert context.index("Document 1:") < context.index("Document 2:")
+    assert "Hydro uses rivers." in context
+    assert 0 < tokens <= 1000
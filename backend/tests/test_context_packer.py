@@ -0,0 +1,34 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.core.context_packer import TokenCounter, pack_documents, split_sentences
+
+def test_split_sentences_handles_devanagari_and_cjk():
+    assert split_sentences("One. Two! तीन। 四。 Five") == ["One.", "Two!", "तीन।", "四。", "Five"]
+
+def test_missing_tokenizer_falls_back_to_estimate():
+    counter = TokenCounter("/nonexistent/tokenizer.json")
+    assert counter.exact is False
+    assert counter.count("abcdefgh") == 2
+
+def test_local_tokenizer_file_is_loaded(tmp_path):
+    tokenizers = pytest.importorskip("tokenizers")
+    from tokenizers.models import WordLevel
+    from tokenizers.pre_tokenizers import Whitespace
+
+    tokenizer = tokenizers.Tokenizer(WordLevel({"solar": 0, "energy": 1, "[UNK]": 2}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    path = tmp_path / "tokenizer.json"
+    tokenizer.save(str(path))
+
+    counter = TokenCounter(str(path))
+    assert counter.exact is True
+    assert counter.count("solar energy storage") == 3
+
+def test_pack_documents_cuts_at_sentence_boundary():
+    counter = TokenCounter("/nonexistent/tokenizer.json")
+    docs = [Document(page_content="A" * 40), Document(page_content="First sentence here. " + "B" * 400)]
+    context, used = pack_documents(docs, 30, counter=counter)
+    assert context.startswith("Document 1: " + "A" * 40)
+    assert "First sentence here." in context and "B" not in context
+    assert used <= 30
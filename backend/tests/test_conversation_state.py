@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.core.conversation_state import ConversationStateCache, condense_question, is_follow_up
+
+def messages(count):
+    return [
+        {"type": "user", "content": f"question {i} about solar panels"} if i % 2 == 0
+        else {"type": "bot", "content": f"answer {i}", "sources": [{"id": f"chunk-{i}"}]}
+        for i in range(count)
+    ]
+
+class FakeLLM:
+    def __init__(self, answer=None, error=None):
+        self.answer = answer
+        self.error = error
+
+    async def ainvoke(self, prompt):
+        if self.error:
+            raise self.error
+        return type("Message", (), {"content": self.answer})()
+
+def test_state_is_loaded_once_then_served_from_cache():
+    cache = ConversationStateCache(max_turns=4)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return messages(8)
+
+    async def run():
+        await cache.aget("c1", "user-a", load)
+        return await cache.aget("c1", "user-a", load)
+
+    state = asyncio.run(run())
+    assert len(loads) == 1
+    assert [content for _, content in state.turns] == [
+        "question 4 about solar panels", "answer 5", "question 6 about solar panels", "answer 7"
+    ]
+    assert state.summary == "question 0 about solar panels; question 2 about solar panels"
+    assert state.last_doc_ids == ["chunk-7"]
+
+def test_cached_state_is_not_served_to_another_user():
+    cache = ConversationStateCache()
+    cache.new("c1", "user-a")
+
+    async def load():
+        return []
+
+    with pytest.raises(PermissionError):
+        asyncio.run(cache.aget("c1", "user-b", load))
+
+def test_expired_state_is_reloaded():
+    cache = ConversationStateCache(ttl_seconds=0)
+    cache.new("c1", "user-a")
+
+    async def load():
+        return messages(2)
+
+    state = asyncio.run(cache.aget("c1", "user-a", load))
+    assert len(state.turns) == 2
+
+def test_record_turn_updates_turns_and_doc_ids():
+    cache = ConversationStateCache(max_turns=4)
+    state = cache.new("c1", "user-a")
+    cache.record_turn("c1", "What is solar energy?", "Energy from the sun", ["chunk-1", None])
+    assert list(state.turns) == [("user", "What is solar energy?"), ("assistant", "Energy from the sun")]
+    assert state.last_doc_ids == ["chunk-1"]
+
+def test_lru_bound():
+    cache = ConversationStateCache(max_conversations=2)
+    for conversation_id in ("c1", "c2", "c3"):
+        cache.new(conversation_id, "user-a")
+    assert cache.stats()["conversations"] == 2
+
+def test_follow_up_detection():
+    cache = ConversationStateCache()
+    state = cache.new("c1", "user-a")
+    assert not is_follow_up("what about its cost?", state)  # nothing to follow up on yet
+    cache.record_turn("c1", "How do solar panels work?", "They convert light", [])
+    assert is_follow_up("what about its cost?", state)
+    assert not is_follow_up("Explain photosynthesis in plants in detail", state)
+
+def test_condense_uses_llm_and_falls_back_to_previous_question():
+    cache = ConversationStateCache()
+    state = cache.new("c1", "user-a")
+    cache.record_turn("c1", "How do solar panels work?", "They convert light", [])
+
+    condensed = asyncio.run(condense_question("what about its cost?", state, FakeLLM('"How much do solar panels cost?"')))
+    assert condensed == "How much do solar panels cost?"
+    fallback = asyncio.run(condense_question("what about its cost?", state, FakeLLM(error=RuntimeError("down"))))
+    assert fallback == "How do solar panels work? what about its cost?"
+    standalone = asyncio.run(condense_question("Explain photosynthesis in plants in detail", state, FakeLLM("x")))
+    assert standalone == "Explain photosynthesis in plants in detail"
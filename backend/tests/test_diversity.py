@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.core.diversity import hamming_distances, mmr, simhash, suppress_near_duplicates
+from benchmarks.fakes import synthetic_corpus
+
+def test_simhash_is_stable_and_close_for_near_duplicates():
+    text = synthetic_corpus(1)[0]
+    near = text + " extra"
+    other = synthetic_corpus(2, seed=1)[1]
+
+    assert simhash(text) == simhash(text)
+    assert hamming_distances(simhash(text), [simhash(near)])[0] <= 3
+    assert hamming_distances(simhash(text), [simhash(other)])[0] > 10
+
+def test_hamming_distances():
+    assert hamming_distances(0b1011, [0b1011, 0b0011, 0]).tolist() == [0, 1, 3]
+    assert hamming_distances(2**64 - 1, [0]).tolist() == [64]
+
+def test_suppress_near_duplicates_keeps_the_first_copy():
+    a, b = synthetic_corpus(2)
+    assert suppress_near_duplicates([a, b, a + " again", b]) == [0, 1]
+
+def test_mmr_trades_relevance_for_novelty():
+    embeddings = np.array([[1, 0], [0.99, 0.01], [0, 1]], dtype=np.float32)
+    relevance = [1.0, 0.95, 0.5]
+
+    assert mmr(embeddings, relevance, k=2, lambda_mult=1.0) == [0, 1]
+    assert mmr(embeddings, relevance, k=2, lambda_mult=0.5) == [0, 2]
+    assert sorted(mmr(embeddings, relevance, k=5)) == [0, 1, 2]  # k is capped at the candidates
+
+def test_mmr_with_equal_relevance():
+    embeddings = np.eye(3, dtype=np.float32)
+    assert sorted(mmr(embeddings, [0.3, 0.3, 0.3], k=3)) == [0, 1, 2]
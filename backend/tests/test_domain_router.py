@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from app.core.domain_router import DomainRoutedStore, compute_centroid
+from app.core.lexical_index import BM25Index
+from benchmarks.fakes import FakeEmbeddings, FakeVectorStore
+
+EMBEDDING = FakeEmbeddings(dim=32)
+ENERGY = [f"Solar panel {i} converts sunlight into electricity." for i in range(20)]
+MEDICINE = [f"Patient {i} received insulin for diabetes and solar burns." for i in range(20)]
+
+def domain_store(**kwargs):
+    stores = {
+        "energy": FakeVectorStore(ENERGY, EMBEDDING, id_prefix="energy"),
+        "medicine": FakeVectorStore(MEDICINE, EMBEDDING, id_prefix="medicine"),
+    }
+    centroids = {domain: compute_centroid(store)[0] for domain, store in stores.items()}
+    return DomainRoutedStore(stores, centroids, **kwargs)
+
+def test_compute_centroid_is_normalized():
+    centroid, count = compute_centroid(FakeVectorStore(ENERGY, EMBEDDING))
+    assert count == len(ENERGY)
+    assert np.linalg.norm(centroid) == pytest.approx(1.0)
+
+def test_route_picks_the_closest_domain_within_the_margin():
+    store = domain_store(top_domains=2, margin=0.0)
+    assert store.route(store.centroids[0]) == ["energy"]
+    assert store.route(store.centroids[1]) == ["medicine"]
+
+    between = store.centroids[0] + store.centroids[1]
+    assert sorted(domain_store(top_domains=2, margin=0.05).route(between)) == ["energy", "medicine"]
+    assert len(domain_store(top_domains=1, margin=1.0).route(between)) == 1
+
+def test_search_merges_routed_domains_by_relevance():
+    store = domain_store(top_domains=2, margin=2.0)  # both domains searched
+    query = EMBEDDING.embed_query(MEDICINE[3])
+    hits = store.search(query, 5)
+
+    assert hits[0][0] == "medicine-3"
+    assert [score for _, _, score in hits] == sorted((score for _, _, score in hits), reverse=True)
+    assert {doc.metadata["domain"] for _, doc, _ in hits} <= {"energy", "medicine"}
+    assert hits[0][1].metadata["domain"] == "medicine"
+
+def test_count_and_get_span_every_domain_with_domain_tags():
+    store = domain_store()
+    assert store.count() == len(ENERGY) + len(MEDICINE)
+    result = store.get(limit=3, offset=len(ENERGY) - 1)
+    assert result["ids"] == ["energy-19", "medicine-0", "medicine-1"]
+    assert [metadata["domain"] for metadata in result["metadatas"]] == ["energy", "medicine", "medicine"]
+
+def test_lexical_hits_are_kept_to_the_routed_domains(tmp_path):
+    store = domain_store()
+    index = BM25Index.build(store, str(tmp_path / "bm25"))
+
+    assert {chunk_id.split("-")[0] for chunk_id, _ in index.search("solar", k=40)} == {"energy", "medicine"}
+    assert {chunk_id.split("-")[0] for chunk_id, _ in index.search("solar", k=40, domains=["energy"])} == {"energy"}
+
+def test_retrieve_does_not_fuse_in_off_topic_lexical_hits(engine, tmp_path):
+    store = domain_store(top_domains=1, margin=0.0)
+    engine.vectordb = store
+    engine.lexical_index = BM25Index.build(store, str(tmp_path / "bm25"))
+
+    # The words only occur in medicine chunks, but the query embedding routes to energy
+    trace = engine.retrieve("insulin diabetes", query_embedding=store.centroids[0].tolist())
+    assert trace.doc_ids
+    assert all(doc_id.startswith("energy-") for doc_id in trace.doc_ids)
+
+def test_stale_untagged_index_is_rebuilt_for_a_routed_corpus(tmp_path):
+    store = domain_store()
+    path = str(tmp_path / "bm25")
+    # Same chunk count, but built without the domain tags
+    BM25Index.build(FakeVectorStore(ENERGY + MEDICINE, EMBEDDING), path)
+    assert BM25Index.load_or_build(store, path).doc_domains is not None
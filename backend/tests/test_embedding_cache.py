@@ -0,0 +1,69 @@
+import sqlite3
+import time
+
+import numpy as np
+
+from app.core.embedding_cache import CachedEmbeddings, SQLiteVectorStore, normalize_query
+from benchmarks.fakes import FakeEmbeddings
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+def test_normalize_query():
+    assert normalize_query("  What is\n solar  energy? ") == "What is solar energy?"
+
+def test_memory_then_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    base = CountingEmbeddings()
+    cache = CachedEmbeddings(base, model_name="m", max_entries=1, disk_path=path)
+    first = cache.embed_query("solar energy")
+    assert cache.embed_query(" solar   energy ") == first
+    cache.embed_query("wind")  # pushes "solar energy" out of the 1-entry memory tier
+    assert cache.embed_query("solar energy") == first
+    assert base.calls == 2
+    assert cache.stats() == {"entries": 1, "memory_hits": 1, "disk_hits": 1, "misses": 2}
+
+    # Another process with the same model shares the disk tier
+    other = CachedEmbeddings(CountingEmbeddings(), model_name="m", disk_path=path)
+    assert other.embed_query("wind") == cache.embed_query("wind")
+    assert other.stats()["disk_hits"] == 1
+
+def test_disk_tier_keeps_the_most_recently_used_rows(tmp_path):
+    store = SQLiteVectorStore(str(tmp_path / "cache.sqlite3"), max_rows=3, prune_every=1)
+    for i in range(3):
+        store.put(f"k{i}", np.full(4, i, dtype=np.float32))
+        time.sleep(0.01)
+    store.get("k0")  # now the most recently used
+    store.put("k3", np.zeros(4, dtype=np.float32))
+
+    assert store.count() == 3
+    assert store.get("k1") is None
+    assert store.get("k0") is not None
+
+def test_disk_tier_expires_unused_rows_at_startup(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    store = SQLiteVectorStore(path)
+    store.put("old", np.zeros(4, dtype=np.float32))
+    store._connection().execute("UPDATE embeddings SET last_used = ?", (time.time() - 3600,))
+    store.put("new", np.zeros(4, dtype=np.float32))
+
+    reopened = SQLiteVectorStore(path, ttl_seconds=60)
+    assert reopened.count() == 1
+    assert reopened.get("new") is not None
+
+def test_disk_tier_migrates_a_cache_without_last_used(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+    conn.execute("INSERT INTO embeddings VALUES (?, ?)", ("legacy", np.ones(4, dtype=np.float32).tobytes()))
+    conn.commit()
+    conn.close()
+
+    store = SQLiteVectorStore(path, max_rows=10)
+    assert store.get("legacy").tolist() == [1.0] * 4
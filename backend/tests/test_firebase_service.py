@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("firebase_admin")
+
+from app.core.firebase_service import FirebaseService
+
+class FakeDoc:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data)
+
+class FakeQuery:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def where(self, *args):
+        return self
+
+    def order_by(self, *args, **kwargs):
+        return self
+
+    def limit(self, limit):
+        return FakeQuery(self.docs[:limit])
+
+    def stream(self):
+        return iter(self.docs)
+
+class FakeFirestore:
+    """Just enough of the Firestore client for the conversation reads"""
+
+    def __init__(self, conversations, messages, error=None):
+        self.conversations = conversations
+        self.messages = messages
+        self.error = error
+
+    def collection(self, name):
+        return self
+
+    def document(self, conversation_id):
+        self.conversation_id = conversation_id
+        return self
+
+    def get(self):
+        if self.error:
+            raise self.error
+        return FakeDoc(self.conversation_id, self.conversations.get(self.conversation_id))
+
+    def where(self, *args):
+        # newest first, as the DESCENDING query returns them
+        return FakeQuery([FakeDoc(f"m{i}", message) for i, message in reversed(list(enumerate(self.messages)))])
+
+def service(db):
+    firebase = FirebaseService()
+    firebase.db = db
+    firebase.initialized = True
+    return firebase
+
+MESSAGES = [{"type": "user", "content": f"q{i}"} for i in range(5)]
+
+def test_recent_messages_are_the_newest_in_order():
+    firebase = service(FakeFirestore({"c1": {"user_id": "alice"}}, MESSAGES))
+    messages = firebase.get_recent_conversation_messages("alice", "c1", limit=2)
+    assert [message["content"] for message in messages] == ["q3", "q4"]
+
+def test_another_users_conversation_is_refused():
+    firebase = service(FakeFirestore({"c1": {"user_id": "alice"}}, MESSAGES))
+    with pytest.raises(PermissionError):
+        firebase.get_recent_conversation_messages("mallory", "c1")
+
+def test_missing_conversation_has_no_history():
+    firebase = service(FakeFirestore({}, MESSAGES))
+    assert firebase.get_recent_conversation_messages("alice", "c1") == []
+
+def test_firestore_errors_mean_no_history():
+    firebase = service(FakeFirestore({"c1": {"user_id": "alice"}}, MESSAGES, error=RuntimeError("unavailable")))
+    assert firebase.get_recent_conversation_messages("alice", "c1") == []
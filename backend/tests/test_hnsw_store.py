@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("hnswlib")
+
+from app.core.hnsw_store import HnswVectorStore, build_from_collection
+from benchmarks.fakes import FakeEmbeddings, FakeVectorStore, synthetic_corpus
+from benchmarks.hnsw_vs_chroma import exact_top_k
+
+class FakeCollection(FakeVectorStore):
+    """FakeVectorStore with the Chroma collection attributes the converter reads"""
+    metadata = {"hnsw:space": "cosine"}
+
+@pytest.fixture
+def converted(tmp_path):
+    embedding = FakeEmbeddings(dim=32)
+    collection = FakeCollection(synthetic_corpus(300, words_per_chunk=20), embedding)
+    build_from_collection(collection, str(tmp_path), batch_size=64)
+    return collection, HnswVectorStore(str(tmp_path), ef_search=100), embedding
+
+def test_round_trip_keeps_ids_texts_and_metadata(converted):
+    collection, store, _ = converted
+    assert store.count() == collection.count()
+    ids = ["chunk-0", "chunk-150", "chunk-299"]
+    assert store.get(ids=ids) == collection.get(ids=ids)
+    assert store.get(limit=2, offset=64)["ids"] == ["chunk-64", "chunk-65"]
+    embeddings = store.get(ids=ids, include=["embeddings"])["embeddings"]
+    np.testing.assert_allclose(embeddings, collection.vectors[[0, 150, 299]], atol=1e-3)
+
+def test_search_finds_the_exact_neighbours(converted):
+    collection, store, embedding = converted
+    query = embedding.embed_query(collection.texts[42])
+    hits = store.search(query, 5)
+
+    assert hits[0][0] == "chunk-42"
+    assert hits[0][1].page_content == collection.texts[42]
+    assert hits[0][2] == pytest.approx(1.0, abs=1e-3)
+    truth = exact_top_k(collection.vectors, np.asarray([query]), 5, "cosine")[0]
+    assert {doc_id for doc_id, _, _ in hits} == {f"chunk-{label}" for label in truth}
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain.text_splitter")
+
+from app.ingestion.manifest import IndexManifest, read_generation
+from app.ingestion.pipeline import IngestionPipeline, chunk_ids_for
+from benchmarks.fakes import FakeEmbeddings
+
+@pytest.fixture(autouse=True)
+def fake_embeddings(monkeypatch):
+    import app.core.embeddings
+
+    monkeypatch.setattr(app.core.embeddings, "build_embeddings", lambda **kwargs: FakeEmbeddings(dim=16))
+
+def write(root, name, sentences):
+    path = os.path.join(root, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(f"{name} paragraph {i}. " + "word " * 40 for i in range(sentences)))
+
+def ingest(source_dir, db_path, full=False):
+    pipeline = IngestionPipeline(str(source_dir), db_path=str(db_path), collection_name="test",
+                                 workers=1, batch_size=4, chunk_size=200, chunk_overlap=0, full=full)
+    pipeline.run()
+    return pipeline
+
+def test_chunk_ids_are_content_derived_and_distinct():
+    ids = chunk_ids_for("a.txt", ["same", "same", "other"])
+    assert len(set(ids)) == 3
+    assert chunk_ids_for("a.txt", ["same"])[0] == ids[0]
+
+def test_incremental_runs_only_touch_what_changed(tmp_path):
+    source_dir, db_path = tmp_path / "docs", tmp_path / "db"
+    source_dir.mkdir()
+    write(source_dir, "a.txt", 6)
+    write(source_dir, "b.txt", 3)
+
+    first = ingest(source_dir, db_path)
+    total = first.collection.count()
+    assert first.chunks_embedded == total > 0
+
+    second = ingest(source_dir, db_path)
+    assert not second.changed and second.files_unchanged == 2
+
+    write(source_dir, "a.txt", 4)
+    os.remove(source_dir / "b.txt")
+    third = ingest(source_dir, db_path)
+    assert third.files_deleted == 1
+    assert third.chunks_embedded == 0  # a.txt only lost paragraphs
+    assert third.collection.count() == len(IndexManifest(str(db_path), "test").all_chunk_ids())
+
+def test_full_rebuild_drops_orphans_and_stale_bm25(tmp_path):
+    source_dir, db_path = tmp_path / "docs", tmp_path / "db"
+    source_dir.mkdir()
+    write(source_dir, "a.txt", 3)
+    pipeline = ingest(source_dir, db_path)
+    expected = pipeline.collection.count()
+    pipeline.collection.add(ids=["orphan"], embeddings=[[0.1] * 16], documents=["left behind"])
+    os.makedirs(db_path / "bm25")
+
+    rebuilt = ingest(source_dir, db_path, full=True)
+    assert rebuilt.collection.count() == expected
+    assert rebuilt.collection.get(ids=["orphan"])["ids"] == []
+    assert not os.path.exists(db_path / "bm25")
+    assert rebuilt.changed
+
+def test_publish_bumps_generation(tmp_path):
+    manifest = IndexManifest(str(tmp_path))
+    assert read_generation(str(tmp_path)) == 0
+    assert manifest.bump_generation() == 1
+    assert read_generation(str(tmp_path)) == 1
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.lexical_index import BM25Index, chunk_ids_checksum, reciprocal_rank_fusion, tokenize
+from benchmarks.fakes import FakeEmbeddings, FakeVectorStore
+
+TEXTS = [
+    "Solar panels convert sunlight into electricity.",
+    "Wind turbines convert wind into electricity.",
+    "The GDP of India grew 7.2 percent in 2023.",
+    "Solar solar solar thermal collectors heat water.",
+]
+
+def store(texts=TEXTS, id_prefix="chunk"):
+    return FakeVectorStore(texts, FakeEmbeddings(dim=8), id_prefix=id_prefix)
+
+def test_tokenize_keeps_figures_and_drops_overlong_tokens():
+    assert tokenize("GDP grew 7.2% in 2023 " + "x" * 41) == ["gdp", "grew", "7", "2", "in", "2023"]
+
+def test_search_ranks_by_bm25(tmp_path):
+    index = BM25Index.build(store(), str(tmp_path / "bm25"))
+    hits = index.search("solar electricity", k=3)
+    assert [chunk_id for chunk_id, _ in hits] == ["chunk-0", "chunk-3", "chunk-1"]
+    assert hits[0][1] > hits[1][1] > hits[2][1] > 0
+    assert index.search("nuclear") == []
+
+def test_load_or_build_rebuilds_a_stale_index(tmp_path):
+    path = str(tmp_path / "bm25")
+    BM25Index.build(store(TEXTS[:2]), path)
+    index = BM25Index.load_or_build(store(), path)
+    assert index.size == len(TEXTS)
+    assert BM25Index.load(path).search("india")[0][0] == "chunk-2"
+
+def test_load_or_build_rebuilds_when_chunks_were_replaced_at_the_same_count(tmp_path):
+    path = str(tmp_path / "bm25")
+    BM25Index.build(store(), path)
+    # e.g. an incremental re-index run with --skip-bm25
+    index = BM25Index.load_or_build(store(id_prefix="reindexed"), path)
+    assert index.search("india")[0][0] == "reindexed-2"
+
+def test_chunk_ids_checksum_ignores_order():
+    assert chunk_ids_checksum(["a", "b", "c"]) == chunk_ids_checksum(["c", "a", "b"])
+    assert chunk_ids_checksum(["a", "b", "c"]) != chunk_ids_checksum(["a", "b", "d"])
+
+def test_concurrent_builds_leave_one_consistent_index(tmp_path):
+    path = str(tmp_path / "bm25")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        indexes = list(pool.map(lambda _: BM25Index.load_or_build(store(), path), range(8)))
+
+    assert all(index.size == len(TEXTS) for index in indexes)
+    assert not [name for name in os.listdir(path) if name.endswith(".tmp")]
+    assert BM25Index.load(path).search("wind")[0][0] == "chunk-1"
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]])
+    assert [doc_id for doc_id, _ in fused] == ["b", "c", "a", "d"]
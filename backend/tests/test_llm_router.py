@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.llm_router import LLMBackend, LLMRouter, is_backend_failure
+
+class StatusError(Exception):
+    """Shaped like the SDKs' APIStatusError"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class APIConnectionError(Exception):
+    """Named like the SDKs' connection error"""
+
+class FakeLLM:
+    def __init__(self, name, error=None, chunk_delay=0.0):
+        self.name = name
+        self.error = error
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self.name
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+    async def astream(self, prompt):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        for part in (self.name, "!"):
+            await asyncio.sleep(self.chunk_delay)
+            yield part
+
+def router(*llms, latencies=None, **kwargs):
+    latencies = latencies or [1.0 + i for i in range(len(llms))]
+    backends = [LLMBackend(llm.name, llm, prior_latency=latency) for llm, latency in zip(llms, latencies)]
+    return LLMRouter(backends, explore_rate=0.0, **kwargs)
+
+@pytest.mark.parametrize("error, failure", [
+    (httpx.ConnectError("refused"), True),
+    (httpx.ReadTimeout("slow"), True),
+    (asyncio.TimeoutError(), True),
+    (APIConnectionError("reset"), True),
+    (StatusError(429), True),
+    (StatusError(503), True),
+    (StatusError(400), False),
+    (StatusError(413), False),
+    (ValueError("bad prompt"), False),
+])
+def test_is_backend_failure(error, failure):
+    assert is_backend_failure(error) is failure
+
+def test_fastest_backend_is_used():
+    fast, slow = FakeLLM("fast"), FakeLLM("slow")
+    assert router(slow, fast, latencies=[2.0, 0.5]).invoke("q") == "fast"
+    assert slow.calls == 0
+
+def test_server_error_fails_over_and_counts_against_the_backend():
+    broken, spare = FakeLLM("broken", StatusError(503)), FakeLLM("spare")
+    llm_router = router(broken, spare)
+    assert llm_router.invoke("q") == "spare"
+    assert llm_router.stats()["broken"]["failures"] == 1
+
+def test_client_error_is_raised_without_failover_or_penalty():
+    rejecting, spare = FakeLLM("rejecting", StatusError(400)), FakeLLM("spare")
+    llm_router = router(rejecting, spare, failure_threshold=1)
+    with pytest.raises(StatusError):
+        asyncio.run(llm_router.ainvoke("q"))
+    assert spare.calls == 0
+    assert llm_router.stats()["rejecting"] == {
+        "latency_ms": 1000.0, "ttft_ms": None, "error_rate": 0.0, "healthy": True, "calls": 0, "failures": 0
+    }
+
+def test_circuit_opens_after_repeated_failures():
+    broken, spare = FakeLLM("broken", httpx.ConnectError("refused")), FakeLLM("spare", StatusError(503))
+    llm_router = router(broken, spare, failure_threshold=2, cooldown=60)
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            llm_router.invoke("q")
+    assert not llm_router.stats()["broken"]["healthy"]
+
+def test_stream_fails_over_before_the_first_chunk():
+    broken, spare = FakeLLM("broken", httpx.ReadTimeout("slow")), FakeLLM("spare")
+
+    async def collect():
+        return [chunk async for chunk in router(broken, spare).astream("q")]
+
+    assert asyncio.run(collect()) == ["spare", "!"]
+
+def test_stream_latency_is_total_time_and_ttft_is_tracked_apart():
+    streaming = FakeLLM("streaming", chunk_delay=0.05)
+    llm_router = router(streaming, latencies=[0.0])
+    llm_router.backends[0].alpha = 1.0
+
+    async def collect():
+        return [chunk async for chunk in llm_router.astream("q")]
+
+    asyncio.run(collect())
+    stats = llm_router.stats()["streaming"]
+    assert stats["calls"] == 1
+    assert stats["ttft_ms"] >= 40
+    assert stats["latency_ms"] >= stats["ttft_ms"] + 40
+
+def test_policy_view_prefers_its_backends():
+    cheap, big = FakeLLM("cheap"), FakeLLM("big")
+    llm_router = router(big, cheap, latencies=[0.5, 2.0])
+    assert llm_router.for_policy(["cheap"]).invoke("q") == "cheap"
+    assert llm_router.invoke("q") == "big"
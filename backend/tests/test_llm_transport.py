@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.llm_transport import AsyncRetryingTransport, RetryingTransport, RetryPolicy, retry_after_seconds
+
+URL = "http://llm.test/v1/chat/completions"
+FAST = RetryPolicy(max_retries=3, backoff_base=0.001, backoff_max=0.002, deadline=5.0)
+
+def scripted(*outcomes):
+    """MockTransport handler returning (or raising) the outcomes in turn"""
+    calls = []
+
+    def handler(request):
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(request)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={"ok": outcome == 200})
+
+    return handler, calls
+
+def sync_client(handler, policy=FAST):
+    transport = RetryingTransport(httpx.MockTransport(handler), policy)
+    return httpx.Client(transport=transport), transport
+
+def test_retry_after_header():
+    assert retry_after_seconds(httpx.Response(429, headers={"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(httpx.Response(429, headers={"retry-after": "soon"})) is None
+    assert retry_after_seconds(httpx.Response(429)) is None
+    assert FAST.backoff(0, httpx.Response(429, headers={"retry-after": "0.5"})) == 0.5
+
+def test_backoff_stays_within_the_jittered_step():
+    policy = RetryPolicy(backoff_base=1.0, backoff_max=4.0)
+    for attempt, ceiling in [(0, 1.0), (1, 2.0), (5, 4.0)]:
+        assert ceiling / 2 <= policy.backoff(attempt) <= ceiling
+
+def test_server_errors_are_retried():
+    handler, calls = scripted(503, 502, 200)
+    client, transport = sync_client(handler)
+    response = client.post(URL, json={"prompt": "q"})
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert calls[2].content == calls[0].content  # the body is re-sent
+    assert transport.stats.as_dict()["retries"] == 2
+
+def test_client_errors_are_returned_without_retry():
+    handler, calls = scripted(400)
+    client, _ = sync_client(handler)
+    assert client.post(URL).status_code == 400
+    assert len(calls) == 1
+
+def test_retries_give_up_with_the_last_response_or_error():
+    handler, calls = scripted(429)
+    client, _ = sync_client(handler)
+    assert client.post(URL).status_code == 429
+    assert len(calls) == FAST.max_retries + 1
+
+    handler, _ = scripted(httpx.ConnectError("refused"))
+    client, _ = sync_client(handler)
+    with pytest.raises(httpx.ConnectError):
+        client.post(URL)
+
+def test_async_deadline_raises_read_timeout():
+    async def slow(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200)
+
+    transport = AsyncRetryingTransport(httpx.MockTransport(slow), RetryPolicy(deadline=0.05))
+
+    async def call():
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.post(URL)
+
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(call())
+    assert transport.stats.as_dict()["deadline_exceeded"] == 1
+
+def test_hedged_request_wins_over_a_slow_primary():
+    calls = []
+
+    async def first_slow(request):
+        calls.append(request)
+        await asyncio.sleep(1 if len(calls) == 1 else 0)
+        return httpx.Response(200, json={"copy": len(calls)})
+
+    transport = AsyncRetryingTransport(httpx.MockTransport(first_slow), FAST, hedge=True, hedge_delay=0.02)
+
+    async def call():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return (await client.post(URL)).json()
+
+    assert asyncio.run(call()) == {"copy": 2}
+    assert transport.stats.as_dict()["hedges"] == 1
+    assert transport.stats.as_dict()["hedge_wins"] == 1
@@ -0,0 +1,49 @@
+import os
+
+from app.config.settings import settings
+from app.ingestion.manifest import GENERATION_FILE, MANIFEST_FILE, IndexManifest, manifest_file, read_generation
+
+def test_manifest_file_per_collection():
+    assert manifest_file() == MANIFEST_FILE
+    assert manifest_file(settings.COLLECTION_NAME) == MANIFEST_FILE
+    assert manifest_file("medical") == "ingest_manifest-medical.sqlite3"
+
+def test_record_source_replaces_its_chunks(tmp_path):
+    manifest = IndexManifest(str(tmp_path))
+    manifest.record_source("a.txt", "h1", ["a-1", "a-2"])
+    manifest.record_source("b.txt", "h2", ["b-1"])
+    manifest.record_source("a.txt", "h3", ["a-3"])
+
+    assert manifest.source_hashes() == {"a.txt": "h3", "b.txt": "h2"}
+    assert manifest.chunk_ids("a.txt") == {"a-3"}
+    assert manifest.all_chunk_ids() == {"a-3", "b-1"}
+
+def test_remove_source_and_reset(tmp_path):
+    manifest = IndexManifest(str(tmp_path))
+    manifest.record_source("a.txt", "h1", ["a-1"])
+    manifest.record_source("b.txt", "h2", ["b-1"])
+
+    manifest.remove_source("a.txt")
+    assert manifest.source_hashes() == {"b.txt": "h2"}
+    assert manifest.all_chunk_ids() == {"b-1"}
+
+    manifest.reset()
+    assert manifest.source_hashes() == {}
+    assert manifest.all_chunk_ids() == set()
+
+def test_manifest_survives_reopening(tmp_path):
+    IndexManifest(str(tmp_path), "medical").record_source("a.txt", "h1", ["a-1"])
+    assert IndexManifest(str(tmp_path), "medical").source_hashes() == {"a.txt": "h1"}
+    assert IndexManifest(str(tmp_path)).source_hashes() == {}
+
+def test_generation_is_bumped_atomically(tmp_path):
+    manifest = IndexManifest(str(tmp_path))
+    assert read_generation(str(tmp_path)) == 0
+    assert manifest.bump_generation() == 1
+    assert manifest.bump_generation() == 2
+    assert read_generation(str(tmp_path)) == 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_unreadable_generation_counts_as_zero(tmp_path):
+    (tmp_path / GENERATION_FILE).write_text("garbage")
+    assert read_generation(str(tmp_path)) == 0
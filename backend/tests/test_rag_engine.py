@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+class CountingLLM:
+    """Fails or hangs on demand and counts every call"""
+
+    def __init__(self, error=None, delay=0.0):
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    def _respond(self):
+        if self.error:
+            raise self.error
+        return type("Message", (), {"content": "answer"})()
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return self._respond()
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self._respond()
+
+    def __call__(self, prompt):
+        return self.invoke(prompt).content
+
+def test_concise_failure_is_not_retried_through_the_same_router(engine):
+    engine.llm = engine.concise_llm = CountingLLM(error=RuntimeError("backend down"))
+    with pytest.raises(HTTPException):
+        asyncio.run(engine.aask_concise_question("What is solar energy?"))
+    assert engine.llm.calls == 1
+
+def test_cancelled_concise_question_makes_no_fallback_call(engine):
+    engine.llm = engine.concise_llm = CountingLLM(delay=5.0)
+
+    async def run():
+        task = asyncio.ensure_future(engine.aask_concise_question("What is solar energy?"))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert engine.llm.calls == 1
+
+def test_follow_ups_with_prior_docs_bypass_answer_cache_and_single_flight(engine):
+    question = "What is solar energy?"
+    asyncio.run(engine.aask_comprehensive_question(question))
+    assert engine.answer_cache.stats()["entries"] == 1
+
+    engine.llm = CountingLLM()
+
+    async def run():
+        return await asyncio.gather(*(
+            engine.aask_comprehensive_question(question, prior_doc_ids=[f"chunk-{i}"]) for i in range(3)
+        ))
+
+    answers = asyncio.run(run())
+    # Neither served from the cached answer nor coalesced: one LLM call each
+    assert engine.llm.calls == 3
+    assert [answer for answer, _ in answers] == ["answer."] * 3
+    assert engine.answer_cache.stats()["entries"] == 1
+
+def test_prior_doc_ids_are_fused_into_retrieval(engine):
+    trace = engine.retrieve("term5 term9", prior_doc_ids=["chunk-150"])
+    assert "chunk-150" in trace.doc_ids
+    assert "chunk-150" not in engine.retrieve("term5 term9").doc_ids
@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.core.reranker import CrossEncoderReranker
+
+class SlowModel:
+    """Scores by text length; blocks until released"""
+
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.error = error
+        self.calls = 0
+
+    def predict(self, pairs, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return np.array([len(text) for _, text in pairs], dtype=np.float32)
+
+def test_rerank_orders_by_score():
+    model = SlowModel()
+    model.release.set()
+    reranker = CrossEncoderReranker("test", budget_ms=1000, model=model)
+    order, scores = reranker.rerank("q", ["a", "ccc", "bb"], 2)
+    assert order == [1, 2]
+    assert scores == [3.0, 2.0]
+
+def test_requests_skip_reranking_while_an_overrun_job_runs():
+    model = SlowModel()
+    reranker = CrossEncoderReranker("test", budget_ms=20, workers=2, model=model)
+
+    assert reranker.rerank("q", ["a", "bb"], 1) is None  # over budget, still scoring
+    assert reranker.rerank("q", ["a", "bb"], 1) is None  # second worker, also over budget
+    assert reranker.rerank("q", ["a", "bb"], 1) is None  # all busy: nothing new submitted
+    assert (reranker.fallbacks, reranker.skipped, model.calls) == (2, 1, 2)
+
+    model.release.set()
+    reranker._executor.shutdown(wait=True)  # the overrun jobs have finished
+    reranker._executor = ThreadPoolExecutor(max_workers=2)
+    assert reranker.rerank("q", ["a", "bb"], 1) == ([1], [2.0])
+
+def test_scorer_errors_fall_back_to_retrieval_order():
+    model = SlowModel(error=RuntimeError("model crashed"))
+    model.release.set()
+    reranker = CrossEncoderReranker("test", budget_ms=1000, workers=1, model=model)
+
+    assert reranker.rerank("q", ["a", "bb"], 1) is None
+    assert reranker.fallbacks == 1
+    assert reranker.rerank("q", ["a", "bb"], 1) is None  # the failed job freed its worker
+    assert model.calls == 2
@@ -0,0 +1,78 @@
+import sys
+from types import SimpleNamespace
+
+import chromadb
+import numpy as np
+import pytest
+
+from app.core.sharded_store import ShardedVectorStore, read_shard_generation, shard_db_path, shard_of, split_collection
+from benchmarks.fakes import FakeEmbeddings, FakeVectorStore, synthetic_corpus
+
+EMBEDDING = FakeEmbeddings(dim=16)
+
+class FakeCollection(FakeVectorStore):
+    """FakeVectorStore with the Chroma collection attributes the split reads"""
+    metadata = {"hnsw:space": "cosine"}
+
+@pytest.fixture
+def corpus():
+    return synthetic_corpus(120, words_per_chunk=20)
+
+def open_shard(root, generation, shard, name="docs"):
+    return chromadb.PersistentClient(path=shard_db_path(root, generation, shard)).get_collection(name)
+
+def test_split_collection_partitions_every_chunk_by_id(tmp_path, corpus):
+    collection = FakeCollection(corpus, EMBEDDING)
+    root = str(tmp_path)
+    assert split_collection(collection, root, 3, "docs", batch_size=50) == 1
+    assert read_shard_generation(root) == 1
+
+    seen = []
+    for shard in range(3):
+        result = open_shard(root, 1, shard).get(include=["documents", "embeddings"])
+        assert all(shard_of(chunk_id, 3) == shard for chunk_id in result["ids"])
+        for chunk_id, text, vector in zip(result["ids"], result["documents"], result["embeddings"]):
+            position = collection.ids.index(chunk_id)
+            assert text == corpus[position]
+            np.testing.assert_allclose(vector, collection.vectors[position], rtol=1e-6)
+        seen += result["ids"]
+    assert sorted(seen) == sorted(collection.ids)
+
+def test_split_collection_keeps_the_previous_generation_only(tmp_path, corpus):
+    collection = FakeCollection(corpus, EMBEDDING)
+    root = str(tmp_path)
+    for _ in range(3):
+        generation = split_collection(collection, root, 2, "docs")
+    assert generation == 3
+    assert sorted(path.name for path in tmp_path.glob("gen-*")) == ["gen-2", "gen-3"]
+
+def test_shard_index_splits_the_requested_collection(monkeypatch, tmp_path):
+    from app.scripts import shard_index
+
+    calls = []
+    monkeypatch.setattr(shard_index, "ChromaVectorStore", lambda path, name: SimpleNamespace(collection=name))
+    monkeypatch.setattr(shard_index, "split_collection", lambda *args: calls.append(args))
+    monkeypatch.setattr(shard_index, "IndexManifest", lambda path: SimpleNamespace(bump_generation=lambda: None))
+    monkeypatch.setattr(sys, "argv", ["shard_index", "--collection", "legal", "--out", str(tmp_path), "--shards", "2"])
+
+    shard_index.main()
+    assert calls == [("legal", str(tmp_path), 2, "legal")]
+
+def test_sharded_store_fans_out_and_merges_by_relevance(start_sidecar, corpus):
+    shards = [corpus[i::3] for i in range(3)]
+    stores = [FakeVectorStore(texts, EMBEDDING, id_prefix=f"shard{i}") for i, texts in enumerate(shards)]
+    store = ShardedVectorStore([start_sidecar(s, EMBEDDING, name=f"shard-{i}").socket_path for i, s in enumerate(stores)])
+
+    query = EMBEDDING.embed_query(corpus[4])  # corpus[4] is shard1-1
+    hits = store.search(query, 10)
+    assert hits[0][0] == "shard1-1"
+    scores = [score for _, _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+
+    # Same top-k as one exact search over the whole corpus
+    everything = FakeVectorStore(corpus, EMBEDDING)
+    expected = [corpus[int(chunk_id.split("-")[1])] for chunk_id, _, _ in everything.search(query, 10)]
+    assert [doc.page_content for _, doc, _ in hits] == expected
+
+    assert store.count() == len(corpus)
+    assert store.get(limit=2, offset=len(shards[0]) - 1)["ids"] == [f"shard0-{len(shards[0]) - 1}", "shard1-0"]
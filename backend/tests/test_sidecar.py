@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.sidecar import protocol
+from app.sidecar.client import SidecarClient, SidecarEmbeddings, SidecarVectorStore
+from benchmarks.fakes import FakeEmbeddings, FakeVectorStore, synthetic_corpus
+
+EMBEDDING = FakeEmbeddings(dim=16)
+
+class SlowStore(FakeVectorStore):
+    """Counts searches; each takes delay seconds"""
+
+    def __init__(self, *args, delay=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+        self.searches = 0
+
+    def search(self, query_embedding, k):
+        self.searches += 1
+        time.sleep(self.delay)
+        return super().search(query_embedding, k)
+
+@pytest.fixture
+def corpus():
+    return synthetic_corpus(50, words_per_chunk=20)
+
+def test_framing_round_trips():
+    texts = ["solar", "énergie", ""]
+    assert protocol.unpack_texts(protocol.pack_texts(texts)) == texts
+    vectors = np.arange(6, dtype=np.float32).reshape(2, 3)
+    np.testing.assert_array_equal(protocol.unpack_vectors(protocol.pack_vectors(vectors)), vectors)
+    assert protocol.unpack_vectors(protocol.pack_vectors(np.zeros((0, 3)))).shape == (0, 0)
+
+def test_client_against_a_live_server(start_sidecar, corpus):
+    store = SlowStore(corpus, EMBEDDING)
+    client = SidecarClient(start_sidecar(store, EMBEDDING).socket_path, timeout=5)
+    embeddings = SidecarEmbeddings(client)
+    vectors = SidecarVectorStore(client)
+
+    query = embeddings.embed_query(corpus[7])
+    np.testing.assert_allclose(query, EMBEDDING.embed_query(corpus[7]), rtol=1e-6)
+    assert len(embeddings.embed_documents(corpus[:3])) == 3
+
+    hits = vectors.search(query, 3)
+    assert hits[0][0] == "chunk-7"
+    assert hits[0][1].page_content == corpus[7]
+    assert vectors.count() == len(corpus)
+
+    result = vectors.get(ids=["chunk-1", "chunk-2"], include=["documents", "embeddings"])
+    assert result["documents"] == corpus[1:3]
+    np.testing.assert_allclose(result["embeddings"], store.vectors[1:3])
+    assert client.stats()["count"] == len(corpus)
+
+def test_server_errors_are_reported_and_the_connection_survives(start_sidecar, corpus):
+    client = SidecarClient(start_sidecar(FakeVectorStore(corpus, EMBEDDING), EMBEDDING).socket_path, timeout=5)
+    with pytest.raises(protocol.SidecarError, match="Unknown sidecar opcode"):
+        client._request(99)
+    assert client.count() == len(corpus)
+
+def test_client_reconnects_after_a_sidecar_restart(start_sidecar, corpus):
+    sidecar = start_sidecar(FakeVectorStore(corpus, EMBEDDING), EMBEDDING)
+    client = SidecarClient(sidecar.socket_path, timeout=5)
+    assert client.count() == len(corpus)
+    sidecar.stop()
+
+    start_sidecar(FakeVectorStore(corpus[:10], EMBEDDING), EMBEDDING)
+    assert client.count() == 10
+
+def test_missing_sidecar_raises_sidecar_error(socket_dir):
+    with pytest.raises(protocol.SidecarError, match="unavailable"):
+        SidecarClient(f"{socket_dir}/missing.sock", timeout=1).count()
+
+def test_timed_out_search_is_not_sent_again(start_sidecar, corpus):
+    store = SlowStore(corpus, EMBEDDING, delay=0.3)
+    client = SidecarClient(start_sidecar(store, EMBEDDING).socket_path, timeout=0.05)
+    with pytest.raises(protocol.SidecarError, match="failed"):
+        client.search(EMBEDDING.embed_query("q"), 3)
+    time.sleep(0.4)
+    assert store.searches == 1
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*(flights.run("q", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "followers": 4}
+
+def test_different_keys_and_later_calls_run_separately():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        first = await asyncio.gather(flights.run("a", work), flights.run("b", work))
+        return first, await flights.run("a", work)
+
+    assert asyncio.run(run()) == ([1, 2], 3)
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("backend down")
+
+    async def run():
+        return await asyncio.gather(flights.run("q", fail), flights.run("q", fail), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_one_cancelled_waiter_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def run():
+        leaver = asyncio.ensure_future(flights.run("q", work))
+        stayer = asyncio.ensure_future(flights.run("q", work))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+        return await stayer, leaver
+
+    answer, leaver = asyncio.run(run())
+    assert answer == "answer"
+    assert leaver.cancelled()
+
+def test_work_is_cancelled_when_every_waiter_leaves():
+    flights = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+
+    async def run():
+        waiter = asyncio.ensure_future(flights.run("q", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0.08)
+
+    asyncio.run(run())
+    assert finished == []
+    assert flights.stats()["in_flight"] == 0
@@ -0,0 +1,33 @@
+import pytest
+
+from app.core.utils import StreamingTextCleaner, clean_repetitive_text
+
+TEXTS = [
+    "",
+    "Solar energy comes from the sun",
+    "Solar energy comes from the sun. It is renewable. It is renewable. Panels convert it.",
+    "One. Two. Three. Four. Five. Six. Seven. One. Eight. Nine.",
+    "A. B. A. C. D. E. F. G. B. H.",
+    "Trailing dots... and 3.5 kW panels. Done.",
+]
+
+def stream(text, size):
+    cleaner = StreamingTextCleaner()
+    pieces = [cleaner.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    pieces.append(cleaner.finish())
+    return "".join(pieces), cleaner
+
+def test_clean_repetitive_text_drops_repeats():
+    assert clean_repetitive_text("It works. It works. Done") == "It works. Done."
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("size", [1, 3, 16, 1000])
+def test_streamed_output_matches_clean_repetitive_text(text, size):
+    streamed, cleaner = stream(text, size)
+    assert streamed == cleaner.text
+    assert streamed == (clean_repetitive_text(text) or "")
+
+def test_stops_once_the_model_loops():
+    _, cleaner = stream("One. Two. Three. Four. Five. Six. Seven. One. Eight.", 4)
+    assert cleaner.stopped
+    assert cleaner.feed("Nine.") == ""